@@ -1,54 +1,169 @@
 import os
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters, ConversationHandler, CallbackQueryHandler
-from src.config import TELEGRAM_TOKEN, GOOGLE_CREDENTIALS_FILE, GOOGLE_SHEET_NAME, GOOGLE_SHEET_ID, GOOGLE_SCOPES, ADMIN_CHAT_IDS
+from src.config import (
+    TELEGRAM_TOKEN, GOOGLE_CREDENTIALS_FILE, GOOGLE_SHEET_NAME, GOOGLE_SHEET_ID, GOOGLE_SCOPES, ADMIN_CHAT_IDS,
+    SHEETS_SCHEMA_CACHE_PATH, SHEETS_SNAPSHOT_PATH, SHEETS_SNAPSHOT_INTERVAL,
+    CATALOG_CACHE_TTL, SHEETS_MAX_WORKERS, SHEETS_CALL_TIMEOUT, BOOKING_WRITE_INTERVAL, BOOKING_WRITE_BATCH_SIZE,
+    BOOKING_JOURNAL_PATH, BOOKING_DEAD_LETTER_PATH,
+    SLOT_HOLD_SECONDS, STORAGE_BACKEND, SQLITE_DB_PATH, SHEETS_MIRROR_INTERVAL,
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_PER_CHAT_RATE, OUTBOUND_WORKERS, BOT_MODE, WEBHOOK_URL, WEBHOOK_LISTEN,
+    WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_MAX_CONNECTIONS, CONCURRENT_UPDATES,
+    PERSISTENCE_DB_PATH, PERSISTENCE_UPDATE_INTERVAL, METRICS_HOST, METRICS_PORT,
+    SHEETS_READ_QUOTA, SHEETS_WRITE_QUOTA, SHEETS_QUOTA_WINDOW, SHEETS_INTERACTIVE_RESERVE, SHEETS_MAX_RETRIES,
+    SHEETS_BREAKER_FAILURES, SHEETS_BREAKER_SLOW_CALL, SHEETS_BREAKER_RESET,
+    BOOKING_SYNC_INTERVAL, BOOKING_RECONCILE_INTERVAL, BOOKING_ARCHIVE_INTERVAL, BOOKING_ARCHIVE_AFTER_DAYS,
+    BOOKING_DAYS_AHEAD, BOOKING_TIMEZONE, SEARCH_RESULTS_LIMIT, LOG_QUEUE_SIZE, LOG_OVERFLOW_POLICY
+)
 from src.logger import setup_logger
 
 # Import components from modular structure
 from src.facades.sheets_facade import SheetsFacade
+from src.facades.async_sheets_facade import AsyncSheetsFacade
+from src.facades.quota_governor import QuotaGovernor
+from src.facades.circuit_breaker import CircuitBreaker
+from src.storage import SQLiteStorage, SheetsMirror
 from src.observers.notification_manager import NotificationManager
 from src.states.state_manager import StateManager
 from src.commands.booking_commands import BookingCommand, CancelCommand
 from src.observers.notification_manager import UserNotifier, AdminNotifier
+from src.messaging import OutboundQueue, TelegramRateLimiter
+from src.persistence import InstanceLock, SQLiteKeyValueStore, StorePersistence
+from src.metrics import REGISTRY, MetricsServer, register_cache
+from src.metrics.instruments import OUTBOUND_QUEUE_DEPTH, SHEETS_QUOTA_USAGE
 
 # Setup logging
-logger = setup_logger()
+logger = setup_logger(LOG_QUEUE_SIZE, LOG_OVERFLOW_POLICY)
 
 # Define conversation states
 LOCATION, PITCH_SELECTION, TIMESLOT, CONFIRMATION, CONTACT_INFO_NAME, CONTACT_INFO_PHONE = range(6)
+# Numbered after the original states so persisted conversations keep their state numbers
+DATE_SELECTION, SEARCH_RESULTS = 6, 7
 
-# Initialize components directly
-try:
-    # Create facade
-    sheets_facade = SheetsFacade(
-        GOOGLE_CREDENTIALS_FILE,
-        GOOGLE_SCOPES,
-        GOOGLE_SHEET_NAME,
-        GOOGLE_SHEET_ID
-    )
-    
-    # Create observer
-    notification_manager = NotificationManager()
-    
-    # Add user notifier
-    notification_manager.add_observer(UserNotifier())
-    
-    # Add admin notifier if admin chat IDs are configured
-    if ADMIN_CHAT_IDS:
-        notification_manager.add_observer(AdminNotifier(ADMIN_CHAT_IDS))
-        logger.info(f'Added AdminNotifier with {len(ADMIN_CHAT_IDS)} admin chat IDs: {ADMIN_CHAT_IDS}')
-    
-    # Create state manager
-    state_manager = StateManager(sheets_facade, notification_manager)
-    
-    # Create commands
-    booking_command = BookingCommand(state_manager)
-    cancel_command = CancelCommand()
-    
-    logger.info('Successfully initialized components')
-except Exception as e:
-    logger.error(f'Failed to initialize components: {str(e)}')
-    raise
+# Components, built by init_components() when the bot starts rather than when this module is imported
+sheets_governor = None
+sheets_facade = None
+sheets_mirror = None
+storage = None
+async_sheets_facade = None
+notification_manager = None
+outbound_queue = None
+state_manager = None
+metrics_server = None
+booking_command = None
+cancel_command = None
+
+def init_components():
+    """Build storage, messaging and state components, no network calls are made until they are used"""
+    global sheets_governor, sheets_facade, sheets_mirror, storage, async_sheets_facade, notification_manager
+    global outbound_queue, state_manager, metrics_server, booking_command, cancel_command
+    try:
+        # Shared Sheets API budget, retries and backoff, and the breaker that stops calls during outages
+        sheets_breaker = None
+        if SHEETS_BREAKER_FAILURES > 0:
+            sheets_breaker = CircuitBreaker(SHEETS_BREAKER_FAILURES, SHEETS_BREAKER_SLOW_CALL, SHEETS_BREAKER_RESET)
+        sheets_governor = QuotaGovernor(
+            read_limit=SHEETS_READ_QUOTA,
+            write_limit=SHEETS_WRITE_QUOTA,
+            window=SHEETS_QUOTA_WINDOW,
+            interactive_reserve=SHEETS_INTERACTIVE_RESERVE,
+            max_retries=SHEETS_MAX_RETRIES,
+            breaker=sheets_breaker
+        )
+        
+        if STORAGE_BACKEND == 'sqlite':
+            # Local indexed storage, Google Sheets becomes an optional background mirror
+            storage = SQLiteStorage(SQLITE_DB_PATH, hold_seconds=SLOT_HOLD_SECONDS)
+            if GOOGLE_CREDENTIALS_FILE and SHEETS_MIRROR_INTERVAL > 0:
+                sheets_facade = SheetsFacade(
+                    GOOGLE_CREDENTIALS_FILE,
+                    GOOGLE_SCOPES,
+                    GOOGLE_SHEET_NAME,
+                    GOOGLE_SHEET_ID,
+                    catalog_ttl=CATALOG_CACHE_TTL,
+                    write_batch_interval=0,
+                    governor=sheets_governor,
+                    booking_sync_interval=0,
+                    schema_cache_path=SHEETS_SCHEMA_CACHE_PATH
+                )
+                sheets_mirror = SheetsMirror(storage, sheets_facade, SHEETS_MIRROR_INTERVAL)
+                sheets_mirror.start()
+        else:
+            # Create facade
+            sheets_facade = SheetsFacade(
+                GOOGLE_CREDENTIALS_FILE,
+                GOOGLE_SCOPES,
+                GOOGLE_SHEET_NAME,
+                GOOGLE_SHEET_ID,
+                catalog_ttl=CATALOG_CACHE_TTL,
+                write_batch_interval=BOOKING_WRITE_INTERVAL,
+                write_batch_size=BOOKING_WRITE_BATCH_SIZE,
+                hold_seconds=SLOT_HOLD_SECONDS,
+                governor=sheets_governor,
+                booking_sync_interval=BOOKING_SYNC_INTERVAL,
+                booking_reconcile_interval=BOOKING_RECONCILE_INTERVAL,
+                booking_archive_interval=BOOKING_ARCHIVE_INTERVAL,
+                booking_archive_after_days=BOOKING_ARCHIVE_AFTER_DAYS,
+                timezone=BOOKING_TIMEZONE,
+                schema_cache_path=SHEETS_SCHEMA_CACHE_PATH,
+                snapshot_path=SHEETS_SNAPSHOT_PATH,
+                snapshot_interval=SHEETS_SNAPSHOT_INTERVAL,
+                journal_path=BOOKING_JOURNAL_PATH,
+                dead_letter_path=BOOKING_DEAD_LETTER_PATH
+            )
+            storage = sheets_facade
+        
+        # Wrap storage so handlers await it instead of blocking the event loop
+        async_sheets_facade = AsyncSheetsFacade(
+            storage,
+            max_workers=SHEETS_MAX_WORKERS,
+            timeout=SHEETS_CALL_TIMEOUT
+        )
+        
+        # Create observer
+        notification_manager = NotificationManager()
+        
+        # Outbound queue shared by states and observers, rate limited to Telegram's limits
+        outbound_queue = OutboundQueue(
+            TelegramRateLimiter(TELEGRAM_GLOBAL_RATE, TELEGRAM_PER_CHAT_RATE),
+            workers=OUTBOUND_WORKERS
+        )
+        
+        # Add user notifier
+        notification_manager.add_observer(UserNotifier(outbound_queue))
+        
+        # Add admin notifier if admin chat IDs are configured
+        if ADMIN_CHAT_IDS:
+            notification_manager.add_observer(AdminNotifier(ADMIN_CHAT_IDS, outbound_queue))
+            logger.info(f'Added AdminNotifier with {len(ADMIN_CHAT_IDS)} admin chat IDs: {ADMIN_CHAT_IDS}')
+        
+        # Create state manager
+        state_manager = StateManager(
+            async_sheets_facade,
+            notification_manager,
+            outbound_queue,
+            days_ahead=BOOKING_DAYS_AHEAD,
+            timezone=BOOKING_TIMEZONE,
+            search_limit=SEARCH_RESULTS_LIMIT
+        )
+        
+        # Expose cache effectiveness and queue depth on the metrics endpoint
+        if sheets_facade:
+            register_cache('catalog', sheets_facade.catalog_cache.stats)
+        register_cache('keyboards', state_manager.keyboard_cache.stats)
+        for quota_kind in ('read', 'write'):
+            SHEETS_QUOTA_USAGE.set_function(lambda kind=quota_kind: sheets_governor.usage()[kind], kind=quota_kind)
+        OUTBOUND_QUEUE_DEPTH.set_function(lambda: outbound_queue.metrics()['depth'])
+        metrics_server = MetricsServer(REGISTRY, METRICS_HOST, METRICS_PORT) if METRICS_PORT > 0 else None
+        
+        # Create commands
+        booking_command = BookingCommand(state_manager)
+        cancel_command = CancelCommand(async_sheets_facade)
+        
+        logger.info('Successfully initialized components')
+    except Exception as e:
+        logger.error(f'Failed to initialize components: {str(e)}')
+        raise
 
 # Command handlers using Command Pattern
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -72,6 +187,18 @@ async def handle_pitch_selection(update: Update, context: ContextTypes.DEFAULT_T
     """Handle pitch selection using PitchSelectionState"""
     return await state_manager.pitch_selection_state.handle(update, context)
 
+async def handle_date_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle booking date selection using DateSelectionState"""
+    return await state_manager.date_selection_state.handle(update, context)
+
+async def handle_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show the earliest free slots using SearchState"""
+    return await state_manager.search_state.handle(update, context)
+
+async def handle_search_result(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle the choice of a search result using SearchResultState"""
+    return await state_manager.search_result_state.handle(update, context)
+
 async def handle_timeslot(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle time slot selection using TimeSlotState"""
     return await state_manager.time_slot_state.handle(update, context)
@@ -84,21 +211,101 @@ async def handle_contact_info(update: Update, context: ContextTypes.DEFAULT_TYPE
     """Handle contact information collection using ContactInfoState"""
     return await state_manager.contact_info_state.handle(update, context)
 
+components_closed = False
+
+def close_components():
+    """Flush and close storage components, safe to call more than once"""
+    global components_closed
+    if components_closed:
+        return
+    components_closed = True
+    logger.info('Closing connections')
+    async_sheets_facade.shutdown()
+    if sheets_mirror:
+        sheets_mirror.stop()
+    storage.close()
+    if sheets_facade and sheets_facade is not storage:
+        sheets_facade.close()
+
+async def post_init(application: Application):
+    """Start background workers once the event loop is running"""
+    await outbound_queue.start(application.bot)
+    if metrics_server:
+        metrics_server.start()
+    # Storage connects and loads in the background, polling does not wait for Google Sheets
+    application.create_task(async_sheets_facade.warm_up())
+
+async def post_shutdown(application: Application):
+    """Drain and stop background workers"""
+    await outbound_queue.stop()
+    logger.info(f'Outbound queue metrics: {outbound_queue.metrics()}')
+    close_components()
+    if metrics_server:
+        metrics_server.stop()
+
+def run_webhook(application: Application):
+    """Serve updates from the embedded webhook server"""
+    if not WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL environment variable is not set")
+    if not WEBHOOK_SECRET_TOKEN:
+        raise ValueError("WEBHOOK_SECRET_TOKEN environment variable is not set")
+    
+    # Requests without the matching X-Telegram-Bot-Api-Secret-Token header are rejected by the server
+    logger.info(f'Starting webhook server on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}')
+    application.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH,
+        webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET_TOKEN,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY],
+    )
+
 def main():
     try:
         # Check if token is available
         if not TELEGRAM_TOKEN:
             raise ValueError("TELEGRAM_TOKEN environment variable is not set")
+        
+        # Conversations, slot holds and the booking index are per process, so a second process must not start
+        InstanceLock(f'{PERSISTENCE_DB_PATH}.lock').acquire()
+        
+        init_components()
             
+        # Conversation state and user_data survive restarts
+        persistence = StorePersistence(
+            SQLiteKeyValueStore(PERSISTENCE_DB_PATH),
+            update_interval=PERSISTENCE_UPDATE_INTERVAL
+        )
+        
         # Create application
-        application = Application.builder().token(TELEGRAM_TOKEN).build()
+        application = (
+            Application.builder()
+            .token(TELEGRAM_TOKEN)
+            .persistence(persistence)
+            .concurrent_updates(CONCURRENT_UPDATES if CONCURRENT_UPDATES > 1 else False)
+            .post_init(post_init)
+            .post_shutdown(post_shutdown)
+            .build()
+        )
 
         # Add conversation handler for booking flow
         conv_handler = ConversationHandler(
-            entry_points=[CommandHandler("start", start), CommandHandler("book", book_command)],
+            entry_points=[
+                CommandHandler("start", start),
+                CommandHandler("book", book_command),
+                # A result tapped on the /next reply starts the conversation for that message
+                CallbackQueryHandler(handle_search_result, pattern='^f:')
+            ],
             states={
-                LOCATION: [CallbackQueryHandler(handle_location)],
-                PITCH_SELECTION: [CallbackQueryHandler(handle_pitch_selection)],
+                LOCATION: [CallbackQueryHandler(handle_search, pattern='^search'), CallbackQueryHandler(handle_location)],
+                PITCH_SELECTION: [
+                    CallbackQueryHandler(handle_search, pattern='^search'),
+                    CallbackQueryHandler(handle_pitch_selection)
+                ],
+                DATE_SELECTION: [CallbackQueryHandler(handle_date_selection)],
+                SEARCH_RESULTS: [CallbackQueryHandler(handle_search_result)],
                 TIMESLOT: [CallbackQueryHandler(handle_timeslot)],
                 CONFIRMATION: [CallbackQueryHandler(handle_confirmation)],
                 CONTACT_INFO_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_contact_info)],
@@ -106,9 +313,13 @@ def main():
             },
             fallbacks=[CommandHandler("cancel", cancel)],
             per_message=True,
+            name='booking',
+            persistent=True,
         )
         
         application.add_handler(conv_handler)
+        # The conversation is tracked per message and only sees callback queries, so /next is answered outside it
+        application.add_handler(CommandHandler("next", handle_search))
 
         logger.info('Bot started successfully')
         
@@ -120,8 +331,7 @@ def main():
             logger.info('Shutdown signal received, closing connections...')
             # Perform cleanup operations
             try:
-                # Any cleanup needed
-                logger.info('Closing connections')
+                close_components()
             except Exception as e:
                 logger.error(f'Error during shutdown: {str(e)}')
             finally:
@@ -133,7 +343,10 @@ def main():
         signal.signal(signal.SIGTERM, shutdown_handler)  # Termination signal
         
         # Start the bot
-        application.run_polling()
+        if BOT_MODE == 'webhook':
+            run_webhook(application)
+        else:
+            application.run_polling()
     except Exception as e:
         logger.error(f'Failed to start bot: {str(e)}')
         raise
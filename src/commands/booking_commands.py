@@ -3,6 +3,7 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from .base import Command
+from ..states.base import release_held_slot
 
 class BookingCommand(Command):
     """Command for handling the booking process"""
@@ -16,11 +17,14 @@ class BookingCommand(Command):
 
 class CancelCommand(Command):
     """Command for canceling the booking process"""
-    def __init__(self):
+    def __init__(self, sheets_facade=None):
+        self.sheets_facade = sheets_facade
         self.logger = logging.getLogger('telegram_bot')
 
     async def execute(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         user = update.effective_user
+        if self.sheets_facade:
+            await release_held_slot(self.sheets_facade, user.id, context.user_data)
         self.logger.info(f'User {user.id} cancelled the conversation')
         await update.message.reply_text('تم الغاء العملية. أرسل /start للبدء من جديد.')
         return ConversationHandler.END
\ No newline at end of file
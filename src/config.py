@@ -8,6 +8,22 @@ load_dotenv()
 # Telegram Bot Configuration
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 
+# Update delivery: 'polling' for local use, 'webhook' to serve updates from an embedded HTTP server
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')  # Public base URL Telegram posts updates to
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+# Number of updates processed at the same time, 1 handles them one by one
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '1'))
+
+# Conversation persistence: key-value store file and seconds between persistence updates
+# Only one bot process may use a store, a second one refuses to start
+PERSISTENCE_DB_PATH = os.getenv('PERSISTENCE_DB_PATH', 'data/bot_state.db')
+PERSISTENCE_UPDATE_INTERVAL = float(os.getenv('PERSISTENCE_UPDATE_INTERVAL', '5'))
+
 # Admin Configuration
 # Get admin chat IDs from environment variable (comma-separated list)
 ADMIN_CHAT_IDS: List[str] = []
@@ -15,10 +31,92 @@ admin_ids_str = os.getenv('ADMIN_CHAT_IDS', '')
 if admin_ids_str:
     ADMIN_CHAT_IDS = [chat_id.strip() for chat_id in admin_ids_str.split(',')]
 
+# Outbound message limits (messages per second) to stay within Telegram's bot limits
+# Edits of the menu a user is tapping through only count against the global rate
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+TELEGRAM_PER_CHAT_RATE = float(os.getenv('TELEGRAM_PER_CHAT_RATE', '1'))
+# Number of concurrent senders draining the outbound message queue
+OUTBOUND_WORKERS = int(os.getenv('OUTBOUND_WORKERS', '8'))
+
 # Google Sheets Configuration
 GOOGLE_CREDENTIALS_FILE = os.getenv('GOOGLE_CREDENTIALS_FILE')
 GOOGLE_SHEET_NAME = os.getenv('GOOGLE_SHEET_NAME')
 GOOGLE_SHEET_ID = os.getenv('GOOGLE_SHEET_ID')  # Optional: Sheet ID can be used instead of name
+# Worksheet headers verified on a previous run, so restarts skip the schema checks, empty disables the cache
+SHEETS_SCHEMA_CACHE_PATH = os.getenv('SHEETS_SCHEMA_CACHE_PATH', 'data/sheets_schema.json') or None
+# Snapshot of the catalog and booked slots that a restart serves from while it reconciles with Sheets,
+# and seconds between snapshot writes (written only when something changed), empty path disables it
+SHEETS_SNAPSHOT_PATH = os.getenv('SHEETS_SNAPSHOT_PATH', 'data/sheets_snapshot.bin') or None
+SHEETS_SNAPSHOT_INTERVAL = float(os.getenv('SHEETS_SNAPSHOT_INTERVAL', '60'))
+
+# Seconds the Pitches catalog is served from memory before it is re-read
+CATALOG_CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', '300'))
+
+# Thread pool size and per-call timeout (seconds) for blocking Sheets calls
+# A call fails early instead of waiting for quota or a retry that would end after its timeout
+SHEETS_MAX_WORKERS = int(os.getenv('SHEETS_MAX_WORKERS', '4'))
+SHEETS_CALL_TIMEOUT = float(os.getenv('SHEETS_CALL_TIMEOUT', '15'))
+
+# Google Sheets API quota per window (seconds), calls beyond it wait instead of failing
+# Background syncs leave SHEETS_INTERACTIVE_RESERVE of the budget to user-facing reads
+SHEETS_READ_QUOTA = int(os.getenv('SHEETS_READ_QUOTA', '60'))
+SHEETS_WRITE_QUOTA = int(os.getenv('SHEETS_WRITE_QUOTA', '60'))
+SHEETS_QUOTA_WINDOW = float(os.getenv('SHEETS_QUOTA_WINDOW', '60'))
+SHEETS_INTERACTIVE_RESERVE = float(os.getenv('SHEETS_INTERACTIVE_RESERVE', '0.2'))
+# Retries for 429/5xx responses, with jittered exponential backoff
+SHEETS_MAX_RETRIES = int(os.getenv('SHEETS_MAX_RETRIES', '5'))
+# Circuit breaker: after this many failed or slow (seconds) Sheets calls in a row, calls fail at once and menus are
+# served from memory, one probe call is let through every SHEETS_BREAKER_RESET seconds, 0 failures disables it
+SHEETS_BREAKER_FAILURES = int(os.getenv('SHEETS_BREAKER_FAILURES', '5'))
+SHEETS_BREAKER_SLOW_CALL = float(os.getenv('SHEETS_BREAKER_SLOW_CALL', '5'))
+SHEETS_BREAKER_RESET = float(os.getenv('SHEETS_BREAKER_RESET', '30'))
+
+# Booking appends are batched: flushed every interval (seconds) or once this many rows are queued
+# Set BOOKING_WRITE_INTERVAL to 0 to append each booking immediately
+BOOKING_WRITE_INTERVAL = float(os.getenv('BOOKING_WRITE_INTERVAL', '0.5'))
+BOOKING_WRITE_BATCH_SIZE = int(os.getenv('BOOKING_WRITE_BATCH_SIZE', '20'))
+# Confirmed bookings are fsync'd to this append-only file before they are acknowledged, and replayed to the
+# Bookings sheet on the schedule above, so a crash or a Sheets outage does not lose them; set it empty to disable
+BOOKING_JOURNAL_PATH = os.getenv('BOOKING_JOURNAL_PATH', 'data/booking_journal.jsonl') or None
+# Without the journal, batched rows Google Sheets rejects for good (4xx other than 429) are set aside in this file
+BOOKING_DEAD_LETTER_PATH = os.getenv('BOOKING_DEAD_LETTER_PATH', 'data/booking_dead_letter.jsonl') or None
+
+# Seconds between reads of newly appended Bookings rows, and between full re-reads that catch manual edits
+BOOKING_SYNC_INTERVAL = float(os.getenv('BOOKING_SYNC_INTERVAL', '15'))
+BOOKING_RECONCILE_INTERVAL = float(os.getenv('BOOKING_RECONCILE_INTERVAL', '600'))
+
+# Seconds between moves of past and cancelled bookings into monthly "Bookings YYYY-MM" worksheets, 0 disables it
+# Bookings are archived once their day is more than BOOKING_ARCHIVE_AFTER_DAYS behind today
+BOOKING_ARCHIVE_INTERVAL = float(os.getenv('BOOKING_ARCHIVE_INTERVAL', '0'))
+BOOKING_ARCHIVE_AFTER_DAYS = int(os.getenv('BOOKING_ARCHIVE_AFTER_DAYS', '0'))
+
+# Number of days, starting today, users can book ahead, and the IANA timezone that decides what "today" is
+# Leave BOOKING_TIMEZONE empty to use the server's local time
+BOOKING_DAYS_AHEAD = int(os.getenv('BOOKING_DAYS_AHEAD', '7'))
+BOOKING_TIMEZONE = os.getenv('BOOKING_TIMEZONE') or None
+
+# Number of free slots offered by the "earliest free slot" search
+SEARCH_RESULTS_LIMIT = int(os.getenv('SEARCH_RESULTS_LIMIT', '8'))
+
+# Seconds a selected slot stays reserved for the user while they confirm and enter contact info
+SLOT_HOLD_SECONDS = float(os.getenv('SLOT_HOLD_SECONDS', '300'))
+
+# Storage backend: 'sheets' reads and writes Google Sheets directly,
+# 'sqlite' serves from a local database and mirrors to Google Sheets in the background
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sheets').lower()
+SQLITE_DB_PATH = os.getenv('SQLITE_DB_PATH', 'data/e7gz.db')
+# Seconds between mirror syncs, 0 runs the sqlite backend without Google Sheets
+# The sheet's bookings are imported once; bookings added to the sheet by hand afterwards never reach SQLite
+SHEETS_MIRROR_INTERVAL = float(os.getenv('SHEETS_MIRROR_INTERVAL', '60'))
+
+# Log records buffered for the background log writer, and what happens when the buffer is full:
+# drop_new (discard new INFO records), drop_oldest (discard the oldest record) or block (wait briefly, then discard)
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_OVERFLOW_POLICY = os.getenv('LOG_OVERFLOW_POLICY', 'drop_new')
+
+# Prometheus metrics endpoint, served on http://METRICS_HOST:METRICS_PORT/metrics, port 0 disables it
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
 
 # Google API Scopes
 GOOGLE_SCOPES = [
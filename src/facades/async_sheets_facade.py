@@ -0,0 +1,148 @@
+# Facade Pattern - Async Google Sheets Facade
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional
+
+from .quota_governor import call_deadline
+from ..metrics.instruments import STORAGE_CALL_ERRORS, STORAGE_CALL_SECONDS
+from ..metrics.registry import track
+
+class AsyncSheetsFacade:
+    """Awaitable facade that runs blocking storage calls on a bounded thread pool
+
+    Wraps any BookingStorage, e.g. SheetsFacade or SQLiteStorage. Reads give
+    up after the timeout, and a read still queued by then is skipped instead
+    of taking a pool thread. Writes are always awaited to the end, since a
+    write that timed out may still go through.
+    """
+    def __init__(self, sheets_facade, max_workers: int = 4, timeout: float = 15.0):
+        self.sheets_facade = sheets_facade
+        self.timeout = timeout
+        self.logger = logging.getLogger('telegram_bot')
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sheets')
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking read in the thread pool and wait for it with a timeout"""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.timeout
+        future = loop.run_in_executor(
+            self.executor, functools.partial(self._call_before, deadline, func, *args, **kwargs)
+        )
+        try:
+            with track(STORAGE_CALL_SECONDS, STORAGE_CALL_ERRORS, method=func.__name__):
+                return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.logger.error(f'Sheets call {func.__name__} timed out after {self.timeout}s')
+            raise
+
+    @staticmethod
+    def _call_before(deadline: float, func, *args, **kwargs):
+        """Run func on a pool thread unless its caller has already given up on it, Sheets quota waits end with it"""
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f'{func.__name__} waited in the thread pool past its timeout')
+        with call_deadline(deadline):
+            return func(*args, **kwargs)
+
+    async def _run_write(self, func, *args, **kwargs):
+        """Run a blocking write in the thread pool and wait for its result however long it takes"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        with track(STORAGE_CALL_SECONDS, STORAGE_CALL_ERRORS, method=func.__name__):
+            # Shielded, a cancelled handler must not lose track of a booking that is still being written
+            return await asyncio.shield(future)
+
+    async def catalog_version(self):
+        """Version of the pitch catalog"""
+        return await self._run(self.sheets_facade.catalog_version)
+
+    async def booking_version(self, pitch_name: str):
+        """Version of a pitch's booked slots"""
+        return await self._run(self.sheets_facade.booking_version, pitch_name)
+
+    async def get_pitches(self) -> List[Dict]:
+        """Get every record of the pitch catalog"""
+        return await self._run(self.sheets_facade.get_pitches)
+
+    async def get_unique_locations(self) -> List[str]:
+        """Get unique locations from the Pitches sheet"""
+        return await self._run(self.sheets_facade.get_unique_locations)
+
+    async def get_pitches_by_location(self, location: str) -> List[Dict]:
+        """Get pitches for a specific location"""
+        return await self._run(self.sheets_facade.get_pitches_by_location, location)
+
+    async def get_available_time_slots(self, pitch_name: str, day: Optional[date] = None,
+                                       not_before: Optional[int] = None) -> List[str]:
+        """Get available time slots for a specific pitch, on a day when given, skipping slots before not_before"""
+        return await self._run(self.sheets_facade.get_available_time_slots, pitch_name, day, not_before)
+
+    async def get_available_days(self, pitch_name: str, days: List[date], not_before: Optional[int] = None) -> List[date]:
+        """Days on which a pitch has at least one free slot, the first day's slots before not_before do not count"""
+        return await self._run(self.sheets_facade.get_available_days, pitch_name, days, not_before)
+
+    async def get_free_slots_range(self, pitch_name: str, start: date, end: date) -> Dict[date, List[str]]:
+        """Free slots of a pitch per day from start to end"""
+        return await self._run(self.sheets_facade.get_free_slots_range, pitch_name, start, end)
+
+    async def find_free_slots(self, days: List[date], limit: int, location: Optional[str] = None,
+                              not_before: Optional[int] = None) -> List:
+        """Earliest free slots across every pitch, or the pitches of one location"""
+        return await self._run(self.sheets_facade.find_free_slots, days, limit, location, not_before)
+
+    async def is_slot_available(self, pitch_name: str, time_slot: str, day: Optional[date] = None) -> bool:
+        """Check if a specific time slot is available for a pitch"""
+        return await self._run(self.sheets_facade.is_slot_available, pitch_name, time_slot, day)
+
+    async def hold_slot(self, pitch_name: str, time_slot: str, user_id, day: Optional[date] = None,
+                        not_before: Optional[int] = None) -> bool:
+        """Take or refresh a short-lived hold on a free slot for a user, a slot that has started cannot be held"""
+        return await self._run(self.sheets_facade.hold_slot, pitch_name, time_slot, user_id, day, not_before)
+
+    async def release_slot(self, pitch_name: str, time_slot: str, user_id, day: Optional[date] = None) -> None:
+        """Release a user's hold on a slot"""
+        await self._run(self.sheets_facade.release_slot, pitch_name, time_slot, user_id, day)
+
+    async def add_booking(self, user_id: str, user_name: str, phone_number: str,
+                          pitch_name: str, time_slot: str, status: str = 'Booked',
+                          day: Optional[date] = None) -> bool:
+        """Add a new booking to the Bookings sheet, for a day when given"""
+        # Not given up on after the timeout, the booking may still be written and the user must hear about it
+        return await self._run_write(
+            self.sheets_facade.add_booking,
+            user_id=user_id,
+            user_name=user_name,
+            phone_number=phone_number,
+            pitch_name=pitch_name,
+            time_slot=time_slot,
+            status=status,
+            day=day
+        )
+
+    async def is_stale(self) -> bool:
+        """Whether answers may be outdated, read directly since the pool may be busy with slow calls"""
+        return self.sheets_facade.is_stale()
+
+    async def warm_up(self) -> None:
+        """Connect storage and fill its caches on a thread of its own, without the per-call timeout
+
+        Warm-up may wait a long time for quota, so it does not take a thread
+        from the pool users are served by.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sheets-warm-up')
+        try:
+            await loop.run_in_executor(executor, self.sheets_facade.warm_up)
+            self.logger.info('Storage warmed up')
+        except Exception as e:
+            self.logger.error(f'Storage warm-up failed: {str(e)}')
+        finally:
+            executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads"""
+        self.executor.shutdown(wait=False)
+        self.logger.info('Sheets thread pool shut down')
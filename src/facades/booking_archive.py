@@ -0,0 +1,66 @@
+# Facade Helper - Rolling archive of the Bookings sheet
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Optional
+
+from .slot_calendar import upcoming_days
+
+ARCHIVE_PREFIX = 'Bookings '  # Archive worksheets are named like "Bookings 2024-05"
+
+def archive_title(day: date) -> str:
+    """Name of the archive worksheet holding a month's bookings"""
+    return f'{ARCHIVE_PREFIX}{day:%Y-%m}'
+
+def parse_archive_title(title: str) -> Optional[date]:
+    """First day of the month an archive worksheet holds, None for other worksheets"""
+    if not title.startswith(ARCHIVE_PREFIX):
+        return None
+    year, _, month = title[len(ARCHIVE_PREFIX):].partition('-')
+    try:
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+class BookingArchiver:
+    """Moves past and cancelled bookings out of the Bookings sheet on a schedule
+
+    Every interval the bookings whose day is more than after_days behind
+    today, and bookings that are no longer 'Booked', are moved into per-month
+    archive worksheets, so the active sheet that every read downloads stays
+    small.
+    """
+    def __init__(self, sheets_facade, interval: float = 3600, after_days: int = 0, timezone: Optional[str] = None):
+        self.sheets_facade = sheets_facade
+        self.interval = interval
+        self.after_days = after_days
+        self.timezone = timezone
+        self.logger = logging.getLogger('telegram_bot')
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='booking-archive', daemon=True)
+
+    def start(self) -> None:
+        """Start the background archive loop"""
+        self._thread.start()
+        self.logger.info(f'Booking archive started (interval={self.interval}s, after_days={self.after_days})')
+
+    def archive_once(self) -> int:
+        """Archive the bookings that are due, returns the number of rows moved"""
+        before = upcoming_days(1, self.timezone)[0] - timedelta(days=self.after_days)
+        try:
+            # Archiving yields Sheets quota to user-facing reads
+            with self.sheets_facade.governor.background():
+                return self.sheets_facade.archive_bookings(before)
+        except Exception as e:
+            self.logger.error(f'Booking archive failed: {str(e)}')
+            return 0
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.archive_once()
+
+    def stop(self) -> None:
+        """Stop the archive loop"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
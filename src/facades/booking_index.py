@@ -0,0 +1,197 @@
+# Facade Helper - In-memory index of booked slots
+import logging
+import threading
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .slot_calendar import FreeSlot, SlotCalendar, format_booking_time, parse_booking_time
+
+def _booked_pairs(bookings: Iterable[Dict]) -> Iterable[Tuple[str, str]]:
+    for booking in bookings:
+        if booking.get('Status') == 'Booked':
+            yield str(booking.get('Pitch Name', '')), str(booking.get('Date/Time', '')).strip()
+
+class BookingIndex:
+    """Index of booked slots, built from the Bookings sheet and kept current incrementally
+
+    Bookings are keyed by their 'Date/Time' value. Dated bookings live in a
+    SlotCalendar bitmap per pitch per day, rows written before dates existed
+    are kept as plain slot labels. Bookings added locally stay unconfirmed
+    until a sync sees them in the sheet, so a full reconcile never drops a
+    booking whose row is still being written.
+    """
+    def __init__(self, loader: Callable[[], List[Dict]]):
+        self.loader = loader
+        self.logger = logging.getLogger('telegram_bot')
+        self.calendar = SlotCalendar()
+        self._undated: Dict[str, Set[str]] = {}
+        self._unconfirmed: Set[Tuple[str, str]] = set()
+        self._versions: Dict[str, int] = {}
+        self._generation = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self) -> None:
+        """Build the index now instead of on first use"""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            bookings = self.loader()
+            self._replace(bookings)
+            self.logger.info(f'Built booking index from {len(bookings)} booking rows')
+
+    def _replace(self, bookings: List[Dict]) -> bool:
+        sheet_pairs = set(_booked_pairs(bookings))
+        self._unconfirmed -= sheet_pairs
+        dated = []
+        undated: Dict[str, Set[str]] = {}
+        for pitch_name, booking_time in sheet_pairs | self._unconfirmed:
+            day, time_slot = parse_booking_time(booking_time)
+            if day:
+                dated.append((pitch_name, day, time_slot))
+            else:
+                undated.setdefault(pitch_name, set()).add(time_slot)
+        calendar_changed = self.calendar.replace(dated)
+        changed = not self._loaded or calendar_changed or undated != self._undated
+        self._undated = undated
+        if changed:
+            self._versions = {}
+            self._generation += 1
+        self._loaded = True
+        return changed
+
+    def _book(self, pitch_name: str, booking_time: str) -> bool:
+        day, time_slot = parse_booking_time(booking_time)
+        if day:
+            added = self.calendar.book(pitch_name, day, time_slot)
+        else:
+            slots = self._undated.setdefault(pitch_name, set())
+            added = time_slot not in slots
+            slots.add(time_slot)
+        if added:
+            self._versions[pitch_name] = self._versions.get(pitch_name, 0) + 1
+        return added
+
+    def replace(self, bookings: List[Dict]) -> bool:
+        """Rebuild the index from a full read of the sheet, returns whether anything changed"""
+        with self._lock:
+            return self._replace(bookings)
+
+    def apply(self, bookings: List[Dict]) -> int:
+        """Add rows appended to the sheet since the last sync, returns how many slots became booked"""
+        self._ensure_loaded()
+        added = 0
+        with self._lock:
+            for pitch_name, booking_time in _booked_pairs(bookings):
+                self._unconfirmed.discard((pitch_name, booking_time))
+                added += self._book(pitch_name, booking_time)
+        return added
+
+    def is_booked(self, pitch_name: str, booking_time: str) -> bool:
+        """Check whether a 'Date/Time' value is booked for a pitch"""
+        self._ensure_loaded()
+        day, time_slot = parse_booking_time(booking_time)
+        if day:
+            return self.calendar.is_booked(pitch_name, day, time_slot)
+        return time_slot in self._undated.get(pitch_name, ())
+
+    def booked_slots(self, pitch_name: str) -> Set[str]:
+        """Get the set of slots booked for a pitch without a date"""
+        self._ensure_loaded()
+        return set(self._undated.get(pitch_name, ()))
+
+    def free_slots(self, pitch_name: str, day: date, offered: List[str]) -> List[str]:
+        """Offered slots of a pitch that are free on a day"""
+        self._ensure_loaded()
+        return self.calendar.free_slots(pitch_name, day, offered)
+
+    def free_slots_range(self, pitch_name: str, start: date, end: date, offered: List[str]) -> Dict[date, List[str]]:
+        """Free slots of a pitch per day across a date range"""
+        self._ensure_loaded()
+        return self.calendar.free_slots_range(pitch_name, start, end, offered)
+
+    def free_days(self, pitch_name: str, days: List[date], offered: List[str],
+                  not_before: Optional[int] = None) -> List[date]:
+        """Days on which a pitch has at least one free slot, the first day's started slots do not count"""
+        self._ensure_loaded()
+        return self.calendar.free_days(pitch_name, days, offered, not_before)
+
+    def earliest_free(self, pitches: List[Tuple[str, str, List[str]]], days: List[date], limit: int,
+                      not_before: Optional[int] = None) -> List[FreeSlot]:
+        """Earliest free slots across pitches given as (location, pitch, offered slots)"""
+        self._ensure_loaded()
+        return self.calendar.earliest_free(pitches, days, limit, not_before)
+
+    def add(self, pitch_name: str, booking_time: str) -> None:
+        """Record a new booking without re-reading the sheet"""
+        self._ensure_loaded()
+        with self._lock:
+            self._book(pitch_name, booking_time)
+            self._unconfirmed.add((pitch_name, booking_time))
+
+    def remove(self, pitch_name: str, booking_time: str) -> None:
+        """Undo add() for a booking whose row could not be written"""
+        self._ensure_loaded()
+        with self._lock:
+            self._unconfirmed.discard((pitch_name, booking_time))
+            day, time_slot = parse_booking_time(booking_time)
+            if day:
+                removed = self.calendar.unbook(pitch_name, day, time_slot)
+            else:
+                slots = self._undated.get(pitch_name, set())
+                removed = time_slot in slots
+                slots.discard(time_slot)
+            if removed:
+                self._versions[pitch_name] = self._versions.get(pitch_name, 0) + 1
+
+    def add_pending(self, bookings: List[Dict]) -> None:
+        """Count bookings whose rows are not in the sheet yet as booked, whether or not the index is built"""
+        with self._lock:
+            for pitch_name, booking_time in _booked_pairs(bookings):
+                self._unconfirmed.add((pitch_name, booking_time))
+                if self._loaded:
+                    self._book(pitch_name, booking_time)
+
+    def booked_pairs(self) -> List[Tuple[str, str]]:
+        """Every booked (pitch, 'Date/Time') pair, enough to rebuild the index with restore()"""
+        self._ensure_loaded()
+        with self._lock:
+            pairs = [
+                (pitch_name, format_booking_time(time_slot, day))
+                for pitch_name, day, time_slot in self.calendar.bookings()
+            ]
+            pairs.extend(
+                (pitch_name, time_slot) for pitch_name, slots in self._undated.items() for time_slot in slots
+            )
+        return pairs
+
+    def restore(self, pairs: List[Tuple[str, str]]) -> None:
+        """Load the index from booked_pairs() saved earlier instead of reading the sheet"""
+        self.replace([
+            {'Pitch Name': pitch_name, 'Date/Time': booking_time, 'Status': 'Booked'}
+            for pitch_name, booking_time in pairs
+        ])
+
+    @property
+    def state_version(self) -> Tuple[int, int]:
+        """Changes whenever any pitch's booked slots change"""
+        return self._generation, sum(self._versions.values())
+
+    def version(self, pitch_name: str) -> Tuple[int, int]:
+        """Version of a pitch's booked slots, changes whenever they may have changed"""
+        self._ensure_loaded()
+        return self._generation, self._versions.get(pitch_name, 0)
+
+    def invalidate(self) -> None:
+        """Drop the index so it is rebuilt from the sheet on next use"""
+        with self._lock:
+            self._loaded = False
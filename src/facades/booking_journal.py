@@ -0,0 +1,223 @@
+# Facade Helper - Crash-safe local journal of confirmed bookings
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+class BookingJournal:
+    """Append-only file of confirmed bookings, replayed into the Bookings sheet
+
+    Each line is a JSON object. A booking entry {"id", "booking"} is written
+    and fsync'd before the booking is acknowledged, and a {"id", "replayed"}
+    marker is appended once its row is in the sheet. On startup the bookings
+    without a marker are pending again. A last line torn by a crash is
+    skipped, and the file is rewritten with only the pending entries once
+    compact_after markers have piled up.
+    """
+    def __init__(self, path: str, compact_after: int = 1000):
+        self.path = path
+        self.compact_after = compact_after
+        self.logger = logging.getLogger('telegram_bot')
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict] = {}  # Insertion ordered, so bookings replay in the order they were made
+        self._markers = 0
+        self._file = None
+        self._recover()
+        self.recovered: Set[str] = set(self._pending)  # Pending from an earlier run, they may be in the sheet already
+        if self.recovered:
+            self.logger.warning(f'Recovered {len(self.recovered)} bookings not yet written to Google Sheets')
+
+    def _recover(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+        for number, line in enumerate(lines, 1):
+            try:
+                entry = json.loads(line)
+                booking_id = entry['id']
+                if entry.get('replayed'):
+                    self._pending.pop(booking_id, None)
+                    self._markers += 1
+                else:
+                    self._pending[booking_id] = dict(entry['booking'])
+            except (ValueError, KeyError, TypeError):
+                if line.strip():
+                    self.logger.warning(f'Skipping unreadable line {number} of booking journal {self.path}')
+
+    def _open(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._file = open(self.path, 'ab')
+            # A line torn by a crash must not swallow the next entry
+            if self._file.tell() > 0:
+                with open(self.path, 'rb') as file:
+                    file.seek(-1, os.SEEK_END)
+                    if file.read(1) != b'\n':
+                        self._file.write(b'\n')
+        return self._file
+
+    def _write(self, entries: List[Dict]) -> None:
+        """Append entries and wait until they are on disk, called with the lock held"""
+        file = self._open()
+        file.write(b''.join(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n' for entry in entries))
+        file.flush()
+        os.fsync(file.fileno())
+
+    def append(self, booking_id: str, booking: Dict) -> None:
+        """Durably record a booking keyed by the Bookings sheet headers"""
+        with self._lock:
+            self._write([{'id': booking_id, 'booking': booking}])
+            self._pending[booking_id] = dict(booking)
+
+    def mark_replayed(self, booking_ids: List[str]) -> None:
+        """Record that bookings are in the sheet, so they are not replayed again"""
+        with self._lock:
+            self._write([{'id': booking_id, 'replayed': True} for booking_id in booking_ids])
+            for booking_id in booking_ids:
+                self._pending.pop(booking_id, None)
+                self.recovered.discard(booking_id)
+            self._markers += len(booking_ids)
+
+    def pending(self) -> List[Tuple[str, Dict]]:
+        """Bookings not yet in the sheet, oldest first"""
+        with self._lock:
+            return list(self._pending.items())
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def compact(self) -> bool:
+        """Rewrite the file with only the pending entries once enough markers have piled up"""
+        with self._lock:
+            if self._markers < self.compact_after:
+                return False
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'wb') as file:
+                for booking_id, booking in self._pending.items():
+                    entry = {'id': booking_id, 'booking': booking}
+                    file.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+                file.flush()
+                os.fsync(file.fileno())
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(temp_path, self.path)
+            self._markers = 0
+        self.logger.info(f'Compacted booking journal to {len(self._pending)} pending bookings')
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class BookingReplayer:
+    """Writes the journal's pending bookings to the Bookings sheet in batches
+
+    Rows are keyed by booking ID. Before a batch that may already be in the
+    sheet is written, the sheet's booking IDs are read, and rows that are
+    already there are skipped. A batch may already be in the sheet if it was
+    recovered at startup or an earlier write of it failed. Such bookings are
+    held back while the sheet has no Booking ID column to check. A failed
+    batch stays pending, and the wait before the next try doubles up to
+    max_backoff seconds until a replay succeeds again.
+    """
+    def __init__(self, sheets_facade, journal: BookingJournal, interval: float = 0.5, batch_size: int = 20,
+                 max_backoff: float = 60.0):
+        self.sheets_facade = sheets_facade
+        self.journal = journal
+        self.interval = interval if interval > 0 else 1.0
+        self.batch_size = batch_size
+        self.max_backoff = max(max_backoff, self.interval)
+        self.logger = logging.getLogger('telegram_bot')
+        self._uncertain: Set[str] = set(journal.recovered)
+        self._failures = 0  # Failed replays in a row, only the first one of an outage is logged as an error
+        self._unchecked_logged = False
+        self._lock = threading.Lock()  # Replays from the thread and from add_booking never write the same entry
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='booking-replay', daemon=True)
+
+    def start(self) -> None:
+        """Start the background replay loop"""
+        self._thread.start()
+        self.logger.info(f'Booking replayer started (interval={self.interval}s, batch_size={self.batch_size})')
+
+    def replay_once(self) -> int:
+        """Write pending bookings to the sheet, returns the number of rows appended"""
+        with self._lock:
+            written = 0
+            unchecked = 0
+            existing: Optional[Set[str]] = None
+            entries = self.journal.pending()
+            for start in range(0, len(entries), self.batch_size):
+                batch = entries[start:start + self.batch_size]
+                try:
+                    rows = batch
+                    done = batch
+                    if any(booking_id in self._uncertain for booking_id, _ in batch):
+                        if existing is None:
+                            existing = self.sheets_facade.booking_ids()
+                        if existing is None:
+                            # Without the column a retried booking cannot be told apart from a new one
+                            rows = done = [entry for entry in batch if entry[0] not in self._uncertain]
+                            unchecked += len(batch) - len(rows)
+                        else:
+                            rows = [entry for entry in batch if entry[0] not in existing]
+                    if rows:
+                        self.sheets_facade.append_bookings([booking for _, booking in rows])
+                    if done:
+                        self.journal.mark_replayed([booking_id for booking_id, _ in done])
+                except Exception as e:
+                    # The append may have gone through, so the batch is checked against the sheet next time
+                    self._uncertain.update(booking_id for booking_id, _ in batch)
+                    self._failures += 1
+                    if self._failures == 1:
+                        self.logger.error(
+                            f'Failed to replay {len(batch)} journaled bookings, retrying with backoff: {str(e)}'
+                        )
+                    break
+                self._uncertain.difference_update(booking_id for booking_id, _ in done)
+                written += len(rows)
+            else:
+                if self._failures:
+                    self.logger.info(f'Booking replay recovered after {self._failures} failed attempts')
+                self._failures = 0
+            if unchecked and not self._unchecked_logged:
+                self.logger.error(
+                    f'Holding back {unchecked} journaled bookings that may already be in the Bookings sheet: '
+                    f"it has no 'Booking ID' column to check them against, add the column to replay them"
+                )
+            self._unchecked_logged = bool(unchecked)
+            if written:
+                self.logger.info(f'Replayed {written} journaled bookings to Google Sheets')
+            try:
+                self.journal.compact()
+            except OSError as e:
+                self.logger.error(f'Booking journal compaction failed: {str(e)}')
+            return written
+
+    def _delay(self) -> float:
+        """Seconds until the next replay, doubled for every failed replay in a row"""
+        if not self._failures:
+            return self.interval
+        return min(self.interval * 2 ** min(self._failures, 16), self.max_backoff)
+
+    def _run(self) -> None:
+        # Bookings left over from the last run go out first
+        self.replay_once()
+        while not self._stop_event.wait(self._delay()):
+            self.replay_once()
+
+    def stop(self) -> None:
+        """Stop the replay loop after a final replay"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.replay_once()
@@ -0,0 +1,51 @@
+# Facade Helper - Background tail sync of the Bookings sheet
+import logging
+import threading
+import time
+
+class BookingSync:
+    """Keeps the booking index current by reading only newly appended Bookings rows
+
+    Every interval the rows past the last one seen are fetched by range. Every
+    reconcile_interval the whole sheet is read once to pick up manual edits,
+    cancellations and deleted rows that a tail read cannot see.
+    """
+    def __init__(self, sheets_facade, interval: float = 15, reconcile_interval: float = 600):
+        self.sheets_facade = sheets_facade
+        self.interval = interval
+        self.reconcile_interval = reconcile_interval
+        self.logger = logging.getLogger('telegram_bot')
+        self._last_reconcile = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='booking-sync', daemon=True)
+
+    def start(self) -> None:
+        """Start the background sync loop"""
+        self._thread.start()
+        self.logger.info(
+            f'Booking sync started (interval={self.interval}s, reconcile_interval={self.reconcile_interval}s)'
+        )
+
+    def sync_once(self) -> None:
+        """Read new rows, or the whole sheet when a reconcile is due"""
+        governor = self.sheets_facade.governor
+        try:
+            # Syncs yield Sheets quota to user-facing reads
+            with governor.background():
+                if self.reconcile_interval > 0 and time.monotonic() - self._last_reconcile >= self.reconcile_interval:
+                    self._last_reconcile = time.monotonic()
+                    self.sheets_facade.reconcile_bookings()
+                else:
+                    self.sheets_facade.sync_bookings_tail()
+        except Exception as e:
+            self.logger.error(f'Booking sync failed: {str(e)}')
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sync_once()
+
+    def stop(self) -> None:
+        """Stop the sync loop"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
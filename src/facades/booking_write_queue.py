@@ -0,0 +1,170 @@
+# Facade Helper - Write-behind queue for booking rows
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+import gspread
+
+def is_permanent_error(error: Exception) -> bool:
+    """Whether Sheets rejected a write for good, client errors other than 429 fail the same way every time"""
+    if not isinstance(error, gspread.exceptions.APIError):
+        return False
+    status = getattr(error.response, 'status_code', None)
+    return status is not None and 400 <= status < 500 and status != 429
+
+class BookingWriteQueue:
+    """Groups pending booking rows into one batched append every interval or every max_rows rows
+
+    A batch that fails with a retryable error goes back to the front of the
+    queue, and the wait before the next try doubles up to max_backoff
+    seconds. A batch Sheets rejects for good is written row by row, and the
+    rows it still rejects are moved to the dead-letter file, so they do not
+    hold up the bookings behind them.
+    """
+    def __init__(self, write_rows: Callable[[List[List]], None], flush_interval: float = 0.5, max_rows: int = 20,
+                 max_backoff: float = 60.0, dead_letter_path: Optional[str] = None):
+        self.write_rows = write_rows
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.max_backoff = max(max_backoff, flush_interval)
+        self.dead_letter_path = dead_letter_path
+        self.dead_lettered = 0
+        self.logger = logging.getLogger('telegram_bot')
+        self._failures = 0  # Failed flushes in a row, only the first one of an outage is logged as an error
+        self._pending: List[List] = []
+        self._first_pending_at = 0.0
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='booking-writer', daemon=True)
+
+    def start(self) -> None:
+        """Start the background writer thread"""
+        self._thread.start()
+        self.logger.info(f'Booking write queue started (interval={self.flush_interval}s, max_rows={self.max_rows})')
+
+    def put(self, row: List) -> None:
+        """Queue a row for the next batched append"""
+        with self._condition:
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append(row)
+            self._condition.notify()
+
+    @property
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _take_batch(self) -> List[List]:
+        batch = self._pending[:self.max_rows]
+        del self._pending[:len(batch)]
+        if self._pending:
+            self._first_pending_at = time.monotonic()
+        return batch
+
+    def _write(self, batch: List[List]) -> bool:
+        with self._write_lock:
+            try:
+                self.write_rows(batch)
+            except Exception as e:
+                if is_permanent_error(e):
+                    return self._write_rows_apart(batch, e)
+                self._retry_later(batch, e)
+                return False
+            self._recovered()
+            self.logger.info(f'Flushed {len(batch)} booking rows in one append')
+            return True
+
+    def _write_rows_apart(self, batch: List[List], error: Exception) -> bool:
+        """Write a rejected batch one row at a time, so a bad row only costs itself"""
+        if len(batch) == 1:
+            self._dead_letter(batch[0], error)
+            return True
+        for index, row in enumerate(batch):
+            try:
+                self.write_rows([row])
+            except Exception as e:
+                if is_permanent_error(e):
+                    self._dead_letter(row, e)
+                    continue
+                self._retry_later(batch[index:], e)
+                return False
+        self._recovered()
+        return True
+
+    def _retry_later(self, batch: List[List], error: Exception) -> None:
+        self._failures += 1
+        if self._failures == 1:
+            self.logger.error(f'Failed to flush {len(batch)} booking rows, retrying with backoff: {str(error)}')
+        with self._condition:
+            # Put the batch back in front so row order is preserved
+            self._pending[:0] = batch
+
+    def _recovered(self) -> None:
+        if self._failures:
+            self.logger.info(f'Booking writes recovered after {self._failures} failed flushes')
+        self._failures = 0
+
+    def _dead_letter(self, row: List, error: Exception) -> None:
+        """Set a row Sheets will never accept aside, where it can be fixed and added by hand"""
+        self.dead_lettered += 1
+        self.logger.error(f'Google Sheets rejected booking row {row}, moved to dead letters: {str(error)}')
+        if not self.dead_letter_path:
+            return
+        try:
+            directory = os.path.dirname(self.dead_letter_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps({'row': row, 'error': str(error)}, ensure_ascii=False) + '\n')
+        except OSError as e:
+            self.logger.error(f'Failed to write dead letter file {self.dead_letter_path}: {str(e)}')
+
+    def _delay(self) -> float:
+        """Seconds until a failed flush is tried again, doubled for every failure in a row"""
+        return min(self.flush_interval * 2 ** min(self._failures, 16), self.max_backoff)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                # Wait until the batch is full or the oldest row has waited flush_interval
+                while len(self._pending) < self.max_rows and not self._stopping:
+                    remaining = self._first_pending_at + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stopping:
+                    return
+                batch = self._take_batch()
+            if not self._write(batch):
+                with self._condition:
+                    # Woken early only by stop(), which flushes once more itself
+                    self._condition.wait_for(lambda: self._stopping, timeout=self._delay())
+
+    def flush(self) -> bool:
+        """Synchronously write everything that is still pending"""
+        while True:
+            with self._condition:
+                if not self._pending:
+                    return True
+                batch = self._take_batch()
+            if not self._write(batch):
+                return False
+
+    def stop(self) -> None:
+        """Stop the writer thread and flush any remaining rows"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.flush()
+        self.logger.info('Booking write queue stopped')
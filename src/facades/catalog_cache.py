@@ -0,0 +1,106 @@
+# Facade Helper - TTL read-through cache for the pitch catalog
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+class CatalogCache:
+    """Read-through cache that fetches the Pitches records at most once per TTL window
+
+    After a failed reload the old records are served for retry_after
+    seconds before the next reload is tried, so readers do not each wait
+    for their own failing call.
+    """
+    def __init__(self, loader: Callable[[], List[Dict]], ttl: float = 300, retry_after: float = 10):
+        self.loader = loader
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.hits = 0
+        self.misses = 0
+        self.version = 0  # Bumped whenever a reload returns different records
+        self.stale = False  # Set while the last reload failed and older records are being served
+        self.logger = logging.getLogger('telegram_bot')
+        self._records: Optional[List[Dict]] = None
+        self._loaded_at = float('-inf')
+        self._invalidated_at = float('-inf')
+        self._retry_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        now = time.monotonic()
+        return self._records is not None and (now - self._loaded_at < self.ttl or now < self._retry_at)
+
+    def get(self) -> List[Dict]:
+        """Return the cached records, reloading them if the TTL has expired"""
+        with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                return self._records
+            self.misses += 1
+        return self.refresh()
+
+    def refresh(self) -> List[Dict]:
+        """Reload the records now, readers keep getting the current ones until the load finishes or fails"""
+        # Loaded outside the lock, concurrent misses are coalesced by the loader
+        started_at = time.monotonic()
+        try:
+            records = self.loader()
+        except Exception as e:
+            # Outages are served from the last records, the reload is retried once retry_after has passed
+            with self._lock:
+                if self._records is None:
+                    raise
+                if not self.stale:
+                    self.logger.warning(f'Serving stale pitch catalog, reload failed: {str(e)}')
+                self.stale = True
+                self._retry_at = time.monotonic() + self.retry_after
+                return self._records
+        with self._lock:
+            self.stale = False
+            self._retry_at = float('-inf')
+            if records != self._records:
+                self.version += 1
+            self._records = records
+            # A load that started before the last invalidate() may be outdated, so it stays stale
+            if started_at >= self._invalidated_at:
+                self._loaded_at = started_at
+            self.logger.info(f'Loaded {len(records)} pitch records into catalog cache')
+            return records
+
+    def seed(self, records: List[Dict]) -> None:
+        """Serve records kept from an earlier run as fresh until the TTL expires or invalidate() is called"""
+        with self._lock:
+            if records != self._records:
+                self.version += 1
+            self._records = records
+            self._loaded_at = time.monotonic()
+        self.logger.info(f'Seeded catalog cache with {len(records)} pitch records')
+
+    @property
+    def records(self) -> Optional[List[Dict]]:
+        """Cached records without reloading, None before the first load"""
+        with self._lock:
+            return self._records
+
+    def is_stale(self) -> bool:
+        """Whether the last reload failed and older records are being served"""
+        with self._lock:
+            return self.stale
+
+    def invalidate(self) -> None:
+        """Mark the cached records stale so the next read goes to the sheet"""
+        with self._lock:
+            # Records are kept so an unchanged reload keeps the same version
+            self._loaded_at = float('-inf')
+            self._retry_at = float('-inf')
+            self._invalidated_at = time.monotonic()
+        self.logger.info('Catalog cache invalidated')
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,85 @@
+# Facade Helper - Circuit breaker for Google Sheets outages
+import logging
+import threading
+import time
+from enum import IntEnum
+
+from ..metrics.instruments import SHEETS_BREAKER_REJECTED, SHEETS_BREAKER_STATE, SHEETS_BREAKER_TRANSITIONS
+
+class CircuitState(IntEnum):
+    """Breaker states, exported as the value of the state gauge"""
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Google Sheets while the circuit is open"""
+
+class CircuitBreaker:
+    """Stops calling Google Sheets after consecutive failures or slow calls
+
+    A call fails when it raises anything but a client error, or takes longer
+    than slow_call_seconds. After failure_threshold failures in a row the
+    circuit opens and calls are rejected at once. After reset_timeout one
+    probe call is let through (half-open): if it is healthy the circuit
+    closes, otherwise it opens again for another reset_timeout.
+    """
+    def __init__(self, failure_threshold: int = 5, slow_call_seconds: float = 5.0, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.logger = logging.getLogger('telegram_bot')
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        SHEETS_BREAKER_STATE.set(int(CircuitState.CLOSED))
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def _transition(self, state: CircuitState) -> None:
+        """Change state, called with the lock held"""
+        self._state = state
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        if state == CircuitState.CLOSED:
+            self._failures = 0
+        SHEETS_BREAKER_STATE.set(int(state))
+        SHEETS_BREAKER_TRANSITIONS.inc(state=state.name.lower())
+        log = self.logger.info if state == CircuitState.CLOSED else self.logger.warning
+        log(f'Google Sheets circuit {state.name.lower()}')
+
+    def before_call(self) -> bool:
+        """Admit a call or raise CircuitOpenError, returns whether the call is the half-open probe"""
+        with self._lock:
+            if self._state == CircuitState.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    SHEETS_BREAKER_REJECTED.inc()
+                    raise CircuitOpenError('Google Sheets circuit is open')
+                self._transition(CircuitState.HALF_OPEN)
+            if self._state == CircuitState.HALF_OPEN:
+                if self._probe_in_flight:
+                    SHEETS_BREAKER_REJECTED.inc()
+                    raise CircuitOpenError('Google Sheets circuit is half-open, a probe is in flight')
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, probe: bool, success: bool, seconds: float) -> None:
+        """Record the outcome of an admitted call"""
+        healthy = success and seconds < self.slow_call_seconds
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+                self._transition(CircuitState.CLOSED if healthy else CircuitState.OPEN)
+            elif self._state == CircuitState.CLOSED:
+                # Calls admitted before the circuit opened no longer count
+                if healthy:
+                    self._failures = 0
+                else:
+                    self._failures += 1
+                    if self._failures >= self.failure_threshold:
+                        self._transition(CircuitState.OPEN)
@@ -0,0 +1,194 @@
+# Facade Helper - Google Sheets API quota governor
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Callable, Deque, Dict, Optional
+
+import gspread
+
+from .circuit_breaker import CircuitBreaker
+
+from ..metrics.instruments import SHEETS_QUOTA_RETRIES, SHEETS_QUOTA_WAITS
+
+READ = 'read'
+WRITE = 'write'
+
+# Quota exhausted, transient backend errors and unavailable
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# A write that failed with a server error may still have been applied, only rejected writes are safe to repeat
+RETRYABLE_WRITE_STATUS = {429}
+
+_deadline = threading.local()
+
+class QuotaDeadlineExceeded(TimeoutError):
+    """Raised instead of waiting for quota or a retry that would end after the caller's deadline"""
+
+@contextmanager
+def call_deadline(deadline: Optional[float]):
+    """Make governed calls on this thread give up rather than wait past deadline, a time.monotonic() value"""
+    previous = getattr(_deadline, 'at', None)
+    _deadline.at = deadline
+    try:
+        yield
+    finally:
+        _deadline.at = previous
+
+class Priority(IntEnum):
+    """Who is waiting on a Sheets call, lower values get budget first"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+class QuotaGovernor:
+    """Schedules Sheets calls under the per-minute read and write quotas
+
+    Each call takes one request from a sliding-window budget for its kind and
+    waits until the window has room. Background callers (mirror syncs) may
+    only use the budget up to interactive_reserve of the limit and always
+    yield to waiting interactive callers, so users keep getting answers when
+    the budget is tight. Retryable API errors are retried with full-jitter
+    exponential backoff, and a 429 pauses every caller of that kind. With a
+    circuit breaker, each attempt is admitted and reported to it, so an open
+    circuit fails calls at once instead of retrying against a dead backend.
+    Inside call_deadline, a call fails at once when the quota or a retry
+    would make it wait past the deadline, so it does not hold its thread
+    after its caller has given up.
+    """
+    def __init__(self, read_limit: int = 60, write_limit: int = 60, window: float = 60.0,
+                 interactive_reserve: float = 0.2, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 32.0, breaker: Optional[CircuitBreaker] = None):
+        self.limits = {READ: read_limit, WRITE: write_limit}
+        self.window = window
+        self.interactive_reserve = interactive_reserve
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.logger = logging.getLogger('telegram_bot')
+        self._calls: Dict[str, Deque[float]] = {READ: deque(), WRITE: deque()}
+        self._paused_until: Dict[str, float] = {READ: 0.0, WRITE: 0.0}
+        self._interactive_waiting: Dict[str, int] = {READ: 0, WRITE: 0}
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._random = random.Random()
+
+    @contextmanager
+    def background(self):
+        """Run the calls made by this thread inside the block at background priority"""
+        previous = getattr(self._local, 'priority', Priority.INTERACTIVE)
+        self._local.priority = Priority.BACKGROUND
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    @property
+    def priority(self) -> Priority:
+        return getattr(self._local, 'priority', Priority.INTERACTIVE)
+
+    def _budget(self, kind: str, priority: Priority) -> int:
+        limit = self.limits[kind]
+        if priority == Priority.BACKGROUND:
+            return max(1, int(limit * (1 - self.interactive_reserve)))
+        return limit
+
+    def _acquire(self, kind: str, priority: Priority) -> None:
+        """Block until the sliding window has room for one more call of this kind"""
+        calls = self._calls[kind]
+        deadline = getattr(_deadline, 'at', None)
+        waited = False
+        with self._condition:
+            if priority == Priority.INTERACTIVE:
+                self._interactive_waiting[kind] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    while calls and now - calls[0] >= self.window:
+                        calls.popleft()
+                    wait = self._paused_until[kind] - now
+                    if wait <= 0:
+                        yielding = priority == Priority.BACKGROUND and self._interactive_waiting[kind] > 0
+                        if len(calls) < self._budget(kind, priority) and not yielding:
+                            calls.append(now)
+                            return
+                        wait = calls[0] + self.window - now if calls else self.window
+                    if deadline is not None and now + wait > deadline:
+                        raise QuotaDeadlineExceeded(f'Sheets {kind} quota is not free for another {wait:.1f}s')
+                    if not waited:
+                        waited = True
+                        SHEETS_QUOTA_WAITS.inc(kind=kind, priority=priority.name.lower())
+                    self._condition.wait(timeout=max(wait, 0.01))
+            finally:
+                if priority == Priority.INTERACTIVE:
+                    self._interactive_waiting[kind] -= 1
+                    self._condition.notify_all()
+
+    def _backoff(self, attempt: int) -> float:
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _pause(self, kind: str, delay: float) -> None:
+        """Hold back every caller of a kind after the quota was exceeded"""
+        with self._condition:
+            self._paused_until[kind] = max(self._paused_until[kind], time.monotonic() + delay)
+            self._condition.notify_all()
+
+    def call(self, kind: str, func: Callable, *args, **kwargs):
+        """Run a Sheets API call under the quota, retrying retryable errors"""
+        priority = self.priority
+        attempt = 0
+        while True:
+            probe = self.breaker.before_call() if self.breaker else False
+            self._acquire(kind, priority)
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                status = getattr(e.response, 'status_code', None)
+                # Client errors and 429s come from a reachable backend, only server errors count against it
+                self._record(probe, status is not None and status < 500, started)
+                retryable = RETRYABLE_STATUS if kind == READ else RETRYABLE_WRITE_STATUS
+                if status not in retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                if status == 429:
+                    self._pause(kind, delay)
+                deadline = getattr(_deadline, 'at', None)
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    # The caller gives up before the retry, so the thread is handed back now
+                    raise
+                attempt += 1
+                SHEETS_QUOTA_RETRIES.inc(kind=kind, status=status)
+                self.logger.warning(
+                    f'Sheets {kind} {getattr(func, "__name__", "call")} failed with {status}, '
+                    f'retry {attempt}/{self.max_retries} in {delay:.1f}s'
+                )
+                if status != 429:
+                    time.sleep(delay)
+            except Exception:
+                # Timeouts and connection errors
+                self._record(probe, False, started)
+                raise
+            else:
+                self._record(probe, True, started)
+                return result
+
+    def _record(self, probe: bool, success: bool, started: float) -> None:
+        if self.breaker:
+            self.breaker.record(probe, success, time.monotonic() - started)
+
+    def read(self, func: Callable, *args, **kwargs):
+        """Run a call that counts against the read quota"""
+        return self.call(READ, func, *args, **kwargs)
+
+    def write(self, func: Callable, *args, **kwargs):
+        """Run a call that counts against the write quota"""
+        return self.call(WRITE, func, *args, **kwargs)
+
+    def usage(self) -> Dict[str, int]:
+        """Calls made in the current window per kind"""
+        with self._condition:
+            now = time.monotonic()
+            return {kind: sum(1 for t in calls if now - t < self.window) for kind, calls in self._calls.items()}
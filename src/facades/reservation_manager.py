@@ -0,0 +1,74 @@
+# Facade Helper - Short-lived slot holds
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+@dataclass
+class SlotHold:
+    """A temporary claim on a slot by one user"""
+    user_id: str
+    expires_at: float
+
+class ReservationManager:
+    """Tracks slot holds so two users cannot book the same slot at once"""
+    def __init__(self, hold_seconds: float = 300, sweep_interval: float = 30):
+        self.hold_seconds = hold_seconds
+        self.sweep_interval = sweep_interval
+        self.logger = logging.getLogger('telegram_bot')
+        self.lock = threading.RLock()
+        self._holds: Dict[Tuple[str, str], SlotHold] = {}
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run_sweeper, name='hold-sweeper', daemon=True)
+
+    def start(self) -> None:
+        """Start the timer that reclaims expired holds"""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sweeper timer"""
+        self._stop_event.set()
+
+    def _active_hold(self, pitch_name: str, time_slot: str):
+        hold = self._holds.get((pitch_name, time_slot))
+        if hold and hold.expires_at <= time.monotonic():
+            del self._holds[(pitch_name, time_slot)]
+            return None
+        return hold
+
+    def is_held_by_other(self, pitch_name: str, time_slot: str, user_id) -> bool:
+        """Check whether another user currently holds the slot"""
+        with self.lock:
+            hold = self._active_hold(pitch_name, time_slot)
+            return hold is not None and hold.user_id != str(user_id)
+
+    def hold(self, pitch_name: str, time_slot: str, user_id) -> bool:
+        """Take or refresh a hold on a slot, returns False if another user holds it"""
+        with self.lock:
+            if self.is_held_by_other(pitch_name, time_slot, user_id):
+                return False
+            self._holds[(pitch_name, time_slot)] = SlotHold(str(user_id), time.monotonic() + self.hold_seconds)
+            return True
+
+    def release(self, pitch_name: str, time_slot: str, user_id) -> None:
+        """Release a hold owned by the user"""
+        with self.lock:
+            hold = self._holds.get((pitch_name, time_slot))
+            if hold and hold.user_id == str(user_id):
+                del self._holds[(pitch_name, time_slot)]
+
+    def sweep(self) -> int:
+        """Remove expired holds and return how many were reclaimed"""
+        now = time.monotonic()
+        with self.lock:
+            expired = [key for key, hold in self._holds.items() if hold.expires_at <= now]
+            for key in expired:
+                del self._holds[key]
+        if expired:
+            self.logger.info(f'Reclaimed {len(expired)} expired slot holds')
+        return len(expired)
+
+    def _run_sweeper(self) -> None:
+        while not self._stop_event.wait(self.sweep_interval):
+            self.sweep()
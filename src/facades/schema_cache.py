@@ -0,0 +1,61 @@
+# Facade Helper - Local cache of verified worksheet headers
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+class SchemaCache:
+    """Worksheet headers verified on a previous run, stored in a small JSON file
+
+    Headers are keyed by workbook and worksheet, so a restart against the same
+    workbook can skip the header checks and column migrations. The file is
+    replaced atomically, and an unreadable file is treated as empty.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger('telegram_bot')
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, List[str]]] = None
+
+    @staticmethod
+    def _key(workbook: str, worksheet: str) -> str:
+        return f'{workbook}/{worksheet}'
+
+    def _load(self) -> Dict[str, List[str]]:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as file:
+                    self._entries = json.load(file)
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                self.logger.warning(f'Ignoring unreadable schema cache {self.path}: {str(e)}')
+                self._entries = {}
+        return self._entries
+
+    def get(self, workbook: str, worksheet: str) -> Optional[List[str]]:
+        """Headers cached for a worksheet, None if it was never verified"""
+        with self._lock:
+            return self._load().get(self._key(workbook, worksheet))
+
+    def _save(self, entries: Dict[str, List[str]]) -> None:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(entries, file, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f'Could not write schema cache {self.path}: {str(e)}')
+
+    def put(self, workbook: str, worksheet: str, headers: List[str]) -> None:
+        """Remember a worksheet's verified headers"""
+        with self._lock:
+            entries = self._load()
+            key = self._key(workbook, worksheet)
+            if entries.get(key) != list(headers):
+                entries[key] = list(headers)
+                self._save(entries)
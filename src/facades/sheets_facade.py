@@ -1,42 +1,206 @@
 # Facade Pattern - Google Sheets Facade
 import logging
-from typing import Dict, List, Optional
+import threading
+import uuid
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Set
 import gspread
+from gspread.utils import rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
 
-class SheetsFacade:
+from .booking_archive import BookingArchiver, archive_title, parse_archive_title
+from .booking_index import BookingIndex
+from .booking_journal import BookingJournal, BookingReplayer
+from .booking_sync import BookingSync
+from .booking_write_queue import BookingWriteQueue
+from .catalog_cache import CatalogCache
+from .circuit_breaker import CircuitState
+from .quota_governor import QuotaGovernor
+from .single_flight import SingleFlight
+from .snapshot import SnapshotFile, SnapshotWriter
+from .slot_calendar import FreeSlot, format_booking_time, has_started, not_started, offered_slots, parse_booking_time
+from .reservation_manager import ReservationManager
+from .schema_cache import SchemaCache
+from ..metrics.instruments import SHEETS_CALL_ERRORS, SHEETS_CALL_SECONDS, SHEETS_ROWS
+from ..metrics.registry import instrument_methods
+from ..storage.base import BookingStorage
+
+# Column order used when the Bookings sheet headers are unknown
+BOOKING_COLUMNS = ['User ID', 'User Name', 'Phone Number', 'Pitch Name', 'Date/Time', 'Status', 'Booking ID']
+
+@instrument_methods(SHEETS_CALL_SECONDS, SHEETS_CALL_ERRORS, false_is_error=('add_booking',))
+class SheetsFacade(BookingStorage):
     """Facade for Google Sheets operations"""
-    def __init__(self, credentials_file, scopes, sheet_name=None, sheet_id=None):
+    def __init__(self, credentials_file, scopes, sheet_name=None, sheet_id=None, catalog_ttl=300,
+                 write_batch_interval=0.5, write_batch_size=20, hold_seconds=300, client=None, governor=None,
+                 booking_sync_interval=15, booking_reconcile_interval=600,
+                 booking_archive_interval=0, booking_archive_after_days=0, timezone=None,
+                 schema_cache_path=None, lazy=True, snapshot_path=None, snapshot_interval=60, journal_path=None,
+                 dead_letter_path=None):
         self.credentials_file = credentials_file
         self.scopes = scopes
         self.sheet_name = sheet_name
         self.sheet_id = sheet_id
+        self.client = client  # Optional pre-built gspread client, e.g. FakeSheetsClient
+        self.governor = governor or QuotaGovernor()  # Every Sheets API call goes through the quota governor
+        self.reads = SingleFlight()  # Concurrent downloads of the same worksheet share one request
         self.logger = logging.getLogger('telegram_bot')
-        self.workbook = None
-        self.pitches_sheet = None
-        self.bookings_sheet = None
-        self.initialize_connection()
+        self._workbook = None
+        self._pitches_sheet = None
+        self._bookings_sheet = None
+        self._connected = False
+        self._connect_lock = threading.Lock()
+        self.bookings_headers: List[str] = list(BOOKING_COLUMNS)
+        # Headers verified on an earlier run let a restart skip the schema checks
+        self.schema_cache = SchemaCache(schema_cache_path) if schema_cache_path else None
+        self.catalog_cache = CatalogCache(self._load_pitches, catalog_ttl)
+        self.booking_index = BookingIndex(self._load_booking_index)
+        self._bookings_next_row = 2  # First Bookings row the tail sync has not read yet
+        self._bookings_sync_lock = threading.RLock()  # Reentrant so archiving can reconcile while holding it
+        self._archive_sheets: Dict[str, object] = {}
+        self.reservations = ReservationManager(hold_seconds)
+        # Confirmed bookings are journaled on disk first and replayed to the sheet, instead of queued in memory
+        self.journal = BookingJournal(journal_path) if journal_path else None
+        self.replay_immediately = write_batch_interval <= 0
+        self.booking_replayer: Optional[BookingReplayer] = None
+        if self.journal:
+            replay_interval = write_batch_interval if write_batch_interval > 0 else 1.0
+            self.booking_replayer = BookingReplayer(self, self.journal, replay_interval, write_batch_size)
+        self.write_queue: Optional[BookingWriteQueue] = None
+        if write_batch_interval > 0 and not self.journal:
+            self.write_queue = BookingWriteQueue(
+                self._append_booking_rows, write_batch_interval, write_batch_size, dead_letter_path=dead_letter_path
+            )
+        self.booking_sync: Optional[BookingSync] = None
+        if booking_sync_interval > 0:
+            self.booking_sync = BookingSync(self, booking_sync_interval, booking_reconcile_interval)
+        self.booking_archiver: Optional[BookingArchiver] = None
+        if booking_archive_interval > 0:
+            self.booking_archiver = BookingArchiver(self, booking_archive_interval, booking_archive_after_days, timezone)
+        # A snapshot from the previous run answers requests until the background warm-up reconciles it
+        self.snapshot_file = SnapshotFile(snapshot_path) if snapshot_path else None
+        self.restored_from_snapshot = self.restore_snapshot() if self.snapshot_file else False
+        if self.journal:
+            # Bookings recovered from the journal stay booked until their rows show up in the sheet
+            self.booking_index.add_pending([booking for _, booking in self.journal.pending()])
+        self.snapshot_writer: Optional[SnapshotWriter] = None
+        if self.snapshot_file and snapshot_interval > 0:
+            self.snapshot_writer = SnapshotWriter(self, snapshot_interval)
+        if not lazy:
+            self.connect()
+        self.reservations.start()
+        if self.write_queue:
+            self.write_queue.start()
+        if self.booking_replayer:
+            self.booking_replayer.start()
+        if self.booking_sync:
+            self.booking_sync.start()
+        if self.booking_archiver:
+            self.booking_archiver.start()
+        if self.snapshot_writer:
+            self.snapshot_writer.start()
+
+    def connect(self) -> None:
+        """Open the workbook and worksheets on first use, a failed attempt is retried by the next call"""
+        if self._connected:
+            return
+        with self._connect_lock:
+            if not self._connected:
+                self.initialize_connection()
+                self._connected = True
+
+    @property
+    def workbook(self):
+        self.connect()
+        return self._workbook
+
+    @property
+    def pitches_sheet(self):
+        self.connect()
+        return self._pitches_sheet
+
+    @property
+    def bookings_sheet(self):
+        self.connect()
+        return self._bookings_sheet
+
+    @property
+    def _workbook_key(self) -> str:
+        return self.sheet_id or self.sheet_name
+
+    def warm_up(self) -> None:
+        """Connect and load the catalog and booking index before the first user needs them"""
+        self.connect()
+        if not self.restored_from_snapshot:
+            self.get_pitches()
+            self.booking_index.load()
+            return
+        # Users are already served from the snapshot, so reconciling it yields quota to them
+        with self.governor.background():
+            self.catalog_cache.refresh()
+            self.reconcile_bookings()
+
+    def snapshot_version(self):
+        """Changes whenever the data a snapshot holds changes, None while nothing is loaded"""
+        if self.catalog_cache.records is None or not self.booking_index.loaded:
+            return None
+        return self.catalog_cache.version, self.booking_index.state_version
+
+    def save_snapshot(self) -> None:
+        """Write the catalog and booked slots to the snapshot file"""
+        if not self.snapshot_file or self.catalog_cache.records is None or not self.booking_index.loaded:
+            return
+        with self._bookings_sync_lock:
+            bookings_next_row = self._bookings_next_row
+            booked = self.booking_index.booked_pairs()
+        self.snapshot_file.save({
+            'workbook': self._workbook_key,
+            'pitches': self.catalog_cache.records,
+            'booked': booked,
+            'bookings_headers': self.bookings_headers,
+            'bookings_next_row': bookings_next_row,
+        })
+        self.logger.info(f'Saved snapshot with {len(booked)} booked slots')
+
+    def restore_snapshot(self) -> bool:
+        """Fill the catalog cache and booking index from the snapshot file, returns whether it was used"""
+        data = self.snapshot_file.load()
+        if not data or data.get('workbook') != self._workbook_key:
+            return False
+        try:
+            self.catalog_cache.seed(list(data['pitches']))
+            self.booking_index.restore([tuple(pair) for pair in data['booked']])
+            self.bookings_headers = list(data['bookings_headers'])
+            self._bookings_next_row = int(data['bookings_next_row'])
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.warning(f'Ignoring unusable snapshot: {str(e)}')
+            return False
+        self.logger.info(f'Restored {len(data["pitches"])} pitches and {len(data["booked"])} booked slots from snapshot')
+        return True
 
     def initialize_connection(self):
         """Initialize connection to Google Sheets"""
         try:
-            credentials = ServiceAccountCredentials.from_json_keyfile_name(
-                self.credentials_file,
-                self.scopes
-            )
-            gc = gspread.authorize(credentials)
+            if self.client:
+                gc = self.client
+            else:
+                credentials = ServiceAccountCredentials.from_json_keyfile_name(
+                    self.credentials_file,
+                    self.scopes
+                )
+                gc = gspread.authorize(credentials)
             
             # Try to open by ID first if provided, otherwise use name
             if self.sheet_id:
                 try:
-                    self.workbook = gc.open_by_key(self.sheet_id)
+                    self._workbook = self.governor.read(gc.open_by_key, self.sheet_id)
                     self.logger.info(f'Opened workbook by ID: {self.sheet_id}')
                 except Exception as e:
                     self.logger.error(f'Could not open workbook with ID: {self.sheet_id}. Error: {str(e)}')
                     raise
             else:
                 try:
-                    self.workbook = gc.open(self.sheet_name)
+                    self._workbook = self.governor.read(gc.open, self.sheet_name)
                     self.logger.info(f'Opened workbook by name: {self.sheet_name}')
                 except gspread.exceptions.SpreadsheetNotFound:
                     self.logger.error(f'Could not open workbook with name: {self.sheet_name}')
@@ -51,61 +215,300 @@ class SheetsFacade:
 
     def _initialize_worksheets(self):
         """Initialize or create required worksheets"""
-        if not self.workbook:
+        if not self._workbook:
             raise RuntimeError("Workbook not initialized. Connection to Google Sheets failed.")
             
         try:
-            self.pitches_sheet = self.workbook.worksheet('Pitches')
+            self._pitches_sheet = self.governor.read(self._workbook.worksheet, 'Pitches')
             self.logger.info('Accessed Pitches worksheet')
         except gspread.exceptions.WorksheetNotFound:
             # Create Pitches worksheet with headers if it doesn't exist
-            self.pitches_sheet = self.workbook.add_worksheet(title='Pitches', rows=100, cols=20)
-            self.pitches_sheet.append_row(['Location', 'Pitch Name', 'Time Slots', 'Owner Phone'])
+            self._pitches_sheet = self.governor.write(self._workbook.add_worksheet, title='Pitches', rows=100, cols=20)
+            self.governor.write(self._pitches_sheet.append_row, ['Location', 'Pitch Name', 'Time Slots', 'Owner Phone'])
             self.logger.info('Created new Pitches worksheet')
         
         try:
-            self.bookings_sheet = self.workbook.worksheet('Bookings')
+            self._bookings_sheet = self.governor.read(self._workbook.worksheet, 'Bookings')
             self.logger.info('Accessed Bookings worksheet')
             
+            cached_headers = self.schema_cache.get(self._workbook_key, 'Bookings') if self.schema_cache else None
+            if cached_headers and 'Booking ID' in cached_headers:
+                # Verified on an earlier run, the first full read of the sheet checks them again
+                self.bookings_headers = cached_headers
+                self.logger.info('Using cached Bookings headers')
+                return
+            
             # Check if the Bookings sheet has the required columns
-            headers = self.bookings_sheet.row_values(1)
+            headers = self.governor.read(self._bookings_sheet.row_values, 1)
             if 'Phone Number' not in headers or 'User Name' not in headers:
                 # Add the new columns if they don't exist
                 if 'Phone Number' not in headers:
                     # Use insert_cols instead of append_col
-                    col_count = len(self.bookings_sheet.col_values(1))
-                    self.bookings_sheet.insert_cols([['Phone Number'] + [''] * (col_count - 1)], 5)
+                    col_count = len(self.governor.read(self._bookings_sheet.col_values, 1))
+                    self.governor.write(self._bookings_sheet.insert_cols, [['Phone Number'] + [''] * (col_count - 1)], 5)
                     self.logger.info('Added Phone Number column to Bookings worksheet')
                 if 'User Name' not in headers:
-                    col_count = len(self.bookings_sheet.col_values(1))
-                    self.bookings_sheet.insert_cols([['User Name'] + [''] * (col_count - 1)], 6)
+                    col_count = len(self.governor.read(self._bookings_sheet.col_values, 1))
+                    self.governor.write(self._bookings_sheet.insert_cols, [['User Name'] + [''] * (col_count - 1)], 6)
                     self.logger.info('Added User Name column to Bookings worksheet')
+                headers = self.governor.read(self._bookings_sheet.row_values, 1)
+            if 'Booking ID' not in headers:
+                # Rows written before booking IDs existed keep an empty ID
+                col_count = len(self.governor.read(self._bookings_sheet.col_values, 1))
+                self.governor.write(
+                    self._bookings_sheet.insert_cols, [['Booking ID'] + [''] * (col_count - 1)], len(headers) + 1
+                )
+                self.logger.info('Added Booking ID column to Bookings worksheet')
+                headers = self.governor.read(self._bookings_sheet.row_values, 1)
+            self.bookings_headers = headers
+            self._remember_bookings_headers()
         except gspread.exceptions.WorksheetNotFound:
             # Create Bookings worksheet with headers if it doesn't exist
-            self.bookings_sheet = self.workbook.add_worksheet(title='Bookings', rows=100, cols=20)
-            self.bookings_sheet.append_row(['User ID', 'Pitch Name', 'Date/Time', 'Status', 'Phone Number', 'User Name'])
+            self._bookings_sheet = self.governor.write(self._workbook.add_worksheet, title='Bookings', rows=100, cols=20)
+            self.governor.write(self._bookings_sheet.append_row, ['User ID', 'Pitch Name', 'Date/Time', 'Status', 'Phone Number', 'User Name', 'Booking ID'])
+            self.bookings_headers = ['User ID', 'Pitch Name', 'Date/Time', 'Status', 'Phone Number', 'User Name', 'Booking ID']
+            self._remember_bookings_headers()
             self.logger.info('Created new Bookings worksheet')
 
+    def _remember_bookings_headers(self) -> None:
+        if self.schema_cache:
+            self.schema_cache.put(self._workbook_key, 'Bookings', self.bookings_headers)
+
+    def _load_pitches(self) -> List[Dict]:
+        """Download all records from the Pitches sheet, sharing a download already in flight"""
+        return self.reads.do('Pitches', self._fetch_pitches)
+
+    def _fetch_pitches(self) -> List[Dict]:
+        records = self.governor.read(self.pitches_sheet.get_all_records)
+        SHEETS_ROWS.inc(len(records), sheet='Pitches', operation='read')
+        return records
+
+    def get_pitches(self) -> List[Dict]:
+        """Get all pitch records, served from the catalog cache"""
+        return self.catalog_cache.get()
+
+    def catalog_version(self) -> int:
+        """Version of the pitch catalog, refreshing it first if the TTL has expired"""
+        self.get_pitches()
+        return self.catalog_cache.version
+
+    def booking_version(self, pitch_name: str):
+        """Version of a pitch's booked slots"""
+        return self.booking_index.version(pitch_name)
+
+    def is_stale(self) -> bool:
+        """Whether the catalog or availability is served from memory because Google Sheets is failing"""
+        breaker = self.governor.breaker
+        return self.catalog_cache.is_stale() or (breaker is not None and breaker.state != CircuitState.CLOSED)
+
+    def invalidate_catalog(self) -> None:
+        """Force the next catalog read to go to the Pitches sheet"""
+        self.catalog_cache.invalidate()
+
     def get_unique_locations(self) -> List[str]:
         """Get unique locations from the Pitches sheet"""
-        if not self.pitches_sheet:
-            return []
-        all_pitches = self.pitches_sheet.get_all_records()
+        all_pitches = self.get_pitches()
         return sorted(set(str(pitch.get('Location', '')) for pitch in all_pitches))
 
     def get_pitches_by_location(self, location: str) -> List[Dict]:
         """Get pitches for a specific location"""
-        if not self.pitches_sheet:
-            return []
-        all_pitches = self.pitches_sheet.get_all_records()
+        all_pitches = self.get_pitches()
         return [pitch for pitch in all_pitches if pitch.get('Location') == location]
 
-    def get_available_time_slots(self, pitch_name: str) -> List[str]:
-        """Get available time slots for a specific pitch"""
-        if not self.pitches_sheet:
+    def _load_bookings(self) -> List[Dict]:
+        """Download all records from the Bookings sheet, sharing a download already in flight"""
+        if not self.bookings_sheet:
+            return []
+        return self.reads.do('Bookings', self._fetch_bookings)
+
+    def _fetch_bookings(self) -> List[Dict]:
+        try:
+            records = self.governor.read(self.bookings_sheet.get_all_records)
+        except IndexError:  # Handles empty sheet case
             return []
-        # Get all time slots for the pitch
-        all_pitches = self.pitches_sheet.get_all_records()
+        SHEETS_ROWS.inc(len(records), sheet='Bookings', operation='read')
+        # The header row came with the records, so cached headers are checked for free
+        if records and list(records[0].keys()) != self.bookings_headers:
+            self.logger.warning(f'Bookings headers changed to {list(records[0].keys())}, updating the schema cache')
+            self.bookings_headers = list(records[0].keys())
+            self._remember_bookings_headers()
+        return records
+
+    def _load_booking_index(self) -> List[Dict]:
+        """Full read that the booking index is built from, the tail sync continues after it"""
+        with self._bookings_sync_lock:
+            records = self._load_bookings()
+            # Trailing empty rows are not returned, so the next appended row follows the last record
+            self._bookings_next_row = len(records) + 2
+            return records
+
+    @staticmethod
+    def _last_column(column_count: int) -> str:
+        """A1 letter of the last column, e.g. 'F' for six columns"""
+        return rowcol_to_a1(1, column_count).rstrip('0123456789')
+
+    def sync_bookings_tail(self) -> int:
+        """Read only the Bookings rows appended since the last sync into the booking index"""
+        if not self.booking_index.loaded or not self.bookings_sheet:
+            return 0  # The first lazy build reads everything anyway
+        with self._bookings_sync_lock:
+            start_row = self._bookings_next_row
+            last_column = self._last_column(len(self.bookings_headers))
+            values = self.governor.read(self.bookings_sheet.get_values, f'A{start_row}:{last_column}')
+            if not values:
+                return 0
+            SHEETS_ROWS.inc(len(values), sheet='Bookings', operation='read')
+            records = [dict(zip(self.bookings_headers, row)) for row in values if any(row)]
+            self._bookings_next_row = start_row + len(values)
+            added = self.booking_index.apply(records)
+        self.logger.info(f'Booking tail sync read {len(values)} rows from row {start_row}, {added} new bookings')
+        return added
+
+    def reconcile_bookings(self) -> bool:
+        """Rebuild the booking index from a full read, catching edits a tail sync cannot see"""
+        if not self.bookings_sheet:
+            return False
+        with self._bookings_sync_lock:
+            records = self._load_bookings()
+            self._bookings_next_row = len(records) + 2
+            changed = self.booking_index.replace(records)
+        self.logger.info(f'Reconciled booking index with {len(records)} rows, changed: {changed}')
+        return changed
+
+    def get_bookings(self) -> List[Dict]:
+        """Get all booking records from the Bookings sheet"""
+        return self._load_bookings()
+
+    def _archive_sheet(self, title: str):
+        """Open a monthly archive worksheet, creating it with the Bookings headers on first use"""
+        worksheet = self._archive_sheets.get(title)
+        if worksheet is None:
+            try:
+                worksheet = self.governor.read(self.workbook.worksheet, title)
+            except gspread.exceptions.WorksheetNotFound:
+                worksheet = self.governor.write(self.workbook.add_worksheet, title=title, rows=100, cols=20)
+                self.governor.write(worksheet.append_row, self.bookings_headers)
+                self.logger.info(f'Created archive worksheet {title}')
+            self._archive_sheets[title] = worksheet
+        return worksheet
+
+    def _delete_booking_rows(self, row_numbers: List[int], values: List[List], last_column: str) -> int:
+        """Delete rows from the Bookings sheet bottom-up, one request per contiguous run
+
+        Each run is re-read first and skipped if it no longer holds the values
+        that were archived, e.g. because rows were inserted above it by hand.
+        """
+        runs: List[List[int]] = []
+        for row_number in row_numbers:
+            if runs and runs[-1][1] == row_number - 1:
+                runs[-1][1] = row_number
+            else:
+                runs.append([row_number, row_number])
+        width = len(values[0])
+
+        def padded(rows: List[List]) -> List[List[str]]:
+            return [[str(value) for value in row] + [''] * (width - len(row)) for row in rows]
+
+        deleted = 0
+        for start, end in reversed(runs):
+            current = self.governor.read(self.bookings_sheet.get_values, f'A{start}:{last_column}{end}')
+            if padded(current) != padded(values[start - 1:end]):
+                self.logger.warning(f'Bookings rows {start}-{end} changed while archiving, left in place')
+                continue
+            self.governor.write(self.bookings_sheet.delete_rows, start, end)
+            deleted += end - start + 1
+        SHEETS_ROWS.inc(deleted, sheet='Bookings', operation='delete')
+        return deleted
+
+    def archive_bookings(self, before: date) -> int:
+        """Move bookings dated before a day, and bookings no longer 'Booked', into per-month archive worksheets
+
+        Rows are copied into the archive before they are deleted from the
+        Bookings sheet, so a failure in between leaves a row in both sheets
+        rather than losing it. Undated bookings never expire and stay active.
+        Returns the number of rows removed from the Bookings sheet.
+        """
+        if not self.bookings_sheet:
+            return 0
+        with self._bookings_sync_lock:
+            values = self.governor.read(self.bookings_sheet.get_all_values)
+            if not values or 'Date/Time' not in values[0] or 'Status' not in values[0]:
+                return 0
+            SHEETS_ROWS.inc(len(values) - 1, sheet='Bookings', operation='read')
+            headers = values[0]
+            time_column = headers.index('Date/Time')
+            status_column = headers.index('Status')
+            partitions: Dict[str, List[List]] = {}
+            row_numbers: List[int] = []
+            for row_number, row in enumerate(values[1:], start=2):
+                row = list(row) + [''] * (len(headers) - len(row))
+                if not any(row):
+                    continue
+                day, _ = parse_booking_time(row[time_column])
+                cancelled = row[status_column] != 'Booked'
+                if not cancelled and (day is None or day >= before):
+                    continue
+                partitions.setdefault(archive_title(day or before), []).append(row)
+                row_numbers.append(row_number)
+            if not row_numbers:
+                return 0
+            
+            for title, rows in sorted(partitions.items()):
+                self.governor.write(self._archive_sheet(title).append_rows, rows)
+                SHEETS_ROWS.inc(len(rows), sheet='Archive', operation='write')
+            deleted = self._delete_booking_rows(row_numbers, values, self._last_column(len(headers)))
+            
+            # Deleting rows shifts the ones below, so the tail sync position is rebuilt from a full read
+            self.reconcile_bookings()
+        self.logger.info(f'Archived {deleted} bookings into {len(partitions)} monthly worksheets')
+        return deleted
+
+    def iter_booking_history(self, start: Optional[date] = None, end: Optional[date] = None,
+                             chunk_rows: int = 500) -> Iterator[Dict]:
+        """Stream archived booking records month by month, oldest first
+
+        Only the archive worksheets of months between start and end are read,
+        chunk_rows rows per request, so history of any length is never held
+        in memory at once. Values are returned as the strings in the sheet.
+        """
+        if not self.workbook:
+            return
+        with self.governor.background():
+            worksheets = self.governor.read(self.workbook.worksheets)
+        archives = sorted(
+            ((parse_archive_title(worksheet.title), worksheet) for worksheet in worksheets
+             if parse_archive_title(worksheet.title)),
+            key=lambda archive: archive[0]
+        )
+        for month, worksheet in archives:
+            if (start and month < start.replace(day=1)) or (end and month > end):
+                continue
+            with self.governor.background():
+                headers = self.governor.read(worksheet.row_values, 1)
+            last_column = self._last_column(len(headers))
+            row_number = 2
+            while True:
+                # Only the read runs at background priority, the caller's own calls between records keep theirs
+                with self.governor.background():
+                    values = self.governor.read(
+                        worksheet.get_values, f'A{row_number}:{last_column}{row_number + chunk_rows - 1}'
+                    )
+                SHEETS_ROWS.inc(len(values), sheet='Archive', operation='read')
+                for row in values:
+                    if not any(row):
+                        continue
+                    record = dict(zip(headers, row))
+                    day, _ = parse_booking_time(record.get('Date/Time', ''))
+                    if day and ((start and day < start) or (end and day > end)):
+                        continue
+                    yield record
+                if len(values) < chunk_rows:
+                    break
+                row_number += chunk_rows
+
+    def _offered_slots(self, pitch_name: str) -> List[str]:
+        """Slots a pitch offers every day, from the Pitches sheet"""
+        all_pitches = self.get_pitches()
         pitch_data = next((pitch for pitch in all_pitches if pitch.get('Pitch Name') == pitch_name), None)
         
         if not pitch_data:
@@ -114,55 +517,158 @@ class SheetsFacade:
         time_slots = pitch_data.get('Time Slots', '')
         if not time_slots:
             return []
-            
-        available_slots = [slot.strip() for slot in str(time_slots).split(',')]
         
-        # Check which slots are already booked
-        try:
-            if not self.bookings_sheet:
-                return available_slots
-            bookings = self.bookings_sheet.get_all_records()
-        except IndexError:  # Handles empty sheet case
-            bookings = []
-
-        booked_slots = [booking.get('Date/Time', '') for booking in bookings 
-                       if booking.get('Status') == 'Booked' and booking.get('Pitch Name') == pitch_name]
+        return [slot.strip() for slot in str(time_slots).split(',') if slot.strip()]
 
+    def get_available_time_slots(self, pitch_name: str, day: Optional[date] = None,
+                                 not_before: Optional[int] = None) -> List[str]:
+        """Get available time slots for a specific pitch, on a day when given, skipping slots before not_before"""
+        available_slots = self._offered_slots(pitch_name)
+        if day:
+            return self.booking_index.free_slots(pitch_name, day, not_started(available_slots, not_before))
+        
         # Remove booked slots from available slots
+        booked_slots = self.booking_index.booked_slots(pitch_name)
         return [slot for slot in available_slots if slot not in booked_slots]
 
-    def is_slot_available(self, pitch_name: str, time_slot: str) -> bool:
+    def get_available_days(self, pitch_name: str, days: List[date], not_before: Optional[int] = None) -> List[date]:
+        """Days on which a pitch has at least one free slot, the first day's slots before not_before do not count"""
+        return self.booking_index.free_days(pitch_name, days, self._offered_slots(pitch_name), not_before)
+
+    def get_free_slots_range(self, pitch_name: str, start: date, end: date) -> Dict[date, List[str]]:
+        """Free slots of a pitch per day from start to end"""
+        return self.booking_index.free_slots_range(pitch_name, start, end, self._offered_slots(pitch_name))
+
+    def find_free_slots(self, days: List[date], limit: int, location: Optional[str] = None,
+                        not_before: Optional[int] = None) -> List[FreeSlot]:
+        """Earliest free slots across every pitch, or the pitches of one location"""
+        pitches = [
+            (str(pitch.get('Location', '')), pitch.get('Pitch Name'), offered_slots(pitch))
+            for pitch in self.get_pitches()
+            if location is None or pitch.get('Location') == location
+        ]
+        return self.booking_index.earliest_free(pitches, days, limit, not_before)
+
+    def is_slot_available(self, pitch_name: str, time_slot: str, day: Optional[date] = None) -> bool:
         """Check if a specific time slot is available for a pitch"""
-        if not self.bookings_sheet:
-            return True
-        try:
-            bookings = self.bookings_sheet.get_all_records()
-        except IndexError:  # Handles empty sheet case
-            bookings = []
-            
-        for booking in bookings:
-            if (booking.get('Status') == 'Booked' and 
-                booking.get('Date/Time') == time_slot and 
-                booking.get('Pitch Name') == pitch_name):
+        return not self.booking_index.is_booked(pitch_name, format_booking_time(time_slot, day))
+
+    def hold_slot(self, pitch_name: str, time_slot: str, user_id, day: Optional[date] = None,
+                  not_before: Optional[int] = None) -> bool:
+        """Take or refresh a short-lived hold on a free slot for a user, a slot that has started cannot be held"""
+        if has_started(time_slot, not_before):
+            return False
+        booking_time = format_booking_time(time_slot, day)
+        # Built before taking the hold lock, so a first full read of the sheet never runs under it
+        self.booking_index.load()
+        with self.reservations.lock:
+            if self.booking_index.is_booked(pitch_name, booking_time):
                 return False
-        return True
+            return self.reservations.hold(pitch_name, booking_time, user_id)
+
+    def release_slot(self, pitch_name: str, time_slot: str, user_id, day: Optional[date] = None) -> None:
+        """Release a user's hold on a slot"""
+        self.reservations.release(pitch_name, format_booking_time(time_slot, day), user_id)
+
+    def _build_booking_row(self, values: Dict[str, str]) -> List:
+        """Order booking values to match the Bookings sheet headers"""
+        # A sheet not yet migrated has no Booking ID column, its rows are written without the ID
+        if all(column in self.bookings_headers for column in BOOKING_COLUMNS if column != 'Booking ID'):
+            return [values.get(header, '') for header in self.bookings_headers]
+        return [values.get(column, '') for column in BOOKING_COLUMNS]
+
+    def _append_booking_rows(self, rows: List[List]) -> None:
+        """Append a batch of booking rows in a single request"""
+        self.governor.write(self.bookings_sheet.append_rows, rows)
+        SHEETS_ROWS.inc(len(rows), sheet='Bookings', operation='write')
+
+    def booking_ids(self) -> Optional[Set[str]]:
+        """Booking IDs already in the Bookings sheet, read from its Booking ID column only
+
+        None when the sheet has no Booking ID column, so callers cannot tell
+        which bookings are already in it.
+        """
+        sheet = self.bookings_sheet
+        if 'Booking ID' not in self.bookings_headers:
+            return None
+        values = self.governor.read(sheet.col_values, self.bookings_headers.index('Booking ID') + 1)
+        SHEETS_ROWS.inc(len(values), sheet='Bookings', operation='read')
+        return set(values[1:]) - {''}
+
+    def append_bookings(self, bookings: List[Dict]) -> None:
+        """Append booking records keyed by the Bookings sheet headers in a single request"""
+        self.connect()  # Rows are built in the order of the verified headers
+        self._append_booking_rows([self._build_booking_row(booking) for booking in bookings])
 
     def add_booking(self, user_id: str, user_name: str, phone_number: str, 
-                   pitch_name: str, time_slot: str, status: str = 'Booked') -> bool:
-        """Add a new booking to the Bookings sheet"""
-        if not self.bookings_sheet:
+                   pitch_name: str, time_slot: str, status: str = 'Booked',
+                   day: Optional[date] = None) -> bool:
+        """Add a new booking to the Bookings sheet, for a day when given"""
+        # Journaled bookings are taken while the sheet cannot be reached, as long as the booking index could be
+        # built, from the sheet earlier in this run or from the snapshot
+        if not self.journal and not self.bookings_sheet:
             self.logger.error('Bookings sheet not initialized')
             return False
+        booking_time = format_booking_time(time_slot, day)
+        booking_id = uuid.uuid4().hex
+        booking = {
+            'User ID': user_id,
+            'User Name': user_name,
+            'Phone Number': phone_number,
+            'Pitch Name': pitch_name,
+            'Date/Time': booking_time,
+            'Status': status,
+            'Booking ID': booking_id
+        }
         try:
-            self.bookings_sheet.append_row([
-                user_id, 
-                user_name,
-                phone_number,
-                pitch_name, 
-                time_slot, 
-                status
-            ])
+            # Built before taking the hold lock, so a first full read of the sheet never runs under it
+            self.booking_index.load()
+            # Converting the hold into a booking happens under the hold lock, the slot is taken in the index
+            # right away so the write below can run without holding up other users' holds
+            with self.reservations.lock:
+                if status == 'Booked':
+                    if (self.booking_index.is_booked(pitch_name, booking_time) or
+                            self.reservations.is_held_by_other(pitch_name, booking_time, user_id)):
+                        self.logger.warning(f'Slot {booking_time} for {pitch_name} is no longer available to user {user_id}')
+                        return False
+                    self.booking_index.add(pitch_name, booking_time)
+                self.reservations.release(pitch_name, booking_time, user_id)
+            try:
+                if self.journal:
+                    # On disk before it is acknowledged, the replayer writes it to the sheet
+                    self.journal.append(booking_id, booking)
+                elif self.write_queue:
+                    # Written behind in a batch
+                    self.write_queue.put(self._build_booking_row(booking))
+                else:
+                    self.governor.write(self.bookings_sheet.append_row, self._build_booking_row(booking))
+                    SHEETS_ROWS.inc(sheet='Bookings', operation='write')
+            except Exception:
+                # Give the slot back to the user so they can try again
+                with self.reservations.lock:
+                    if status == 'Booked':
+                        self.booking_index.remove(pitch_name, booking_time)
+                    self.reservations.hold(pitch_name, booking_time, user_id)
+                raise
+            if self.journal and self.replay_immediately:
+                # A failed write is already logged and retried by the replay loop
+                self.booking_replayer.replay_once()
             return True
         except Exception as e:
             self.logger.error(f'Error adding booking: {str(e)}')
-            return False
\ No newline at end of file
+            return False
+
+    def close(self) -> None:
+        """Flush pending writes before shutdown"""
+        self.reservations.stop()
+        if self.booking_sync:
+            self.booking_sync.stop()
+        if self.booking_archiver:
+            self.booking_archiver.stop()
+        if self.write_queue:
+            self.write_queue.stop()
+        if self.booking_replayer:
+            self.booking_replayer.stop()
+            self.journal.close()
+        if self.snapshot_writer:
+            self.snapshot_writer.stop()
\ No newline at end of file
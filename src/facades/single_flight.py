@@ -0,0 +1,45 @@
+# Facade Helper - Single-flight deduplication of concurrent identical calls
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from ..metrics.instruments import SHEETS_COALESCED
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+class SingleFlight:
+    """Runs one call per key at a time, concurrent callers with the same key share its result
+
+    Unlike a cache, nothing is kept once the call finishes: a caller arriving
+    after that starts a new call and sees fresh data.
+    """
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs):
+        """Run func, or wait for the identical call already in flight and return its result"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            SHEETS_COALESCED.inc(key=str(key))
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = func(*args, **kwargs)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
@@ -0,0 +1,205 @@
+# Facade Helper - Per-day slot bitmaps for date-aware availability
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+def format_booking_time(time_slot: str, day: Optional[date] = None) -> str:
+    """Value stored in the Bookings 'Date/Time' column, e.g. '2024-05-03 19:00'"""
+    return f'{day.isoformat()} {time_slot}' if day else time_slot
+
+def parse_booking_time(value) -> Tuple[Optional[date], str]:
+    """Split a 'Date/Time' value into its day and slot, rows written before dates existed have no day"""
+    text = str(value).strip()
+    day_part, _, slot = text.partition(' ')
+    if slot:
+        try:
+            return date.fromisoformat(day_part), slot.strip()
+        except ValueError:
+            pass
+    return None, text
+
+def date_range(start: date, end: date) -> List[date]:
+    """Every day from start to end inclusive"""
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+def upcoming_days(count: int, timezone: Optional[str] = None) -> List[date]:
+    """Today and the following days, today taken in the given IANA timezone or the server's local time"""
+    today = datetime.now(ZoneInfo(timezone)).date() if timezone else date.today()
+    return [today + timedelta(days=offset) for offset in range(count)]
+
+def offered_slots(record: Dict) -> List[str]:
+    """Slots a Pitches record offers every day"""
+    return [slot.strip() for slot in str(record.get('Time Slots', '')).split(',') if slot.strip()]
+
+def current_minute(timezone: Optional[str] = None) -> int:
+    """Minutes since midnight now, in the given IANA timezone or the server's local time"""
+    now = datetime.now(ZoneInfo(timezone)) if timezone else datetime.now()
+    return now.hour * 60 + now.minute
+
+SLOT_TIME = re.compile(r'^(\d{1,2}):(\d{2})')
+
+def slot_minutes(time_slot: str) -> Optional[int]:
+    """Start of a slot labelled like '19:00' in minutes since midnight, None for other labels"""
+    match = SLOT_TIME.match(time_slot)
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else None
+
+def has_started(time_slot: str, not_before: Optional[int]) -> bool:
+    """Whether a slot starts before not_before (minutes since midnight), labels without a time never have"""
+    minutes = slot_minutes(time_slot)
+    return not_before is not None and minutes is not None and minutes < not_before
+
+def not_started(time_slots: Iterable[str], not_before: Optional[int]) -> List[str]:
+    """Slots that do not start before not_before"""
+    return [time_slot for time_slot in time_slots if not has_started(time_slot, not_before)]
+
+def day_cutoff(day: Optional[date], timezone: Optional[str] = None) -> Optional[int]:
+    """not_before for slots on a day: the current minute when the day is today, None for any other day"""
+    if day is None or day != upcoming_days(1, timezone)[0]:
+        return None
+    return current_minute(timezone)
+
+class FreeSlot(NamedTuple):
+    """A free slot found by a search across pitches"""
+    day: date
+    location: str
+    pitch_name: str
+    time_slot: str
+
+class SlotCalendar:
+    """One bitmap of booked slots per pitch per day
+
+    Every distinct slot label is given a bit once, so a pitch's offered slots,
+    a day's bookings and the free slots are plain ints combined with & and ~.
+    """
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        self._labels: List[str] = []
+        self._booked: Dict[str, Dict[date, int]] = {}
+        self._lock = threading.Lock()
+
+    def bit(self, time_slot: str) -> int:
+        """Bit assigned to a slot label"""
+        position = self._bits.get(time_slot)
+        if position is None:
+            with self._lock:
+                position = self._bits.get(time_slot)
+                if position is None:
+                    position = self._bits[time_slot] = len(self._labels)
+                    self._labels.append(time_slot)
+        return 1 << position
+
+    def mask(self, time_slots: Iterable[str]) -> int:
+        """Bitmap of a set of slot labels"""
+        result = 0
+        for time_slot in time_slots:
+            result |= self.bit(time_slot)
+        return result
+
+    def booked_mask(self, pitch_name: str, day: date) -> int:
+        return self._booked.get(pitch_name, {}).get(day, 0)
+
+    def is_booked(self, pitch_name: str, day: date, time_slot: str) -> bool:
+        return bool(self.booked_mask(pitch_name, day) & self.bit(time_slot))
+
+    def book(self, pitch_name: str, day: date, time_slot: str) -> bool:
+        """Mark a slot booked, returns False if it already was"""
+        days = self._booked.setdefault(pitch_name, {})
+        current = days.get(day, 0)
+        bit = self.bit(time_slot)
+        if current & bit:
+            return False
+        days[day] = current | bit
+        return True
+
+    def unbook(self, pitch_name: str, day: date, time_slot: str) -> bool:
+        """Mark a slot free again, returns False if it was not booked"""
+        days = self._booked.get(pitch_name, {})
+        current = days.get(day, 0)
+        bit = self.bit(time_slot)
+        if not current & bit:
+            return False
+        days[day] = current & ~bit
+        return True
+
+    def bookings(self) -> List[Tuple[str, date, str]]:
+        """Every booked (pitch, day, slot)"""
+        booked = self._booked
+        return [
+            (pitch_name, day, label)
+            for pitch_name, days in booked.items()
+            for day, bitmap in days.items()
+            for position, label in enumerate(self._labels) if bitmap >> position & 1
+        ]
+
+    def replace(self, bookings: Iterable[Tuple[str, date, str]]) -> bool:
+        """Replace every bitmap with the given (pitch, day, slot) bookings, returns whether anything changed"""
+        booked: Dict[str, Dict[date, int]] = {}
+        for pitch_name, day, time_slot in bookings:
+            days = booked.setdefault(pitch_name, {})
+            days[day] = days.get(day, 0) | self.bit(time_slot)
+        changed = booked != self._booked
+        self._booked = booked
+        return changed
+
+    def free_slots(self, pitch_name: str, day: date, offered: List[str]) -> List[str]:
+        """Offered slots not booked on a day, in offered order"""
+        free = self.mask(offered) & ~self.booked_mask(pitch_name, day)
+        return [time_slot for time_slot in offered if free & self.bit(time_slot)]
+
+    def free_slots_range(self, pitch_name: str, start: date, end: date, offered: List[str]) -> Dict[date, List[str]]:
+        """Free slots per day from start to end inclusive, days with nothing free are left out"""
+        offered_mask = self.mask(offered)
+        days = self._booked.get(pitch_name, {})
+        result = {}
+        for day in date_range(start, end):
+            free = offered_mask & ~days.get(day, 0)
+            if free:
+                result[day] = [time_slot for time_slot in offered if free & self.bit(time_slot)]
+        return result
+
+    def free_days(self, pitch_name: str, days: Iterable[date], offered: List[str],
+                  not_before: Optional[int] = None) -> List[date]:
+        """Days on which at least one offered slot is free, slots on the first day starting before not_before are skipped"""
+        offered_mask = self.mask(offered)
+        first_mask = self.mask(not_started(offered, not_before))
+        booked = self._booked.get(pitch_name, {})
+        return [
+            day for index, day in enumerate(days)
+            if (first_mask if index == 0 else offered_mask) & ~booked.get(day, 0)
+        ]
+
+    def earliest_free(self, pitches: List[Tuple[str, str, List[str]]], days: List[date], limit: int,
+                      not_before: Optional[int] = None) -> List[FreeSlot]:
+        """Earliest free slots across many pitches, given as (location, pitch, offered slots)
+
+        Days are scanned in order and every pitch's free bitmap for a day is
+        computed with one & ~, so the scan stops after the first days that
+        hold enough results. Slots on the first day that start before
+        not_before (minutes since midnight) are skipped.
+        """
+        offered_masks = [(location, pitch_name, offered, self.mask(offered)) for location, pitch_name, offered in pitches]
+        skipped = 0
+        if not_before is not None:
+            skipped = self.mask(
+                slot for _, _, offered in pitches for slot in offered if has_started(slot, not_before)
+            )
+        results: List[FreeSlot] = []
+        for index, day in enumerate(days):
+            found = []
+            for location, pitch_name, offered, offered_mask in offered_masks:
+                free = offered_mask & ~self.booked_mask(pitch_name, day)
+                if index == 0:
+                    free &= ~skipped
+                if free:
+                    found.extend(FreeSlot(day, location, pitch_name, slot) for slot in offered if free & self.bit(slot))
+            found.sort(key=lambda item: (
+                slot_minutes(item.time_slot) if slot_minutes(item.time_slot) is not None else 24 * 60,
+                item.time_slot,
+                item.pitch_name
+            ))
+            results.extend(found)
+            if len(results) >= limit:
+                break
+        return results[:limit]
@@ -0,0 +1,96 @@
+# Facade Helper - On-disk snapshot of the catalog and booking index for warm restarts
+import logging
+import marshal
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Optional
+
+MAGIC = b'E7GZSNAP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHH')  # magic, format version, marshal version
+
+class SnapshotFile:
+    """Compact binary file holding plain Python data, written atomically
+
+    The payload is marshal data compressed with zlib behind a small header.
+    A file written by another format or marshal version, or a damaged one,
+    loads as None and the caller starts cold.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger('telegram_bot')
+
+    def save(self, data: Dict) -> None:
+        """Replace the snapshot with data made of builtin types only"""
+        payload = zlib.compress(marshal.dumps(data, marshal.version), 1)
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, marshal.version))
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+    def load(self) -> Optional[Dict]:
+        """Read the snapshot, None if there is none or it cannot be used"""
+        try:
+            with open(self.path, 'rb') as file:
+                content = file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            self.logger.warning(f'Could not read snapshot {self.path}: {str(e)}')
+            return None
+        try:
+            magic, format_version, marshal_version = HEADER.unpack_from(content)
+            if magic != MAGIC or format_version != FORMAT_VERSION or marshal_version != marshal.version:
+                self.logger.warning(f'Ignoring snapshot {self.path} written in another format')
+                return None
+            return marshal.loads(zlib.decompress(content[HEADER.size:]))
+        except (struct.error, zlib.error, ValueError, EOFError, TypeError) as e:
+            self.logger.warning(f'Ignoring damaged snapshot {self.path}: {str(e)}')
+            return None
+
+class SnapshotWriter:
+    """Saves the facade's snapshot every interval when its data has changed"""
+    def __init__(self, sheets_facade, interval: float = 60):
+        self.sheets_facade = sheets_facade
+        self.interval = interval
+        self.logger = logging.getLogger('telegram_bot')
+        self._saved_version = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='snapshot-writer', daemon=True)
+
+    def start(self) -> None:
+        """Start the background snapshot loop"""
+        self._thread.start()
+        self.logger.info(f'Snapshot writer started (interval={self.interval}s)')
+
+    def save_once(self) -> bool:
+        """Save the snapshot if anything changed since the last save, returns whether it was written"""
+        try:
+            version = self.sheets_facade.snapshot_version()
+            if version is None or version == self._saved_version:
+                return False
+            self.sheets_facade.save_snapshot()
+            self._saved_version = version
+            return True
+        except Exception as e:
+            self.logger.error(f'Snapshot save failed: {str(e)}')
+            return False
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.save_once()
+
+    def stop(self) -> None:
+        """Stop the snapshot loop after a final save"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.save_once()
@@ -1,29 +1,100 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import sys
 
-def setup_logger():
+from src.metrics.instruments import LOG_RECORDS_DROPPED, LOG_QUEUE_DEPTH
+
+DROP_NEW = 'drop_new'
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+OVERFLOW_POLICIES = (DROP_NEW, DROP_OLDEST, BLOCK)
+
+_listener = None
+
+# Console handler with UTF-8 encoding
+# Ensure the console uses UTF-8 encoding for Windows
+class UTF8ConsoleHandler(logging.StreamHandler):
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        if sys.platform == 'win32':
+            # Reconfigure stdout to use UTF-8 on Windows
+            import io
+            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='backslashreplace')
+            sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='backslashreplace')
+        self.stream = sys.stdout
+
+class BoundedQueueHandler(QueueHandler):
+    """Hands records to a bounded queue instead of writing them, so callers never wait on file I/O
+
+    When the queue is full the overflow policy decides: drop_new discards the
+    record being logged, drop_oldest discards the oldest queued record to make
+    room, block waits up to block_timeout seconds and then drops the record.
+    Under drop_new, warnings and errors still evict the oldest record, so
+    problems are not lost to a flood of INFO lines.
+    """
+    def __init__(self, log_queue: queue.Queue, overflow: str = DROP_NEW, block_timeout: float = 0.05):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown log overflow policy: {overflow}')
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.overflow == BLOCK:
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+                return
+            except queue.Full:
+                LOG_RECORDS_DROPPED.inc(level=record.levelname)
+                return
+        if self.overflow == DROP_NEW and record.levelno < logging.WARNING:
+            LOG_RECORDS_DROPPED.inc(level=record.levelname)
+            return
+        # Make room by discarding the oldest record, another thread may have made room already
+        try:
+            dropped = self.queue.get_nowait()
+            LOG_RECORDS_DROPPED.inc(level=dropped.levelname)
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(level=record.levelname)
+
+def shutdown_logger():
+    """Write out every queued record and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+# Queued records are written out before the interpreter exits
+atexit.register(shutdown_logger)
+
+def setup_logger(queue_size=10000, overflow=DROP_NEW):
+    global _listener
+    logger = logging.getLogger('telegram_bot')
+    # Calling setup again returns the running pipeline instead of adding duplicate handlers
+    if _listener is not None and any(isinstance(handler, BoundedQueueHandler) for handler in logger.handlers):
+        return logger
+
     # Create logs directory if it doesn't exist
     if not os.path.exists('logs'):
         os.makedirs('logs')
 
     # Configure logging
-    logger = logging.getLogger('telegram_bot')
     logger.setLevel(logging.INFO)
 
-    # Console handler with UTF-8 encoding
-    # Ensure the console uses UTF-8 encoding for Windows
-    class UTF8ConsoleHandler(logging.StreamHandler):
-        def __init__(self, stream=None):
-            super().__init__(stream)
-            if sys.platform == 'win32':
-                # Reconfigure stdout to use UTF-8 on Windows
-                import io
-                sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='backslashreplace')
-                sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='backslashreplace')
-            self.stream = sys.stdout
-
     console_handler = UTF8ConsoleHandler()
     console_handler.setLevel(logging.INFO)
     console_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -40,8 +111,15 @@ def setup_logger():
     file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(file_formatter)
 
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # The logger only enqueues records, file writes and rollovers happen on the listener thread
+    log_queue = queue.Queue(maxsize=queue_size)
+    LOG_QUEUE_DEPTH.set_function(log_queue.qsize)
+    shutdown_logger()
+    _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(BoundedQueueHandler(log_queue, overflow))
 
-    return logger
\ No newline at end of file
+    return logger
@@ -0,0 +1,12 @@
+# Messaging Implementation
+# This package contains the outbound Telegram message pipeline for the E7gz Bot
+
+from .outbound_queue import MessagePriority, OutboundQueue
+from .rate_limiter import TelegramRateLimiter, TokenBucket
+
+__all__ = [
+    'MessagePriority',
+    'OutboundQueue',
+    'TelegramRateLimiter',
+    'TokenBucket'
+]
@@ -0,0 +1,181 @@
+# Messaging - Prioritized outbound Telegram queue
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from telegram.error import NetworkError, RetryAfter, TimedOut
+
+from .rate_limiter import TelegramRateLimiter
+from ..metrics.instruments import TELEGRAM_SEND_ERRORS, TELEGRAM_SEND_SECONDS
+from ..metrics.registry import track
+
+class MessagePriority(IntEnum):
+    """Lower values are sent first"""
+    USER_EDIT = 0
+    USER_MESSAGE = 1
+    ADMIN_BROADCAST = 2
+
+@dataclass(order=True)
+class OutboundMessage:
+    """A pending send_message or edit_message_text call"""
+    priority: int
+    sequence: int
+    method: str = field(compare=False)
+    chat_id: Any = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False)
+    coalesce_key: Optional[Tuple] = field(compare=False, default=None)
+    futures: List[asyncio.Future] = field(compare=False, default_factory=list)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+class OutboundQueue:
+    """Sends Telegram messages by priority, honouring RetryAfter and coalescing repeated edits"""
+    def __init__(self, rate_limiter: Optional[TelegramRateLimiter] = None, workers: int = 8, max_retries: int = 5):
+        self.rate_limiter = rate_limiter
+        self.workers = workers
+        self.max_retries = max_retries
+        self.logger = logging.getLogger('telegram_bot')
+        self.bot = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+        self._latencies: Deque[float] = deque(maxlen=1000)
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._pending_edits: Dict[Tuple, OutboundMessage] = {}
+        self._sequence = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self, bot) -> None:
+        """Start the worker tasks on the running event loop"""
+        self.bot = bot
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.logger.info(f'Outbound message queue started with {self.workers} workers')
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Drain the queue for up to timeout seconds, then stop the workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f'Outbound queue stopped with {self._queue.qsize()} messages unsent')
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.logger.info('Outbound message queue stopped')
+
+    def _enqueue(self, method: str, chat_id, priority: int, coalesce_key: Optional[Tuple] = None, **kwargs) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if coalesce_key is not None:
+            pending = self._pending_edits.get(coalesce_key)
+            if pending is not None:
+                # A newer edit of the same message replaces the one still waiting
+                pending.kwargs = kwargs
+                pending.futures.append(future)
+                self.coalesced += 1
+                return future
+        message = OutboundMessage(priority, next(self._sequence), method, chat_id, kwargs, coalesce_key, [future])
+        if coalesce_key is not None:
+            self._pending_edits[coalesce_key] = message
+        self._queue.put_nowait(message)
+        return future
+
+    async def send_message(self, chat_id, text: str, priority: int = MessagePriority.USER_MESSAGE,
+                           wait: bool = True, **kwargs):
+        """Queue a send_message call, waiting for it to be sent unless wait is False"""
+        future = self._enqueue('send_message', chat_id, priority, text=text, **kwargs)
+        return await future if wait else self._detach(future)
+
+    async def edit_message_text(self, chat_id, message_id: int, text: str,
+                                priority: int = MessagePriority.USER_EDIT, wait: bool = True, **kwargs):
+        """Queue an edit_message_text call, coalescing edits of the same message"""
+        future = self._enqueue(
+            'edit_message_text', chat_id, priority, coalesce_key=(chat_id, message_id),
+            message_id=message_id, text=text, **kwargs
+        )
+        return await future if wait else self._detach(future)
+
+    @staticmethod
+    def _detach(future: asyncio.Future) -> asyncio.Future:
+        """Mark a future nobody awaits so its failure is not reported as unretrieved"""
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return future
+
+    async def _deliver(self, message: OutboundMessage):
+        attempt = 0
+        while True:
+            try:
+                if self.rate_limiter:
+                    # Edits answer the user's own taps and are coalesced per message, so only the global limit applies
+                    await self.rate_limiter.acquire(
+                        message.chat_id, per_chat=message.priority != MessagePriority.USER_EDIT
+                    )
+                method = getattr(self.bot, message.method)
+                with track(TELEGRAM_SEND_SECONDS, TELEGRAM_SEND_ERRORS, method=message.method):
+                    return await method(chat_id=message.chat_id, **message.kwargs)
+            except RetryAfter as e:
+                # Flood control tells us exactly how long to wait
+                attempt += 1
+                self.retried += 1
+                if attempt > self.max_retries:
+                    raise
+                self.logger.warning(f'Flood control for chat {message.chat_id}, retrying in {e.retry_after}s')
+                await asyncio.sleep(e.retry_after)
+            except (TimedOut, NetworkError) as e:
+                attempt += 1
+                self.retried += 1
+                if attempt > self.max_retries:
+                    raise
+                self.logger.warning(f'Network error sending to chat {message.chat_id}, retrying: {str(e)}')
+                await asyncio.sleep(min(2 ** attempt, 30))
+
+    async def _worker(self) -> None:
+        while True:
+            message = await self._queue.get()
+            if message.coalesce_key is not None:
+                self._pending_edits.pop(message.coalesce_key, None)
+            try:
+                result = await self._deliver(message)
+                self.sent += 1
+                self._latencies.append(time.monotonic() - message.enqueued_at)
+                for future in message.futures:
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                self.failed += 1
+                self.logger.error(f'Failed to {message.method} for chat {message.chat_id}: {str(e)}')
+                for future in message.futures:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def metrics(self) -> Dict[str, float]:
+        """Return queue depth, counters and send latency percentiles in seconds"""
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            'depth': self._queue.qsize() if self._queue else 0,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'coalesced': self.coalesced,
+            'latency_p50': percentile(0.5),
+            'latency_p99': percentile(0.99),
+        }
@@ -0,0 +1,56 @@
+# Messaging - Token bucket rate limiting for Telegram sends
+import asyncio
+import time
+from typing import Dict
+
+class TokenBucket:
+    """Async token bucket that refills at rate tokens per second up to capacity"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+class TelegramRateLimiter:
+    """Keeps sends within Telegram's global and per-chat bot limits"""
+    def __init__(self, global_rate: float = 30, per_chat_rate: float = 1, per_chat_burst: float = 3):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+
+    def _prune(self) -> None:
+        """Forget chats whose buckets have been idle long enough to be full again"""
+        now = time.monotonic()
+        idle_after = self.per_chat_burst / self.per_chat_rate
+        for key in [key for key, bucket in self._chat_buckets.items() if now - bucket.updated_at > idle_after]:
+            del self._chat_buckets[key]
+
+    async def acquire(self, chat_id, per_chat: bool = True) -> None:
+        """Wait for the chat's budget, unless per_chat is False, and the global budget"""
+        if not per_chat:
+            await self.global_bucket.acquire()
+            return
+        if len(self._chat_buckets) > 10000:
+            self._prune()
+        key = str(chat_id)
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            bucket = self._chat_buckets[key] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+        await bucket.acquire()
+        await self.global_bucket.acquire()
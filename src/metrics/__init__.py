@@ -0,0 +1,18 @@
+# Metrics Implementation
+# This package contains latency, error and cache instrumentation and its HTTP endpoint for the E7gz Bot
+
+from .registry import Counter, Gauge, Histogram, MetricsRegistry, instrument_methods, track
+from .instruments import REGISTRY, register_cache
+from .server import MetricsServer
+
+__all__ = [
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'MetricsServer',
+    'REGISTRY',
+    'instrument_methods',
+    'register_cache',
+    'track'
+]
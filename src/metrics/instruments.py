@@ -0,0 +1,57 @@
+# Metrics - The bot's metrics, shared by every component
+from .registry import MetricsRegistry
+
+REGISTRY = MetricsRegistry()
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    'e7gz_handler_seconds', 'Time spent handling one update, per conversation step', ['state'])
+HANDLER_ERRORS = REGISTRY.counter(
+    'e7gz_handler_errors_total', 'Updates whose handler failed, per conversation step', ['state'])
+
+SHEETS_CALL_SECONDS = REGISTRY.histogram(
+    'e7gz_sheets_call_seconds', 'Latency of SheetsFacade methods', ['method'])
+SHEETS_CALL_ERRORS = REGISTRY.counter(
+    'e7gz_sheets_call_errors_total', 'SheetsFacade methods that raised', ['method'])
+SHEETS_ROWS = REGISTRY.counter(
+    'e7gz_sheets_rows_total', 'Rows read from or written to Google Sheets', ['sheet', 'operation'])
+SHEETS_COALESCED = REGISTRY.counter(
+    'e7gz_sheets_coalesced_total', 'Sheets reads served by joining an identical read already in flight', ['key'])
+SHEETS_QUOTA_WAITS = REGISTRY.counter(
+    'e7gz_sheets_quota_waits_total', 'Sheets calls that waited for quota budget', ['kind', 'priority'])
+SHEETS_QUOTA_RETRIES = REGISTRY.counter(
+    'e7gz_sheets_quota_retries_total', 'Sheets calls retried after a retryable API error', ['kind', 'status'])
+SHEETS_QUOTA_USAGE = REGISTRY.gauge(
+    'e7gz_sheets_quota_usage', 'Sheets calls made in the current quota window', ['kind'])
+SHEETS_BREAKER_STATE = REGISTRY.gauge(
+    'e7gz_sheets_breaker_state', 'Google Sheets circuit breaker state: 0 closed, 1 half-open, 2 open')
+SHEETS_BREAKER_TRANSITIONS = REGISTRY.counter(
+    'e7gz_sheets_breaker_transitions_total', 'Google Sheets circuit breaker state changes', ['state'])
+SHEETS_BREAKER_REJECTED = REGISTRY.counter(
+    'e7gz_sheets_breaker_rejected_total', 'Sheets calls rejected without being made because the circuit was open')
+
+STORAGE_CALL_SECONDS = REGISTRY.histogram(
+    'e7gz_storage_call_seconds', 'Latency of storage calls awaited by handlers, including thread pool wait',
+    ['method'])
+STORAGE_CALL_ERRORS = REGISTRY.counter(
+    'e7gz_storage_call_errors_total', 'Storage calls awaited by handlers that failed or timed out', ['method'])
+
+TELEGRAM_SEND_SECONDS = REGISTRY.histogram(
+    'e7gz_telegram_send_seconds', 'Latency of Telegram Bot API send and edit calls', ['method'])
+TELEGRAM_SEND_ERRORS = REGISTRY.counter(
+    'e7gz_telegram_send_errors_total', 'Telegram Bot API send and edit calls that failed', ['method'])
+
+CACHE_HITS = REGISTRY.gauge('e7gz_cache_hits', 'Cache hits since startup', ['cache'])
+CACHE_MISSES = REGISTRY.gauge('e7gz_cache_misses', 'Cache misses since startup', ['cache'])
+CACHE_HIT_RATIO = REGISTRY.gauge('e7gz_cache_hit_ratio', 'Share of cache lookups served from the cache', ['cache'])
+
+OUTBOUND_QUEUE_DEPTH = REGISTRY.gauge('e7gz_outbound_queue_depth', 'Messages waiting in the outbound queue')
+
+LOG_QUEUE_DEPTH = REGISTRY.gauge('e7gz_log_queue_depth', 'Log records waiting to be written by the listener thread')
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    'e7gz_log_records_dropped_total', 'Log records discarded because the log queue was full', ['level'])
+
+def register_cache(name: str, stats) -> None:
+    """Expose a cache whose stats() returns hits, misses and hit_ratio"""
+    CACHE_HITS.set_function(lambda: stats()['hits'], cache=name)
+    CACHE_MISSES.set_function(lambda: stats()['misses'], cache=name)
+    CACHE_HIT_RATIO.set_function(lambda: stats()['hit_ratio'], cache=name)
@@ -1,6 +1,6 @@
 # Observer Pattern - Booking Event
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 @dataclass
@@ -12,8 +12,17 @@ class BookingEvent:
     pitch_name: str
     time_slot: str
     location: str
+    booking_date: Optional[str] = None  # ISO day, None for bookings made before dates existed
     timestamp: Optional[datetime] = None
     
+    @property
+    def slot_label(self) -> str:
+        """Booked slot with its day, as shown in notifications"""
+        if not self.booking_date:
+            return self.time_slot
+        day = date.fromisoformat(self.booking_date)
+        return f'{self.time_slot} يوم {day.day}/{day.month}/{day.year}'
+
     def __post_init__(self):
         # Set timestamp to current time if not provided
         if self.timestamp is None:
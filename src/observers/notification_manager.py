@@ -1,10 +1,14 @@
 # Observer Pattern - Notification Manager
+import asyncio
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Set
 from telegram.ext import ContextTypes
 
 from .booking_event import BookingEvent
+from ..messaging.outbound_queue import MessagePriority, OutboundQueue
+from ..metrics.instruments import TELEGRAM_SEND_ERRORS, TELEGRAM_SEND_SECONDS
+from ..metrics.registry import track
 
 class BookingObserver(ABC):
     """Observer interface for booking events"""
@@ -14,7 +18,8 @@ class BookingObserver(ABC):
 
 class UserNotifier(BookingObserver):
     """Observer that notifies the user about booking events"""
-    def __init__(self):
+    def __init__(self, outbound_queue: Optional[OutboundQueue] = None):
+        self.outbound_queue = outbound_queue
         self.logger = logging.getLogger('telegram_bot')
 
     async def update(self, event: BookingEvent, context: Optional[ContextTypes.DEFAULT_TYPE] = None) -> None:
@@ -23,51 +28,67 @@ class UserNotifier(BookingObserver):
             return
         
         try:
-            await context.bot.send_message(
-                chat_id=event.user_id,
-                text=f"✅ تم تأكيد الحجز! \n\n"
-                     f"انت حجزت الساعة {event.time_slot} في ملعب {event.pitch_name} في {event.location}.\n\n"
-                     f"شكراً لاستخدام البوت E7gz! ارسل /start لبدء حجز آخر."
+            text = (
+                f"✅ تم تأكيد الحجز! \n\n"
+                f"انت حجزت الساعة {event.slot_label} في ملعب {event.pitch_name} في {event.location}.\n\n"
+                f"شكراً لاستخدام البوت E7gz! ارسل /start لبدء حجز آخر."
             )
+            if self.outbound_queue and self.outbound_queue.running:
+                await self.outbound_queue.send_message(event.user_id, text, priority=MessagePriority.USER_MESSAGE)
+            else:
+                with track(TELEGRAM_SEND_SECONDS, TELEGRAM_SEND_ERRORS, method='send_message'):
+                    await context.bot.send_message(chat_id=event.user_id, text=text)
             self.logger.info(f'Sent booking confirmation to user {event.user_id}')
         except Exception as e:
             self.logger.error(f'Failed to send notification to user {event.user_id}: {str(e)}')
 
 class AdminNotifier(BookingObserver):
     """Observer that notifies admins about booking events"""
-    def __init__(self, admin_chat_ids: List[str]):
+    def __init__(self, admin_chat_ids: List[str], outbound_queue: Optional[OutboundQueue] = None):
         self.admin_chat_ids = admin_chat_ids
+        self.outbound_queue = outbound_queue
         self.logger = logging.getLogger('telegram_bot')
 
+    async def _send(self, context: ContextTypes.DEFAULT_TYPE, admin_id: str, text: str) -> bool:
+        """Send to one admin, a failing chat does not affect the others"""
+        try:
+            if self.outbound_queue and self.outbound_queue.running:
+                # Admin broadcasts yield to user-facing messages
+                await self.outbound_queue.send_message(admin_id, text, priority=MessagePriority.ADMIN_BROADCAST)
+            else:
+                with track(TELEGRAM_SEND_SECONDS, TELEGRAM_SEND_ERRORS, method='send_message'):
+                    await context.bot.send_message(chat_id=admin_id, text=text)
+            return True
+        except Exception as e:
+            self.logger.error(f'Failed to send notification to admin {admin_id}: {str(e)}')
+            return False
+
     async def update(self, event: BookingEvent, context: Optional[ContextTypes.DEFAULT_TYPE] = None) -> None:
         if not context:
             self.logger.error('Cannot notify admins: context is None')
             return
         
-        try:
-            admin_message = (
-                f"🔔 حجز جديد! \n\n"
-                f"صاحب الحجز: {event.user_name} (ID: {event.user_id})\n"
-                f"رقم التلفون: {event.phone_number}\n"
-                f"الملعب: {event.pitch_name} في {event.location}\n"
-                f"الساعة: {event.time_slot}"
-            )
-            
-            for admin_id in self.admin_chat_ids:
-                await context.bot.send_message(
-                    chat_id=admin_id,
-                    text=admin_message
-                )
-            
-            self.logger.info(f'Sent booking notifications to {len(self.admin_chat_ids)} admins')
-        except Exception as e:
-            self.logger.error(f'Failed to send notifications to admins: {str(e)}')
+        admin_message = (
+            f"🔔 حجز جديد! \n\n"
+            f"صاحب الحجز: {event.user_name} (ID: {event.user_id})\n"
+            f"رقم التلفون: {event.phone_number}\n"
+            f"الملعب: {event.pitch_name} في {event.location}\n"
+            f"الساعة: {event.slot_label}"
+        )
+        
+        # Send to all admins concurrently
+        results = await asyncio.gather(
+            *(self._send(context, admin_id, admin_message) for admin_id in self.admin_chat_ids)
+        )
+        
+        self.logger.info(f'Sent booking notifications to {sum(results)}/{len(self.admin_chat_ids)} admins')
 
 class NotificationManager:
     """Subject in the Observer pattern that manages notifications"""
     def __init__(self):
         self.observers: List[BookingObserver] = []
         self.logger = logging.getLogger('telegram_bot')
+        self._background_tasks: Set[asyncio.Task] = set()
 
     def add_observer(self, observer: BookingObserver) -> None:
         """Add an observer to the notification list"""
@@ -82,5 +103,19 @@ class NotificationManager:
     async def notify(self, event: BookingEvent, context: Optional[ContextTypes.DEFAULT_TYPE] = None) -> None:
         """Notify all observers about a booking event"""
         self.logger.info(f'Notifying {len(self.observers)} observers about booking event')
-        for observer in self.observers:
-            await observer.update(event, context)
\ No newline at end of file
+        await asyncio.gather(*(self._update_observer(observer, event, context) for observer in self.observers))
+
+    async def _update_observer(self, observer: BookingObserver, event: BookingEvent,
+                               context: Optional[ContextTypes.DEFAULT_TYPE]) -> None:
+        """Update one observer, isolating its failures from the others"""
+        try:
+            await observer.update(event, context)
+        except Exception as e:
+            self.logger.error(f'Observer {observer.__class__.__name__} failed: {str(e)}')
+
+    def dispatch(self, event: BookingEvent, context: Optional[ContextTypes.DEFAULT_TYPE] = None) -> None:
+        """Notify observers in the background so the caller does not wait on Telegram"""
+        task = asyncio.get_running_loop().create_task(self.notify(event, context))
+        # Keep a reference so the task is not garbage collected before it finishes
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
\ No newline at end of file
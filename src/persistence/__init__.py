@@ -0,0 +1,14 @@
+# Persistence Implementation
+# This package contains conversation persistence backed by a pluggable key-value store
+
+from .instance_lock import InstanceAlreadyRunning, InstanceLock
+from .kv_store import KeyValueStore, SQLiteKeyValueStore
+from .store_persistence import StorePersistence
+
+__all__ = [
+    'InstanceAlreadyRunning',
+    'InstanceLock',
+    'KeyValueStore',
+    'SQLiteKeyValueStore',
+    'StorePersistence'
+]
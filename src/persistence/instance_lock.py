@@ -0,0 +1,51 @@
+# Persistence - Single-instance guard for the persisted bot state
+import logging
+import os
+import sys
+
+class InstanceAlreadyRunning(RuntimeError):
+    """Raised when another bot process already owns the persisted state"""
+
+class InstanceLock:
+    """Exclusive OS lock on a file next to the persistence store
+
+    Conversation states, slot holds and the booking index live in one
+    process, so only one bot process may serve a bot token and its store.
+    The lock is released by the OS when the process exits, even on a crash.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger('telegram_bot')
+        self._file = None
+
+    def acquire(self) -> None:
+        """Take the lock, raises InstanceAlreadyRunning if another process holds it"""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        file = open(self.path, 'a+')
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            raise InstanceAlreadyRunning(
+                f'Another bot process holds {self.path}, only one process may run per persistence store'
+            )
+        file.seek(0)
+        file.truncate()
+        file.write(str(os.getpid()))
+        file.flush()
+        self._file = file
+        self.logger.info(f'Acquired instance lock {self.path}')
+
+    def release(self) -> None:
+        """Drop the lock, closing the file releases it"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
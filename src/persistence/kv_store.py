@@ -0,0 +1,63 @@
+# Persistence - Key-value stores
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+class KeyValueStore(ABC):
+    """Namespaced string key-value store the bot persists its state in"""
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def get_all(self, namespace: str) -> Dict[str, str]:
+        pass
+
+    @abstractmethod
+    def write_batch(self, items: Dict[tuple, Optional[str]]) -> None:
+        """Write {(namespace, key): value} in one batch, a None value deletes the key"""
+        pass
+
+    def close(self) -> None:
+        pass
+
+class SQLiteKeyValueStore(KeyValueStore):
+    """File-backed key-value store, safe to read from other processes, e.g. for inspection"""
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS kv ('
+            'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+            'PRIMARY KEY (namespace, key))'
+        )
+        self.connection.commit()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT value FROM kv WHERE namespace = ? AND key = ?', (namespace, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_all(self, namespace: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self.connection.execute('SELECT key, value FROM kv WHERE namespace = ?', (namespace,)).fetchall()
+        return dict(rows)
+
+    def write_batch(self, items: Dict[tuple, Optional[str]]) -> None:
+        upserts = [(namespace, key, value) for (namespace, key), value in items.items() if value is not None]
+        deletes = [(namespace, key) for (namespace, key), value in items.items() if value is None]
+        with self._lock, self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)', upserts)
+            self.connection.executemany('DELETE FROM kv WHERE namespace = ? AND key = ?', deletes)
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
@@ -0,0 +1,126 @@
+# Persistence - Conversation persistence over a key-value store
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from .kv_store import KeyValueStore
+
+USER_DATA = 'user_data'
+CONVERSATIONS = 'conversations'
+
+class StorePersistence(BasePersistence):
+    """Persists conversation states and user_data in a KeyValueStore
+
+    Changes are collected as dirty keys and written in one batch shortly after
+    the Application's periodic persistence update, so only changed entries are
+    written. Everything is read once at startup and this process's memory is
+    the source of truth afterwards, so one bot process must own the store,
+    see InstanceLock.
+    """
+    def __init__(self, store: KeyValueStore, update_interval: float = 5, flush_delay: float = 0.5):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.store = store
+        self.flush_delay = flush_delay
+        self.logger = logging.getLogger('telegram_bot')
+        self._dirty: Dict[Tuple[str, str], Optional[str]] = {}
+        # Last user_data value this process read from or wrote to the store, per user, so unchanged data is skipped
+        self._known: Dict[str, str] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _mark_dirty(self, namespace: str, key: str, value: Optional[str]) -> None:
+        self._dirty[(namespace, key)] = value
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_soon())
+
+    async def _flush_soon(self) -> None:
+        # Let the rest of the periodic update mark its keys before writing them together
+        await asyncio.sleep(self.flush_delay)
+        await self._write_dirty()
+
+    async def _write_dirty(self) -> None:
+        if not self._dirty:
+            return
+        batch, self._dirty = self._dirty, {}
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.write_batch, batch)
+        except Exception as e:
+            self.logger.error(f'Failed to persist {len(batch)} entries, will retry: {str(e)}')
+            # Keep newer values marked meanwhile
+            self._dirty = {**batch, **self._dirty}
+
+    async def get_user_data(self) -> Dict[int, Dict]:
+        stored = self.store.get_all(USER_DATA)
+        self._known.update(stored)
+        return {int(user_id): json.loads(value) for user_id, value in stored.items()}
+
+    async def get_chat_data(self) -> Dict[int, Dict]:
+        return {}
+
+    async def get_bot_data(self) -> Dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> Dict:
+        stored = self.store.get_all(f'{CONVERSATIONS}:{name}')
+        return {tuple(json.loads(key)): json.loads(value) for key, value in stored.items()}
+
+    async def update_conversation(self, name: str, key: Tuple, new_state: Optional[object]) -> None:
+        value = None if new_state is None else json.dumps(new_state)
+        self._mark_dirty(f'{CONVERSATIONS}:{name}', json.dumps(list(key)), value)
+
+    def _encode_user_data(self, user_id: int, data: Dict) -> Optional[str]:
+        try:
+            return json.dumps(data, ensure_ascii=False)
+        except TypeError as e:
+            self.logger.error(f'user_data for user {user_id} is not serializable: {str(e)}')
+            return None
+
+    async def update_user_data(self, user_id: int, data: Dict) -> None:
+        value = self._encode_user_data(user_id, data)
+        if value is None:
+            return
+        if self._known.get(str(user_id)) == value:
+            return
+        self._known[str(user_id)] = value
+        self._mark_dirty(USER_DATA, str(user_id), value)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._known.pop(str(user_id), None)
+        self._mark_dirty(USER_DATA, str(user_id), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict) -> None:
+        # No other process writes the store, so memory is never behind it
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: Dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: Dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict) -> None:
+        pass
+
+    async def flush(self) -> None:
+        """Write all pending changes, called by the Application on shutdown"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self._write_dirty()
+        self.logger.info('Persistence flushed')
@@ -5,6 +5,8 @@ from .base import BookingState
 from .location_state import LocationState
 from .pitch_selection_state import PitchSelectionState
 from .time_slot_state import TimeSlotState
+from .search_state import SearchState
+from .search_result_state import SearchResultState
 from .confirmation_state import ConfirmationState
 from .contact_info_state import ContactInfoState
 from .state_manager import StateManager
@@ -14,6 +16,8 @@ __all__ = [
     'LocationState',
     'PitchSelectionState',
     'TimeSlotState',
+    'SearchState',
+    'SearchResultState',
     'ConfirmationState',
     'ContactInfoState',
     'StateManager'
@@ -1,10 +1,100 @@
 # State Pattern - Base State
+import functools
 from abc import ABC, abstractmethod
+from datetime import date
+from typing import Optional
 from telegram import Update
 from telegram.ext import ContextTypes
 
-class BookingState(ABC):
+from ..messaging.outbound_queue import MessagePriority
+from ..metrics.instruments import HANDLER_SECONDS, TELEGRAM_SEND_ERRORS, TELEGRAM_SEND_SECONDS
+from ..metrics.registry import track
+
+STALE_NOTICE = '\n\n⚠️ فيه مشكلة في الاتصال دلوقتي، المواعيد اللي ظاهرة ممكن تكون مش محدثة.'
+
+async def stale_notice(storage) -> str:
+    """Note added under menus while storage answers from memory, empty otherwise"""
+    return STALE_NOTICE if await storage.is_stale() else ''
+
+async def release_held_slot(storage, user_id, user_data) -> None:
+    """Give back the slot held for the user, if any, when the booking is abandoned"""
+    held = user_data.pop('held_slot', None)
+    if held:
+        pitch_name, time_slot, booking_date = held
+        await storage.release_slot(
+            pitch_name, time_slot, user_id, date.fromisoformat(booking_date) if booking_date else None
+        )
+
+def timed_handler(state: str):
+    """Record a handler's latency under a state label
+
+    Handlers catch their own errors to answer the user, so they count them
+    in HANDLER_ERRORS themselves.
+    """
+    def decorate(handle):
+        @functools.wraps(handle)
+        async def wrapper(*args, **kwargs):
+            with track(HANDLER_SECONDS, state=state):
+                return await handle(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class MessageSender:
+    """Sends replies through the outbound queue when one is running"""
+    outbound_queue = None
+
+    async def edit_message(self, query, text: str, reply_markup=None):
+        """Edit the callback query's message, through the outbound queue when it is running"""
+        if self.outbound_queue and self.outbound_queue.running and query.message:
+            return await self.outbound_queue.edit_message_text(
+                query.message.chat_id,
+                query.message.message_id,
+                text,
+                priority=MessagePriority.USER_EDIT,
+                reply_markup=reply_markup
+            )
+        with track(TELEGRAM_SEND_SECONDS, TELEGRAM_SEND_ERRORS, method='edit_message_text'):
+            return await query.edit_message_text(text, reply_markup=reply_markup)
+
+    async def reply(self, update: Update, text: str, reply_markup=None):
+        """Reply in the update's chat, through the outbound queue when it is running"""
+        if self.outbound_queue and self.outbound_queue.running:
+            return await self.outbound_queue.send_message(
+                update.effective_chat.id,
+                text,
+                priority=MessagePriority.USER_MESSAGE,
+                reply_markup=reply_markup
+            )
+        with track(TELEGRAM_SEND_SECONDS, TELEGRAM_SEND_ERRORS, method='send_message'):
+            return await update.message.reply_text(text, reply_markup=reply_markup)
+
+
+class BookingState(MessageSender, ABC):
     """Base State interface for implementing State Pattern"""
+    sheets_facade = None
+    callback_codec = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every concrete step is timed without each state repeating the boilerplate
+        if 'handle' in vars(cls) and not getattr(cls.handle, '__isabstractmethod__', False):
+            cls.handle = timed_handler(cls.__name__)(cls.handle)
+
+    @staticmethod
+    def booking_day(context: ContextTypes.DEFAULT_TYPE) -> Optional[date]:
+        """Day chosen in the date step, None for conversations started before dates existed"""
+        booking_date = context.user_data.get('booking_date')
+        return date.fromisoformat(booking_date) if booking_date else None
+
+    async def decode_callback(self, data: str, kind: str):
+        """Decode callback data of a kind, None if it does not name a catalog entity"""
+        value = self.callback_codec.decode(data, kind)
+        if value is None:
+            # Keyboards sent before a restart carry IDs this process has not seen yet
+            self.callback_codec.register_catalog(await self.sheets_facade.get_pitches())
+            value = self.callback_codec.decode(data, kind)
+        return value
+
     @abstractmethod
     async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,113 @@
+# State Helper - Compact callback data for catalog entities
+import hashlib
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+LOCATION = 'l'
+PITCH = 'p'
+TIME_SLOT = 't'
+DATE = 'd'
+FREE_SLOT = 'f'
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+def to_base36(number: int) -> str:
+    if number == 0:
+        return '0'
+    digits = []
+    while number:
+        number, remainder = divmod(number, 36)
+        digits.append(DIGITS[remainder])
+    return ''.join(reversed(digits))
+
+class CallbackCodec:
+    """Maps locations, pitches and slots to short stable IDs for callback_data
+
+    IDs are derived from a hash of the entity, so every process and every
+    restart assigns the same ID and old keyboards stay valid. Encoded data
+    looks like "p:1x9k2m" and stays far below Telegram's 64-byte limit no
+    matter how long the name is or which characters it contains.
+    """
+    def __init__(self):
+        self._by_id: Dict[Tuple[str, str], str] = {}
+        self._by_value: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def _make_id(self, kind: str, value: str, salt: int) -> str:
+        digest = hashlib.blake2b(f'{kind}:{value}:{salt}'.encode('utf-8'), digest_size=5).digest()
+        return to_base36(int.from_bytes(digest, 'big'))
+
+    def register(self, kind: str, value: str) -> str:
+        """Return the ID of an entity, registering it on first use"""
+        value = str(value)
+        entity_id = self._by_value.get((kind, value))
+        if entity_id is not None:
+            return entity_id
+        with self._lock:
+            salt = 0
+            entity_id = self._make_id(kind, value, salt)
+            # Hash collisions are rare, but must never map two entities to one ID
+            while self._by_id.get((kind, entity_id), value) != value:
+                salt += 1
+                entity_id = self._make_id(kind, value, salt)
+            self._by_id[(kind, entity_id)] = value
+            self._by_value[(kind, value)] = entity_id
+        return entity_id
+
+    def register_catalog(self, records: List[Dict]) -> None:
+        """Register every location, pitch and slot in Pitches records"""
+        for record in records:
+            self.register(LOCATION, record.get('Location', ''))
+            self.register(PITCH, record.get('Pitch Name', ''))
+            for slot in str(record.get('Time Slots', '')).split(','):
+                if slot.strip():
+                    self.register(TIME_SLOT, slot.strip())
+
+    def encode(self, kind: str, value: str) -> str:
+        """Encode an entity as callback data"""
+        return f'{kind}:{self.register(kind, value)}'
+
+    def encode_date(self, day: date) -> str:
+        """Encode a day as callback data, dates need no registry"""
+        return f'{DATE}:{day:%Y%m%d}'
+
+    def decode_date(self, data: str) -> Optional[date]:
+        """Decode callback data made by encode_date, None if it is not a date"""
+        prefix, _, value = data.partition(':')
+        if prefix != DATE:
+            return None
+        try:
+            return datetime.strptime(value, '%Y%m%d').date()
+        except ValueError:
+            return None
+
+    def encode_free_slot(self, location: str, pitch_name: str, day: date, time_slot: str) -> str:
+        """Encode a search result as one callback, e.g. "f:<location>:<pitch>:20240503:<slot>" """
+        return (
+            f'{FREE_SLOT}:{self.register(LOCATION, location)}:{self.register(PITCH, pitch_name)}:'
+            f'{day:%Y%m%d}:{self.register(TIME_SLOT, time_slot)}'
+        )
+
+    def decode_free_slot(self, data: str) -> Optional[Tuple[str, str, date, str]]:
+        """Decode callback data made by encode_free_slot into (location, pitch, day, slot)"""
+        parts = data.split(':')
+        if len(parts) != 5 or parts[0] != FREE_SLOT:
+            return None
+        _, location_id, pitch_id, day, slot_id = parts
+        location = self._by_id.get((LOCATION, location_id))
+        pitch_name = self._by_id.get((PITCH, pitch_id))
+        time_slot = self._by_id.get((TIME_SLOT, slot_id))
+        if location is None or pitch_name is None or time_slot is None:
+            return None
+        try:
+            return location, pitch_name, datetime.strptime(day, '%Y%m%d').date(), time_slot
+        except ValueError:
+            return None
+
+    def decode(self, data: str, kind: str) -> Optional[str]:
+        """Decode callback data of the expected kind, None if it is unknown"""
+        prefix, _, entity_id = data.partition(':')
+        if prefix != kind:
+            return None
+        return self._by_id.get((kind, entity_id))
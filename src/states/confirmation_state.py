@@ -3,13 +3,18 @@ import logging
 import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from .base import BookingState
+from .base import BookingState, release_held_slot
+from .keyboards import format_slot
+from ..facades.slot_calendar import day_cutoff
+from ..metrics.instruments import HANDLER_ERRORS
 
 class ConfirmationState(BookingState):
     """State for handling booking confirmation"""
-    def __init__(self, sheets_facade, notification_manager):
+    def __init__(self, sheets_facade, notification_manager, outbound_queue=None, timezone=None):
         self.sheets_facade = sheets_facade
         self.notification_manager = notification_manager
+        self.outbound_queue = outbound_queue
+        self.timezone = timezone
         self.logger = logging.getLogger('telegram_bot')
 
     async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -17,26 +22,22 @@ class ConfirmationState(BookingState):
             query = update.callback_query
             await query.answer()
             
-            if query.data == "cancel":
-                await query.edit_message_text('تم الغاء العملية. أرسل /start للبدء من جديد.')
-                return ConversationHandler.END
-            
-            # Extract confirmation from callback data
-            confirmation = query.data.split(':')[1]
-            
-            if confirmation != "yes":
-                await query.edit_message_text('تم الغاء العملية. أرسل /start للبدء من جديد.')
-                return ConversationHandler.END
-            
             # Get booking details from context
             pitch_name = context.user_data.get('pitch_name', 'Unknown')
             time_slot = context.user_data.get('time_slot', 'Unknown')
             location = context.user_data.get('location', 'Unknown')
+            day = self.booking_day(context)
+            
+            if query.data != "confirm:yes":
+                await release_held_slot(self.sheets_facade, query.from_user.id, context.user_data)
+                await self.edit_message(query, 'تم الغاء العملية. أرسل /start للبدء من جديد.')
+                return ConversationHandler.END
             
-            # Double-check availability
-            if not self.sheets_facade.is_slot_available(pitch_name, time_slot):
-                await query.edit_message_text(
-                    f"للأسف الوقت اللي انت اخترته {time_slot} للملعب {pitch_name}.\n"
+            # Refresh the hold taken when the slot was selected, fails if another user took it or it started meanwhile
+            not_before = day_cutoff(day, self.timezone)
+            if not await self.sheets_facade.hold_slot(pitch_name, time_slot, query.from_user.id, day, not_before):
+                await self.edit_message(query,
+                    f"للأسف الوقت اللي انت اخترته {format_slot(time_slot, day)} للملعب {pitch_name}.\n"
                     f"غير متوفر حاليا.\n"
                     f"جرب تختار معاد تاني.",
                 )
@@ -44,16 +45,17 @@ class ConfirmationState(BookingState):
                 return ConversationHandler.END
             
             # Ask for contact information
-            await query.edit_message_text(
+            await self.edit_message(query,
                 f"انت حاليا عايز تحجز ملعب {pitch_name}.\n\n"
-                f"في {location} في وقت {time_slot}.\n\n"
+                f"في {location} في وقت {format_slot(time_slot, day)}.\n\n"
                 f"الرجاء إدخال الاسم بالكامل للاتمام عملية الحجز:"
             )
             
             self.logger.info(f'User {query.from_user.id} confirmed booking')
             return 4  # CONTACT_INFO state
         except Exception as e:
+            HANDLER_ERRORS.inc(state=type(self).__name__)
             user_id = update.callback_query.from_user.id if update.callback_query else 'Unknown'
             self.logger.error(f'Error in handle_confirmation for user {user_id}: {str(e)}')
-            await update.callback_query.edit_message_text('An error occurred while processing your request.')
+            await self.edit_message(update.callback_query, 'An error occurred while processing your request.')
             return ConversationHandler.END
\ No newline at end of file
@@ -3,6 +3,7 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from .base import BookingState
+from ..metrics.instruments import HANDLER_ERRORS
 from ..observers.booking_event import BookingEvent
 
 # Define state constants
@@ -10,9 +11,10 @@ NAME, PHONE = range(4, 6)  # Continue from previous states
 
 class ContactInfoState(BookingState):
     """State for handling contact information collection"""
-    def __init__(self, sheets_facade, notification_manager):
+    def __init__(self, sheets_facade, notification_manager, outbound_queue=None):
         self.sheets_facade = sheets_facade
         self.notification_manager = notification_manager
+        self.outbound_queue = outbound_queue
         self.logger = logging.getLogger('telegram_bot')
     
     async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -23,7 +25,7 @@ class ContactInfoState(BookingState):
             # If this is the first message (name), store it and ask for phone number
             if 'user_name' not in context.user_data:
                 context.user_data['user_name'] = message_text
-                await update.message.reply_text(
+                await self.reply(update,
                     f"شكرا ليك, {message_text}.\n\n"
                     f"الآن برجاء إدخال رقم تلفونك:"
                 )
@@ -35,17 +37,18 @@ class ContactInfoState(BookingState):
             user_name = context.user_data['user_name']
             
             # Add booking to the sheet
-            success = self.sheets_facade.add_booking(
+            success = await self.sheets_facade.add_booking(
                 user_id=user.id,
                 user_name=user_name,
                 phone_number=phone_number,
                 pitch_name=context.user_data['pitch_name'],
                 time_slot=context.user_data['time_slot'],
-                status='Booked'
+                status='Booked',
+                day=self.booking_day(context)
             )
 
             if not success:
-                    await update.message.reply_text(
+                    await self.reply(update,
                         "للأسف حصل عطل اثناء اتمام العملية. حاول مرة تانية."
                     )
                     self.logger.error(f'Failed to add booking for user {user.id}')
@@ -58,20 +61,23 @@ class ContactInfoState(BookingState):
                 phone_number=phone_number,
                 pitch_name=context.user_data['pitch_name'],
                 time_slot=context.user_data['time_slot'],
-                location=context.user_data['location']
+                location=context.user_data['location'],
+                booking_date=context.user_data.get('booking_date')
             )
 
-            # Notify observers about the booking
-            self.logger.info(f'Notifying observers about booking for user {user.id}')
+            # The hold became the booking
+            context.user_data.pop('held_slot', None)
 
-            # Assuming notification_manager.notify is an async method that sends notifications via emai
-            await self.notification_manager.notify(booking_event, context)  
+            # Notify observers about the booking in the background
+            self.logger.info(f'Notifying observers about booking for user {user.id}')
+            self.notification_manager.dispatch(booking_event, context)
             
             self.logger.info(f'User {user.id} successfully completed booking with contact info')
             return ConversationHandler.END
 
         except Exception as e:
+            HANDLER_ERRORS.inc(state=type(self).__name__)
             user_id = update.effective_user.id
             self.logger.error(f'Error in handle_contact_info for user {user_id}: {str(e)}')
-            await update.message.reply_text('An error occurred while processing your request.')
+            await self.reply(update, 'An error occurred while processing your request.')
             return ConversationHandler.END
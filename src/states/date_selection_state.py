@@ -0,0 +1,86 @@
+# State Pattern - Date Selection State
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes, ConversationHandler
+from .base import BookingState, release_held_slot, stale_notice
+from .keyboards import KeyboardCache, build_two_column_keyboard, format_day
+from .callback_codec import CallbackCodec, TIME_SLOT
+from ..facades.slot_calendar import day_cutoff, upcoming_days
+from ..metrics.instruments import HANDLER_ERRORS
+
+class DateSelectionState(BookingState):
+    """State for handling booking date selection"""
+    def __init__(self, sheets_facade, outbound_queue=None, keyboard_cache=None, callback_codec=None,
+                 days_ahead: int = 7, timezone=None):
+        self.sheets_facade = sheets_facade
+        self.outbound_queue = outbound_queue
+        self.keyboard_cache = keyboard_cache or KeyboardCache()
+        self.callback_codec = callback_codec or CallbackCodec()
+        self.days_ahead = days_ahead
+        self.timezone = timezone
+        self.logger = logging.getLogger('telegram_bot')
+
+    async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        try:
+            query = update.callback_query
+            await query.answer()
+            
+            if query.data == "cancel":
+                await release_held_slot(self.sheets_facade, query.from_user.id, context.user_data)
+                await self.edit_message(query, 'تم الغاء العملية. أرسل /start للبدء من جديد.')
+                return ConversationHandler.END
+            
+            # Extract the day from callback data, days that have passed are no longer bookable
+            day = self.callback_codec.decode_date(query.data)
+            if day is None or day not in upcoming_days(self.days_ahead, self.timezone):
+                await self.edit_message(query, 'القائمة دي قديمة. أرسل /start للبدء من جديد.')
+                self.logger.warning(f'User {query.from_user.id} sent unknown or past date: {query.data}')
+                return ConversationHandler.END
+            context.user_data['booking_date'] = day.isoformat()
+            pitch_name = context.user_data.get('pitch_name', 'Unknown')
+            
+            # Reuse the time slot keyboard while neither the catalog nor the pitch's bookings changed,
+            # slots that have already started today are left out, so today's keyboard is rebuilt every minute
+            not_before = day_cutoff(day, self.timezone)
+            version = (
+                await self.sheets_facade.catalog_version(),
+                await self.sheets_facade.booking_version(pitch_name),
+                not_before
+            )
+            cache_key = ('time_slots', pitch_name, day)
+            reply_markup = self.keyboard_cache.get(cache_key, version)
+            
+            if reply_markup is None:
+                # Get the slots still free on that day
+                time_slots = await self.sheets_facade.get_available_time_slots(pitch_name, day, not_before)
+                
+                if not time_slots:
+                    await self.edit_message(query,
+                        f"للأسف مفيش ساعات متاحة في ملعب {pitch_name} يوم {format_day(day)}.\n\n"
+                        f"ممكن تجرب يوم تاني او تشوف ملعب تاني."
+                    )
+                    self.logger.warning(f'User {query.from_user.id} selected a fully booked day: {day} for {pitch_name}')
+                    return ConversationHandler.END
+                
+                # Create inline keyboard with time slot buttons
+                reply_markup = self.keyboard_cache.put(
+                    cache_key, version,
+                    build_two_column_keyboard(time_slots, TIME_SLOT, self.callback_codec)
+                )
+            
+            await self.edit_message(query,
+                f"انت اخترت يوم {format_day(day)}.\n\n"
+                f"في ملعب {pitch_name}.\n\n"
+                "برجاء اختيار وقت الحجز المناسب: "
+                f"{await stale_notice(self.sheets_facade)}",
+                reply_markup=reply_markup
+            )
+            
+            self.logger.info(f'User {query.from_user.id} selected date: {day}')
+            return 2  # TIMESLOT state
+        except Exception as e:
+            HANDLER_ERRORS.inc(state=type(self).__name__)
+            user_id = update.callback_query.from_user.id if update.callback_query else 'Unknown'
+            self.logger.error(f'Error in handle_date_selection for user {user_id}: {str(e)}')
+            await self.edit_message(update.callback_query, 'An error occurred while processing your request.')
+            return ConversationHandler.END
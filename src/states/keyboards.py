@@ -0,0 +1,105 @@
+# State Helper - Inline keyboards and their versioned cache
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from .callback_codec import CallbackCodec
+from ..facades.slot_calendar import FreeSlot
+
+CANCEL_BUTTON = InlineKeyboardButton("الغاء العملية", callback_data="cancel")
+SEARCH_ALL = "search"
+SEARCH_LOCATION = "search:here"
+SEARCH_ALL_BUTTON = InlineKeyboardButton("🔎 أقرب معاد فاضي", callback_data=SEARCH_ALL)
+SEARCH_LOCATION_BUTTON = InlineKeyboardButton("🔎 أقرب معاد فاضي في المنطقة دي", callback_data=SEARCH_LOCATION)
+
+def build_two_column_keyboard(labels: List[str], kind: str, codec: CallbackCodec,
+                              with_cancel: bool = True, search_button: Optional[InlineKeyboardButton] = None
+                              ) -> InlineKeyboardMarkup:
+    """Build a keyboard with two buttons per row, labels encoded as entities of a kind, then optional search and cancel rows"""
+    keyboard = []
+    for i in range(0, len(labels), 2):  # 2 buttons per row
+        keyboard.append([
+            InlineKeyboardButton(label, callback_data=codec.encode(kind, label))
+            for label in labels[i:i + 2]
+        ])
+    if search_button:
+        keyboard.append([search_button])
+    if with_cancel:
+        keyboard.append([CANCEL_BUTTON])
+    return InlineKeyboardMarkup(keyboard)
+
+WEEKDAYS = ['الاثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة', 'السبت', 'الأحد']
+
+def format_day(day: date) -> str:
+    """Day label shown to users, e.g. 'السبت 18/5'"""
+    return f"{WEEKDAYS[day.weekday()]} {day.day}/{day.month}"
+
+def format_slot(time_slot: str, day: Optional[date] = None) -> str:
+    """Slot label shown to users, with its day when the booking has one"""
+    return f"{time_slot} يوم {format_day(day)}" if day else time_slot
+
+def build_date_keyboard(days: List[date], codec: CallbackCodec) -> InlineKeyboardMarkup:
+    """Build a keyboard with two days per row and a cancel row"""
+    keyboard = []
+    for i in range(0, len(days), 2):  # 2 buttons per row
+        keyboard.append([
+            InlineKeyboardButton(format_day(day), callback_data=codec.encode_date(day))
+            for day in days[i:i + 2]
+        ])
+    keyboard.append([CANCEL_BUTTON])
+    return InlineKeyboardMarkup(keyboard)
+
+def build_free_slot_keyboard(free_slots: List[FreeSlot], codec: CallbackCodec,
+                             with_location: bool = True) -> InlineKeyboardMarkup:
+    """Build a keyboard with one search result per row and a cancel row"""
+    keyboard = []
+    for free_slot in free_slots:
+        label = f"{format_day(free_slot.day)} {free_slot.time_slot} - {free_slot.pitch_name}"
+        if with_location:
+            label += f" ({free_slot.location})"
+        keyboard.append([InlineKeyboardButton(label, callback_data=codec.encode_free_slot(
+            free_slot.location, free_slot.pitch_name, free_slot.day, free_slot.time_slot
+        ))])
+    keyboard.append([CANCEL_BUTTON])
+    return InlineKeyboardMarkup(keyboard)
+
+class KeyboardCache:
+    """Prebuilt keyboards keyed by menu, valid only for the data version they were built from"""
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, InlineKeyboardMarkup]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[InlineKeyboardMarkup]:
+        """Return the cached keyboard if it was built for this version"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: Hashable, markup: InlineKeyboardMarkup) -> InlineKeyboardMarkup:
+        """Store a keyboard built for a version, evicting the least recently used one when full"""
+        with self._lock:
+            self._entries[key] = (version, markup)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return markup
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
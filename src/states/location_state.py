@@ -1,13 +1,19 @@
 # State Pattern - Location State
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from .base import BookingState
+from .base import BookingState, stale_notice
+from ..metrics.instruments import HANDLER_ERRORS
+from .keyboards import SEARCH_LOCATION_BUTTON, KeyboardCache, build_two_column_keyboard
+from .callback_codec import CallbackCodec, LOCATION, PITCH
 
 class LocationState(BookingState):
     """State for handling location selection"""
-    def __init__(self, sheets_facade):
+    def __init__(self, sheets_facade, outbound_queue=None, keyboard_cache=None, callback_codec=None):
         self.sheets_facade = sheets_facade
+        self.outbound_queue = outbound_queue
+        self.keyboard_cache = keyboard_cache or KeyboardCache()
+        self.callback_codec = callback_codec or CallbackCodec()
         self.logger = logging.getLogger('telegram_bot')
 
     async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -16,44 +22,50 @@ class LocationState(BookingState):
             await query.answer()
             
             # Extract location from callback data
-            location = query.data.split(':')[1]
+            location = await self.decode_callback(query.data, LOCATION)
+            if location is None:
+                await self.edit_message(query, 'القائمة دي قديمة. أرسل /start للبدء من جديد.')
+                self.logger.warning(f'User {query.from_user.id} sent unknown callback data: {query.data}')
+                return ConversationHandler.END
             context.user_data['location'] = location
             
-            # Get available pitches for this location
-            location_pitches = self.sheets_facade.get_pitches_by_location(location)
+            # Reuse the pitch keyboard while the catalog is unchanged
+            catalog_version = await self.sheets_facade.catalog_version()
+            reply_markup = self.keyboard_cache.get(('pitches', location), catalog_version)
             
-            if not location_pitches:
-                await query.edit_message_text(
-                    f"مفيش ملاعب لسة في منطقة {location}.\n"
-                    f"هنضيف ملاعب فالمستقبل ان شاء الله.\n"
-                    f"دلوقتي تقدر تجرب منطقة تانية."
+            if reply_markup is None:
+                # Get available pitches for this location
+                location_pitches = await self.sheets_facade.get_pitches_by_location(location)
+                
+                if not location_pitches:
+                    await self.edit_message(query,
+                        f"مفيش ملاعب لسة في منطقة {location}.\n"
+                        f"هنضيف ملاعب فالمستقبل ان شاء الله.\n"
+                        f"دلوقتي تقدر تجرب منطقة تانية."
+                    )
+                    self.logger.warning(f'User {query.from_user.id} selected location with no pitches: {location}')
+                    return ConversationHandler.END
+                
+                # Create inline keyboard with pitch buttons
+                pitch_names = sorted([pitch['Pitch Name'] for pitch in location_pitches])
+                reply_markup = self.keyboard_cache.put(
+                    ('pitches', location), catalog_version,
+                    build_two_column_keyboard(
+                        pitch_names, PITCH, self.callback_codec, search_button=SEARCH_LOCATION_BUTTON
+                    )
                 )
-                self.logger.warning(f'User {query.from_user.id} selected location with no pitches: {location}')
-                return ConversationHandler.END
-            
-            # Create inline keyboard with pitch buttons
-            keyboard = []
-            pitch_names = sorted([pitch['Pitch Name'] for pitch in location_pitches])
-            for i in range(0, len(pitch_names), 2):  # 2 buttons per row
-                row = []
-                row.append(InlineKeyboardButton(pitch_names[i], callback_data=f"pitch:{pitch_names[i]}"))
-                if i + 1 < len(pitch_names):
-                    row.append(InlineKeyboardButton(pitch_names[i+1], callback_data=f"pitch:{pitch_names[i+1]}"))
-                keyboard.append(row)
-            
-            # Add cancel button
-            keyboard.append([InlineKeyboardButton("الغاء العملية", callback_data="cancel")])
-            reply_markup = InlineKeyboardMarkup(keyboard)
             
-            await query.edit_message_text(
-                f"انت اخترت منطقة {location}.\n\nبرجاء اختيار الملعب: ",
+            await self.edit_message(query,
+                f"انت اخترت منطقة {location}.\n\nبرجاء اختيار الملعب: "
+                f"{await stale_notice(self.sheets_facade)}",
                 reply_markup=reply_markup
             )
             
             self.logger.info(f'User {query.from_user.id} selected location: {location}')
             return 1  # PITCH_SELECTION state
         except Exception as e:
+            HANDLER_ERRORS.inc(state=type(self).__name__)
             user_id = update.callback_query.from_user.id if update.callback_query else 'Unknown'
             self.logger.error(f'Error in handle_location for user {user_id}: {str(e)}')
-            await update.callback_query.edit_message_text('An error occurred while processing your request.')
+            await self.edit_message(update.callback_query, 'An error occurred while processing your request.')
             return ConversationHandler.END
\ No newline at end of file
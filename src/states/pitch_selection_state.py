@@ -1,13 +1,25 @@
 # State Pattern - Pitch Selection State
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from .base import BookingState
+from .base import BookingState, release_held_slot, stale_notice
+from .keyboards import KeyboardCache, build_date_keyboard
+from .callback_codec import CallbackCodec, PITCH
+from ..facades.slot_calendar import current_minute, upcoming_days
+from ..metrics.instruments import HANDLER_ERRORS
+
+DATE_SELECTION = 6  # Added after the original states so persisted conversations keep their numbers
 
 class PitchSelectionState(BookingState):
     """State for handling pitch selection"""
-    def __init__(self, sheets_facade):
+    def __init__(self, sheets_facade, outbound_queue=None, keyboard_cache=None, callback_codec=None,
+                 days_ahead: int = 7, timezone=None):
         self.sheets_facade = sheets_facade
+        self.outbound_queue = outbound_queue
+        self.keyboard_cache = keyboard_cache or KeyboardCache()
+        self.callback_codec = callback_codec or CallbackCodec()
+        self.days_ahead = days_ahead
+        self.timezone = timezone
         self.logger = logging.getLogger('telegram_bot')
 
     async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -16,50 +28,62 @@ class PitchSelectionState(BookingState):
             await query.answer()
             
             if query.data == "cancel":
-                await query.edit_message_text('تم الغاء العملية. أرسل /start للبدء من جديد.')
+                await release_held_slot(self.sheets_facade, query.from_user.id, context.user_data)
+                await self.edit_message(query, 'تم الغاء العملية. أرسل /start للبدء من جديد.')
                 return ConversationHandler.END
             
             # Extract pitch name from callback data
-            pitch_name = query.data.split(':')[1]
+            pitch_name = await self.decode_callback(query.data, PITCH)
+            if pitch_name is None:
+                await self.edit_message(query, 'القائمة دي قديمة. أرسل /start للبدء من جديد.')
+                self.logger.warning(f'User {query.from_user.id} sent unknown callback data: {query.data}')
+                return ConversationHandler.END
             context.user_data['pitch_name'] = pitch_name
             location = context.user_data.get('location', 'Unknown')
             
-            # Get available time slots for this pitch
-            time_slots = self.sheets_facade.get_available_time_slots(pitch_name)
+            # Reuse the date keyboard while neither the catalog, the pitch's bookings nor the minute changed,
+            # today is only offered while one of its free slots has not started
+            days = upcoming_days(self.days_ahead, self.timezone)
+            not_before = current_minute(self.timezone)
+            version = (
+                await self.sheets_facade.catalog_version(),
+                await self.sheets_facade.booking_version(pitch_name),
+                not_before
+            )
+            cache_key = ('dates', pitch_name, days[0])
+            reply_markup = self.keyboard_cache.get(cache_key, version)
             
-            if not time_slots:
-                await query.edit_message_text(
-                    f"حاليا مفيش ساعات متاحة في ملعب {pitch_name}.\n\n"
-                    f"ممكن تجرب في وقت تاني او تشوف ملعب تاني."
+            if reply_markup is None:
+                # Only offer days that still have a free slot
+                free_days = await self.sheets_facade.get_available_days(pitch_name, days, not_before)
+                
+                if not free_days:
+                    await self.edit_message(query,
+                        f"حاليا مفيش ساعات متاحة في ملعب {pitch_name}.\n\n"
+                        f"ممكن تجرب في وقت تاني او تشوف ملعب تاني."
+                    )
+                    self.logger.warning(f'User {query.from_user.id} selected pitch with no available slots: {pitch_name}')
+                    return ConversationHandler.END
+                
+                # Create inline keyboard with date buttons
+                reply_markup = self.keyboard_cache.put(
+                    cache_key, version,
+                    build_date_keyboard(free_days, self.callback_codec)
                 )
-                self.logger.warning(f'User {query.from_user.id} selected pitch with no available slots: {pitch_name}')
-                return ConversationHandler.END
-            
-            # Create inline keyboard with time slot buttons
-            keyboard = []
-            for i in range(0, len(time_slots), 2):  # 2 buttons per row
-                row = []
-                row.append(InlineKeyboardButton(time_slots[i], callback_data=f"time:{time_slots[i]}"))
-                # Check if there's a second slot in this row before adding it
-                if i + 1 < len(time_slots):
-                    row.append(InlineKeyboardButton(time_slots[i+1], callback_data=f"time:{time_slots[i+1]}"))
-                keyboard.append(row)
-            
-            # Add cancel button
-            keyboard.append([InlineKeyboardButton("الغاء العملية", callback_data="cancel")])
-            reply_markup = InlineKeyboardMarkup(keyboard)
             
-            await query.edit_message_text(
+            await self.edit_message(query,
                 f"انت اخترت ملعب {pitch_name}.\n\n"
                 f"في منطقة {location}.\n\n"
-                "برجاء اختيار وقت الحجز المناسب: ",
+                "برجاء اختيار اليوم: "
+                f"{await stale_notice(self.sheets_facade)}",
                 reply_markup=reply_markup
             )
             
             self.logger.info(f'User {query.from_user.id} selected pitch: {pitch_name}')
-            return 2  # TIMESLOT state
+            return DATE_SELECTION
         except Exception as e:
+            HANDLER_ERRORS.inc(state=type(self).__name__)
             user_id = update.callback_query.from_user.id if update.callback_query else 'Unknown'
             self.logger.error(f'Error in handle_pitch_selection for user {user_id}: {str(e)}')
-            await update.callback_query.edit_message_text('An error occurred while processing your request.')
-            return ConversationHandler.END
\ No newline at end of file
+            await self.edit_message(update.callback_query, 'An error occurred while processing your request.')
+            return ConversationHandler.END
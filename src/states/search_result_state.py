@@ -0,0 +1,46 @@
+# State Pattern - Search Result State
+from telegram import Update
+from telegram.ext import ContextTypes, ConversationHandler
+from .base import release_held_slot
+from .time_slot_state import TimeSlotState
+from ..facades.slot_calendar import upcoming_days
+from ..metrics.instruments import HANDLER_ERRORS
+
+class SearchResultState(TimeSlotState):
+    """State for handling the choice of a search result, which names the pitch, day and slot at once"""
+    def __init__(self, sheets_facade, outbound_queue=None, callback_codec=None, days_ahead: int = 7, timezone=None):
+        super().__init__(sheets_facade, outbound_queue, callback_codec, timezone)
+        self.days_ahead = days_ahead
+
+    async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        try:
+            query = update.callback_query
+            await query.answer()
+
+            if query.data == "cancel":
+                await release_held_slot(self.sheets_facade, query.from_user.id, context.user_data)
+                await self.edit_message(query, 'تم الغاء العملية. أرسل /start للبدء من جديد.')
+                return ConversationHandler.END
+
+            # Extract location, pitch, day and slot from callback data
+            choice = self.callback_codec.decode_free_slot(query.data)
+            if choice is None:
+                # Keyboards sent before a restart carry IDs this process has not seen yet
+                self.callback_codec.register_catalog(await self.sheets_facade.get_pitches())
+                choice = self.callback_codec.decode_free_slot(query.data)
+            if choice is None or choice[2] not in upcoming_days(self.days_ahead, self.timezone):
+                await self.edit_message(query, 'القائمة دي قديمة. أرسل /start للبدء من جديد.')
+                self.logger.warning(f'User {query.from_user.id} sent unknown or past search result: {query.data}')
+                return ConversationHandler.END
+
+            location, pitch_name, day, time_slot = choice
+            context.user_data['location'] = location
+            context.user_data['pitch_name'] = pitch_name
+            context.user_data['booking_date'] = day.isoformat()
+            return await self.offer_slot(query, context, time_slot)
+        except Exception as e:
+            HANDLER_ERRORS.inc(state=type(self).__name__)
+            user_id = update.callback_query.from_user.id if update.callback_query else 'Unknown'
+            self.logger.error(f'Error in handle_search_result for user {user_id}: {str(e)}')
+            await self.edit_message(update.callback_query, 'An error occurred while processing your request.')
+            return ConversationHandler.END
@@ -0,0 +1,72 @@
+# State Pattern - Free Slot Search State
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes, ConversationHandler
+from .base import BookingState, stale_notice
+from .keyboards import SEARCH_LOCATION, build_free_slot_keyboard
+from .callback_codec import CallbackCodec
+from ..facades.slot_calendar import current_minute, upcoming_days
+from ..metrics.instruments import HANDLER_ERRORS
+
+SEARCH_RESULTS = 7  # Added after the original states so persisted conversations keep their numbers
+
+class SearchState(BookingState):
+    """State for finding the earliest free slots across pitches"""
+    def __init__(self, sheets_facade, outbound_queue=None, callback_codec=None,
+                 days_ahead: int = 7, timezone=None, limit: int = 8):
+        self.sheets_facade = sheets_facade
+        self.outbound_queue = outbound_queue
+        self.callback_codec = callback_codec or CallbackCodec()
+        self.days_ahead = days_ahead
+        self.timezone = timezone
+        self.limit = limit
+        self.logger = logging.getLogger('telegram_bot')
+
+    async def _send(self, update: Update, text: str, reply_markup=None):
+        """Edit the menu the search was started from, or reply to the /next command"""
+        if update.callback_query:
+            return await self.edit_message(update.callback_query, text, reply_markup=reply_markup)
+        return await self.reply(update, text, reply_markup=reply_markup)
+
+    async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        try:
+            user = update.effective_user
+            location = None
+            query = update.callback_query
+            if query:
+                await query.answer()
+                # The button under the pitch menu searches the location already chosen
+                if query.data == SEARCH_LOCATION:
+                    location = context.user_data.get('location')
+
+            # One scan of every pitch's free bitmaps, skipping today's slots that have started
+            days = upcoming_days(self.days_ahead, self.timezone)
+            free_slots = await self.sheets_facade.find_free_slots(
+                days, self.limit, location, current_minute(self.timezone)
+            )
+
+            area = f" في منطقة {location}" if location else ""
+            if not free_slots:
+                await self._send(update,
+                    f"للأسف مفيش مواعيد فاضية في الأيام الجاية{area}.\n\n"
+                    f"ممكن تجرب في وقت تاني."
+                )
+                self.logger.warning(f'User {user.id} found no free slots, location: {location}')
+                return ConversationHandler.END
+
+            reply_markup = build_free_slot_keyboard(free_slots, self.callback_codec, with_location=location is None)
+            await self._send(update,
+                f"أقرب المواعيد الفاضية{area}:\n\n"
+                "برجاء اختيار المعاد المناسب: "
+                f"{await stale_notice(self.sheets_facade)}",
+                reply_markup=reply_markup
+            )
+
+            self.logger.info(f'User {user.id} searched free slots, location: {location}, results: {len(free_slots)}')
+            return SEARCH_RESULTS
+        except Exception as e:
+            HANDLER_ERRORS.inc(state=type(self).__name__)
+            user_id = update.effective_user.id if update.effective_user else 'Unknown'
+            self.logger.error(f'Error in handle_search for user {user_id}: {str(e)}')
+            await self._send(update, 'An error occurred while processing your request.')
+            return ConversationHandler.END
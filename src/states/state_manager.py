@@ -1,64 +1,92 @@
 # State Pattern - State Manager
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 
 from .location_state import LocationState
 from .pitch_selection_state import PitchSelectionState
+from .date_selection_state import DateSelectionState
 from .time_slot_state import TimeSlotState
+from .search_state import SearchState
+from .search_result_state import SearchResultState
 from .confirmation_state import ConfirmationState
 from .contact_info_state import ContactInfoState, NAME, PHONE
+from .base import MessageSender, stale_notice, timed_handler
+from .keyboards import SEARCH_ALL_BUTTON, KeyboardCache, build_two_column_keyboard
+from .callback_codec import CallbackCodec, LOCATION
 from ..observers.notification_manager import NotificationManager
+from ..metrics.instruments import HANDLER_ERRORS
 
-class StateManager:
+class StateManager(MessageSender):
     """Manages the different states of the booking conversation"""
-    def __init__(self, sheets_facade, notification_manager):
+    def __init__(self, sheets_facade, notification_manager, outbound_queue=None, days_ahead: int = 7, timezone=None,
+                 search_limit: int = 8):
         self.sheets_facade = sheets_facade
         self.notification_manager = notification_manager
+        self.outbound_queue = outbound_queue
+        self.keyboard_cache = KeyboardCache()
+        self.callback_codec = CallbackCodec()
         self.logger = logging.getLogger('telegram_bot')
         
         # Initialize states
-        self.location_state = LocationState(sheets_facade)
-        self.pitch_selection_state = PitchSelectionState(sheets_facade)
-        self.time_slot_state = TimeSlotState(sheets_facade)
-        self.confirmation_state = ConfirmationState(sheets_facade, notification_manager)
-        self.contact_info_state = ContactInfoState(sheets_facade, notification_manager)
+        self.location_state = LocationState(sheets_facade, outbound_queue, self.keyboard_cache, self.callback_codec)
+        self.pitch_selection_state = PitchSelectionState(
+            sheets_facade, outbound_queue, self.keyboard_cache, self.callback_codec, days_ahead, timezone
+        )
+        self.date_selection_state = DateSelectionState(
+            sheets_facade, outbound_queue, self.keyboard_cache, self.callback_codec, days_ahead, timezone
+        )
+        self.time_slot_state = TimeSlotState(sheets_facade, outbound_queue, self.callback_codec, timezone)
+        self.search_state = SearchState(
+            sheets_facade, outbound_queue, self.callback_codec, days_ahead, timezone, search_limit
+        )
+        self.search_result_state = SearchResultState(
+            sheets_facade, outbound_queue, self.callback_codec, days_ahead, timezone
+        )
+        self.confirmation_state = ConfirmationState(sheets_facade, notification_manager, outbound_queue, timezone)
+        self.contact_info_state = ContactInfoState(sheets_facade, notification_manager, outbound_queue)
     
+    @timed_handler('StartBooking')
     async def start_booking(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         try:
             user = update.effective_user
             welcome_message = f'أهلا بيك يا {user.first_name}!.\n\n أنا E7gz بوت حجز الملاعب!'
             
-            # Get unique locations from the Pitches sheet
-            locations = self.sheets_facade.get_unique_locations()
+            # Reuse the location keyboard while the catalog is unchanged
+            catalog_version = await self.sheets_facade.catalog_version()
+            reply_markup = self.keyboard_cache.get(('locations',), catalog_version)
             
-            if not locations:
-                await update.message.reply_text(
-                    f"للأسف مفيش مناطق متاح فيها ملاعب حاليا ,قريبا ان شاء الله هنبدأ نضيف ملاعب جديدة"
+            if reply_markup is None:
+                # Get unique locations from the Pitches sheet
+                locations = await self.sheets_facade.get_unique_locations()
+                
+                if not locations:
+                    await self.reply(update,
+                        f"للأسف مفيش مناطق متاح فيها ملاعب حاليا ,قريبا ان شاء الله هنبدأ نضيف ملاعب جديدة"
+                    )
+                    self.logger.warning(f'User {user.id} attempted to book but no locations available')
+                    return ConversationHandler.END
+                
+                # Create inline keyboard with location buttons
+                reply_markup = self.keyboard_cache.put(
+                    ('locations',), catalog_version,
+                    build_two_column_keyboard(
+                        locations, LOCATION, self.callback_codec,
+                        with_cancel=False, search_button=SEARCH_ALL_BUTTON
+                    )
                 )
-                self.logger.warning(f'User {user.id} attempted to book but no locations available')
-                return ConversationHandler.END
             
-            # Create inline keyboard with location buttons
-            keyboard = []
-            for i in range(0, len(locations), 2):  # 2 buttons per row
-                row = []
-                row.append(InlineKeyboardButton(locations[i], callback_data=f"location:{locations[i]}"))
-                if i + 1 < len(locations):
-                    row.append(InlineKeyboardButton(locations[i+1], callback_data=f"location:{locations[i+1]}"))
-                keyboard.append(row)
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await update.message.reply_text(
+            await self.reply(update,
                 f"{welcome_message}\n\n"
-                "أيه المنطقة اللي حابب تحجز فيها:",
+                "أيه المنطقة اللي حابب تحجز فيها:"
+                f"{await stale_notice(self.sheets_facade)}",
                 reply_markup=reply_markup
             )
             
             self.logger.info(f'Start command used by user {user.id}')
             return 0  # LOCATION state
         except Exception as e:
+            HANDLER_ERRORS.inc(state='StartBooking')
             self.logger.error(f'Error in start command: {str(e)}')
-            await update.message.reply_text('An error occurred while processing your request.')
+            await self.reply(update, 'An error occurred while processing your request.')
             return ConversationHandler.END
\ No newline at end of file
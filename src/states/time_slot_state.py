@@ -2,12 +2,19 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from .base import BookingState
+from .base import BookingState, release_held_slot
+from ..metrics.instruments import HANDLER_ERRORS
+from .callback_codec import CallbackCodec, TIME_SLOT
+from .keyboards import format_slot
+from ..facades.slot_calendar import day_cutoff
 
 class TimeSlotState(BookingState):
     """State for handling time slot selection"""
-    def __init__(self, sheets_facade):
+    def __init__(self, sheets_facade, outbound_queue=None, callback_codec=None, timezone=None):
         self.sheets_facade = sheets_facade
+        self.outbound_queue = outbound_queue
+        self.callback_codec = callback_codec or CallbackCodec()
+        self.timezone = timezone
         self.logger = logging.getLogger('telegram_bot')
 
     async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -16,44 +23,58 @@ class TimeSlotState(BookingState):
             await query.answer()
             
             if query.data == "cancel":
-                await query.edit_message_text('تم الغاء العملية. أرسل /start للبدء من جديد.')
+                await release_held_slot(self.sheets_facade, query.from_user.id, context.user_data)
+                await self.edit_message(query, 'تم الغاء العملية. أرسل /start للبدء من جديد.')
                 return ConversationHandler.END
             
             # Extract time slot from callback data
-            time_slot = query.data.split(':')[1]
-            context.user_data['time_slot'] = time_slot
-            pitch_name = context.user_data.get('pitch_name', 'Unknown')
-            location = context.user_data.get('location', 'Unknown')
-            
-            # Check if the time slot is still available (double-check)
-            if not self.sheets_facade.is_slot_available(pitch_name, time_slot):
-                await query.edit_message_text(
-                    f"للأسف المعاد اللي انت اخترته {time_slot}.\n"
-                    f"للملعب {pitch_name}.\n"
-                    f"غير متوفر حاليا.\n"
-                    f" برجاء اختيار معاد آخر."
-                )
-                self.logger.warning(f'User {query.from_user.id} selected unavailable time slot: {time_slot}')
+            time_slot = await self.decode_callback(query.data, TIME_SLOT)
+            if time_slot is None:
+                await self.edit_message(query, 'القائمة دي قديمة. أرسل /start للبدء من جديد.')
+                self.logger.warning(f'User {query.from_user.id} sent unknown callback data: {query.data}')
                 return ConversationHandler.END
-            
-            # Create confirmation buttons
-            keyboard = [
-                [InlineKeyboardButton("تأكيد الحجز", callback_data="confirm:yes")],
-                [InlineKeyboardButton("الغاء العملية", callback_data="cancel")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                f"انت اخترت الساعة {time_slot}\n\n"
-                f"في ملعب {pitch_name} في {location}.\n\n"
-                f"برجاء تأكيد حجزك: ",
-                reply_markup=reply_markup
-            )
-            
-            self.logger.info(f'User {query.from_user.id} selected time slot: {time_slot}')
-            return 3  # CONFIRMATION state
+            return await self.offer_slot(query, context, time_slot)
         except Exception as e:
+            HANDLER_ERRORS.inc(state=type(self).__name__)
             user_id = update.callback_query.from_user.id if update.callback_query else 'Unknown'
             self.logger.error(f'Error in handle_timeslot for user {user_id}: {str(e)}')
-            await update.callback_query.edit_message_text('An error occurred while processing your request.')
-            return ConversationHandler.END
\ No newline at end of file
+            await self.edit_message(update.callback_query, 'An error occurred while processing your request.')
+            return ConversationHandler.END
+
+    async def offer_slot(self, query, context: ContextTypes.DEFAULT_TYPE, time_slot: str) -> int:
+        """Hold the chosen slot and ask the user to confirm it"""
+        context.user_data['time_slot'] = time_slot
+        pitch_name = context.user_data.get('pitch_name', 'Unknown')
+        location = context.user_data.get('location', 'Unknown')
+        day = self.booking_day(context)
+        
+        # Hold the slot while the user confirms, fails if it is booked, held by someone else or has started
+        not_before = day_cutoff(day, self.timezone)
+        if not await self.sheets_facade.hold_slot(pitch_name, time_slot, query.from_user.id, day, not_before):
+            await self.edit_message(query,
+                f"للأسف المعاد اللي انت اخترته {format_slot(time_slot, day)}.\n"
+                f"للملعب {pitch_name}.\n"
+                f"غير متوفر حاليا.\n"
+                f" برجاء اختيار معاد آخر."
+            )
+            self.logger.warning(f'User {query.from_user.id} selected unavailable time slot: {time_slot}')
+            return ConversationHandler.END
+        # Remembered as a unit, so abandoning the booking later releases exactly this hold
+        context.user_data['held_slot'] = [pitch_name, time_slot, day.isoformat() if day else None]
+        
+        # Create confirmation buttons
+        keyboard = [
+            [InlineKeyboardButton("تأكيد الحجز", callback_data="confirm:yes")],
+            [InlineKeyboardButton("الغاء العملية", callback_data="cancel")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await self.edit_message(query,
+            f"انت اخترت الساعة {format_slot(time_slot, day)}\n\n"
+            f"في ملعب {pitch_name} في {location}.\n\n"
+            f"برجاء تأكيد حجزك: ",
+            reply_markup=reply_markup
+        )
+        
+        self.logger.info(f'User {query.from_user.id} selected time slot: {time_slot}')
+        return 3  # CONFIRMATION state
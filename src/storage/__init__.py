@@ -0,0 +1,12 @@
+# Repository Pattern Implementation
+# This package contains the storage interface and its backends for the E7gz Bot
+
+from .base import BookingStorage
+from .sqlite_storage import SQLiteStorage
+from .sheets_mirror import SheetsMirror
+
+__all__ = [
+    'BookingStorage',
+    'SQLiteStorage',
+    'SheetsMirror'
+]
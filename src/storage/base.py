@@ -0,0 +1,94 @@
+# Repository Pattern - Base Storage
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, Hashable, List, Optional
+
+from ..facades.slot_calendar import FreeSlot
+
+class BookingStorage(ABC):
+    """Storage interface the booking states depend on"""
+    @abstractmethod
+    def get_pitches(self) -> List[Dict]:
+        """Get every record of the pitch catalog"""
+        pass
+
+    @abstractmethod
+    def get_unique_locations(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def get_pitches_by_location(self, location: str) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def catalog_version(self) -> Hashable:
+        """Version of the pitch catalog, changes whenever the catalog changes"""
+        pass
+
+    @abstractmethod
+    def booking_version(self, pitch_name: str) -> Hashable:
+        """Version of a pitch's bookings, changes whenever its booked slots change"""
+        pass
+
+    @abstractmethod
+    def get_available_time_slots(self, pitch_name: str, day: Optional[date] = None,
+                                 not_before: Optional[int] = None) -> List[str]:
+        """Free slots of a pitch on a day, or among undated bookings when no day is given
+
+        Slots that start before not_before (minutes since midnight) are left
+        out, callers pass it when the day is today.
+        """
+        pass
+
+    @abstractmethod
+    def get_available_days(self, pitch_name: str, days: List[date], not_before: Optional[int] = None) -> List[date]:
+        """Days on which a pitch has at least one free slot, slots on the first day before not_before do not count"""
+        pass
+
+    @abstractmethod
+    def get_free_slots_range(self, pitch_name: str, start: date, end: date) -> Dict[date, List[str]]:
+        """Free slots of a pitch per day from start to end, days with nothing free are left out"""
+        pass
+
+    @abstractmethod
+    def find_free_slots(self, days: List[date], limit: int, location: Optional[str] = None,
+                        not_before: Optional[int] = None) -> List[FreeSlot]:
+        """Earliest free slots across every pitch, or the pitches of one location
+
+        Slots on the first day that start before not_before (minutes since
+        midnight) are skipped, so a search made in the evening does not
+        offer the morning's slots.
+        """
+        pass
+
+    @abstractmethod
+    def is_slot_available(self, pitch_name: str, time_slot: str, day: Optional[date] = None) -> bool:
+        pass
+
+    @abstractmethod
+    def hold_slot(self, pitch_name: str, time_slot: str, user_id, day: Optional[date] = None,
+                  not_before: Optional[int] = None) -> bool:
+        """Hold a free slot for a user, fails if it is taken or starts before not_before"""
+        pass
+
+    @abstractmethod
+    def release_slot(self, pitch_name: str, time_slot: str, user_id, day: Optional[date] = None) -> None:
+        pass
+
+    @abstractmethod
+    def add_booking(self, user_id: str, user_name: str, phone_number: str,
+                    pitch_name: str, time_slot: str, status: str = 'Booked',
+                    day: Optional[date] = None) -> bool:
+        pass
+
+    def is_stale(self) -> bool:
+        """Whether answers may be outdated because the backing store cannot be reached"""
+        return False
+
+    def warm_up(self) -> None:
+        """Connect and fill caches ahead of the first request"""
+        pass
+
+    def close(self) -> None:
+        """Release resources before shutdown"""
+        pass
@@ -0,0 +1,76 @@
+# Repository Pattern - Google Sheets Mirror
+import logging
+import threading
+
+class SheetsMirror:
+    """Keeps a local storage in sync with Google Sheets in the background
+
+    Bookings are pushed with their Booking ID. After a push that failed, and
+    so may have gone through, the sheet's booking IDs are read first and
+    bookings already in it are only marked as synced.
+    """
+    def __init__(self, storage, sheets_facade, interval: float = 60):
+        self.storage = storage
+        self.sheets_facade = sheets_facade
+        self.interval = interval
+        self.logger = logging.getLogger('telegram_bot')
+        self._uncertain = False
+        self._sync_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sheets-mirror', daemon=True)
+
+    def start(self) -> None:
+        """Start the background sync loop, its first sync runs right away on the loop's thread"""
+        self._thread.start()
+        self.logger.info(f'Sheets mirror started (interval={self.interval}s)')
+
+    def sync_once(self) -> None:
+        """Pull the catalog from Sheets and push local bookings that are not mirrored yet"""
+        # Mirror traffic yields Sheets quota to user-facing reads
+        with self._sync_lock, self.sheets_facade.governor.background():
+            self._sync()
+
+    def _sync(self) -> None:
+        try:
+            self.sheets_facade.invalidate_catalog()
+            self.storage.replace_pitches(self.sheets_facade.get_pitches())
+
+            # Import the bookings already in the sheet once, retried until it succeeds
+            if not self.storage.is_seeded():
+                self.storage.import_bookings(self.sheets_facade.get_bookings())
+
+            pending = self.storage.get_unsynced_bookings()
+            if pending:
+                rows = pending
+                if self._uncertain:
+                    existing = self.sheets_facade.booking_ids()
+                    if existing is not None:
+                        rows = [booking for booking in pending if booking['Booking ID'] not in existing]
+                try:
+                    if rows:
+                        self.sheets_facade.append_bookings(rows)
+                except Exception:
+                    self._uncertain = True
+                    raise
+                self._uncertain = False
+                self.storage.mark_synced([booking['id'] for booking in pending])
+                self.logger.info(f'Mirrored {len(rows)} bookings to Google Sheets')
+        except Exception as e:
+            self.logger.error(f'Sheets mirror sync failed: {str(e)}')
+
+    def _run(self) -> None:
+        self.sync_once()
+        while not self._stop_event.wait(self.interval):
+            self.sync_once()
+
+    def stop(self) -> None:
+        """Stop the sync loop after a final sync"""
+        self._stop_event.set()
+        # A sync still running would push the same unsynced bookings again
+        if self._thread.is_alive():
+            self._thread.join(timeout=30)
+        if self._thread.is_alive():
+            self.logger.warning('Sheets mirror sync still running, skipping the final sync')
+        else:
+            self.sync_once()
+        self.logger.info('Sheets mirror stopped')
@@ -0,0 +1,328 @@
+# Repository Pattern - SQLite Storage
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import date
+from typing import Dict, List, Optional
+
+from .base import BookingStorage
+from ..facades.reservation_manager import ReservationManager
+from ..facades.slot_calendar import (
+    FreeSlot, SlotCalendar, format_booking_time, has_started, not_started, offered_slots, parse_booking_time
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pitches (
+    location TEXT NOT NULL,
+    pitch_name TEXT NOT NULL,
+    time_slots TEXT NOT NULL DEFAULT '',
+    owner_phone TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_pitches_location ON pitches (location);
+CREATE INDEX IF NOT EXISTS idx_pitches_name ON pitches (pitch_name);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    user_name TEXT NOT NULL DEFAULT '',
+    phone_number TEXT NOT NULL DEFAULT '',
+    pitch_name TEXT NOT NULL,
+    time_slot TEXT NOT NULL,
+    status TEXT NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0,
+    booking_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_pitch ON bookings (pitch_name);
+CREATE INDEX IF NOT EXISTS idx_bookings_pitch_slot ON bookings (pitch_name, time_slot);
+CREATE INDEX IF NOT EXISTS idx_bookings_unsynced ON bookings (synced) WHERE synced = 0;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class SQLiteStorage(BookingStorage):
+    """Local indexed storage for the pitch catalog and bookings"""
+    def __init__(self, db_path: str, hold_seconds: float = 300):
+        self.db_path = db_path
+        self.logger = logging.getLogger('telegram_bot')
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # Calls arrive from the Sheets thread pool, so access is serialized with a lock
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+        self._catalog_version = 0
+        self._booking_versions: Dict[str, int] = {}
+        self._booking_generation = 0
+        self.calendar = SlotCalendar()
+        self._load_calendar()
+        self.reservations = ReservationManager(hold_seconds)
+        self.reservations.start()
+        self.logger.info(f'Opened SQLite storage at {db_path}')
+
+    def _migrate(self) -> None:
+        """Add the booking_id column to databases created before it existed"""
+        columns = {row['name'] for row in self.connection.execute('PRAGMA table_info(bookings)')}
+        if 'booking_id' not in columns:
+            with self.connection:
+                self.connection.execute('ALTER TABLE bookings ADD COLUMN booking_id TEXT')
+                # Unsynced rows need an ID before they are mirrored, so a retried append can be recognised
+                self.connection.execute(
+                    'UPDATE bookings SET booking_id = lower(hex(randomblob(16))) WHERE synced = 0'
+                )
+            self.logger.info('Added booking_id column to SQLite bookings table')
+
+    def _load_calendar(self) -> None:
+        """Rebuild the per-day booking bitmaps from the bookings table"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT pitch_name, time_slot FROM bookings WHERE status = 'Booked'"
+            ).fetchall()
+            dated = []
+            for row in rows:
+                day, time_slot = parse_booking_time(row['time_slot'])
+                if day:
+                    dated.append((row['pitch_name'], day, time_slot))
+            self.calendar.replace(dated)
+
+    def catalog_version(self) -> int:
+        """Version of the pitch catalog, bumped by replace_pitches"""
+        return self._catalog_version
+
+    def booking_version(self, pitch_name: str):
+        """Version of a pitch's bookings, bumped by add_booking and import_bookings"""
+        return self._booking_generation, self._booking_versions.get(pitch_name, 0)
+
+    def _pitch_records(self, rows) -> List[Dict]:
+        return [
+            {
+                'Location': row['location'],
+                'Pitch Name': row['pitch_name'],
+                'Time Slots': row['time_slots'],
+                'Owner Phone': row['owner_phone']
+            }
+            for row in rows
+        ]
+
+    def get_pitches(self) -> List[Dict]:
+        """Get every pitch in the catalog"""
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT location, pitch_name, time_slots, owner_phone FROM pitches ORDER BY rowid'
+            ).fetchall()
+        return self._pitch_records(rows)
+
+    def get_unique_locations(self) -> List[str]:
+        """Get unique locations from the pitches table"""
+        with self._lock:
+            rows = self.connection.execute('SELECT DISTINCT location FROM pitches ORDER BY location').fetchall()
+        return [row['location'] for row in rows]
+
+    def get_pitches_by_location(self, location: str) -> List[Dict]:
+        """Get pitches for a specific location"""
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT location, pitch_name, time_slots, owner_phone FROM pitches WHERE location = ?',
+                (location,)
+            ).fetchall()
+        return self._pitch_records(rows)
+
+    def _offered_slots(self, pitch_name: str) -> List[str]:
+        with self._lock:
+            pitch = self.connection.execute(
+                'SELECT time_slots FROM pitches WHERE pitch_name = ? LIMIT 1', (pitch_name,)
+            ).fetchone()
+        if not pitch or not pitch['time_slots']:
+            return []
+        return [slot.strip() for slot in pitch['time_slots'].split(',') if slot.strip()]
+
+    def get_available_time_slots(self, pitch_name: str, day: Optional[date] = None,
+                                 not_before: Optional[int] = None) -> List[str]:
+        """Get available time slots for a specific pitch, on a day when given, skipping slots before not_before"""
+        available_slots = self._offered_slots(pitch_name)
+        if day:
+            return self.calendar.free_slots(pitch_name, day, not_started(available_slots, not_before))
+        with self._lock:
+            booked = self.connection.execute(
+                "SELECT time_slot FROM bookings WHERE pitch_name = ? AND status = 'Booked'", (pitch_name,)
+            ).fetchall()
+        booked_slots = set(row['time_slot'] for row in booked)
+        return [slot for slot in available_slots if slot not in booked_slots]
+
+    def get_available_days(self, pitch_name: str, days: List[date], not_before: Optional[int] = None) -> List[date]:
+        """Days on which a pitch has at least one free slot, the first day's slots before not_before do not count"""
+        return self.calendar.free_days(pitch_name, days, self._offered_slots(pitch_name), not_before)
+
+    def get_free_slots_range(self, pitch_name: str, start: date, end: date) -> Dict[date, List[str]]:
+        """Free slots of a pitch per day from start to end"""
+        return self.calendar.free_slots_range(pitch_name, start, end, self._offered_slots(pitch_name))
+
+    def find_free_slots(self, days: List[date], limit: int, location: Optional[str] = None,
+                        not_before: Optional[int] = None) -> List[FreeSlot]:
+        """Earliest free slots across every pitch, or the pitches of one location"""
+        records = self.get_pitches() if location is None else self.get_pitches_by_location(location)
+        pitches = [(record['Location'], record['Pitch Name'], offered_slots(record)) for record in records]
+        return self.calendar.earliest_free(pitches, days, limit, not_before)
+
+    def _is_booked(self, pitch_name: str, time_slot: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM bookings WHERE pitch_name = ? AND time_slot = ? AND status = 'Booked' LIMIT 1",
+            (pitch_name, time_slot)
+        ).fetchone()
+        return row is not None
+
+    def is_slot_available(self, pitch_name: str, time_slot: str, day: Optional[date] = None) -> bool:
+        """Check if a specific time slot is available for a pitch"""
+        with self._lock:
+            return not self._is_booked(pitch_name, format_booking_time(time_slot, day))
+
+    def hold_slot(self, pitch_name: str, time_slot: str, user_id, day: Optional[date] = None,
+                  not_before: Optional[int] = None) -> bool:
+        """Take or refresh a short-lived hold on a free slot for a user, a slot that has started cannot be held"""
+        if has_started(time_slot, not_before):
+            return False
+        with self.reservations.lock:
+            if not self.is_slot_available(pitch_name, time_slot, day):
+                return False
+            return self.reservations.hold(pitch_name, format_booking_time(time_slot, day), user_id)
+
+    def release_slot(self, pitch_name: str, time_slot: str, user_id, day: Optional[date] = None) -> None:
+        """Release a user's hold on a slot"""
+        self.reservations.release(pitch_name, format_booking_time(time_slot, day), user_id)
+
+    def add_booking(self, user_id: str, user_name: str, phone_number: str,
+                    pitch_name: str, time_slot: str, status: str = 'Booked',
+                    day: Optional[date] = None) -> bool:
+        """Add a new booking to the bookings table, for a day when given"""
+        booking_time = format_booking_time(time_slot, day)
+        try:
+            with self.reservations.lock, self._lock:
+                if status == 'Booked':
+                    if (self._is_booked(pitch_name, booking_time) or
+                            self.reservations.is_held_by_other(pitch_name, booking_time, user_id)):
+                        self.logger.warning(f'Slot {booking_time} for {pitch_name} is no longer available to user {user_id}')
+                        return False
+                with self.connection:
+                    self.connection.execute(
+                        'INSERT INTO bookings (user_id, user_name, phone_number, pitch_name, time_slot, status, '
+                        'booking_id) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (str(user_id), user_name, phone_number, pitch_name, booking_time, status, uuid.uuid4().hex)
+                    )
+                if status == 'Booked' and day:
+                    self.calendar.book(pitch_name, day, time_slot)
+                self._booking_versions[pitch_name] = self._booking_versions.get(pitch_name, 0) + 1
+                self.reservations.release(pitch_name, booking_time, user_id)
+            return True
+        except Exception as e:
+            self.logger.error(f'Error adding booking: {str(e)}')
+            return False
+
+    def replace_pitches(self, records: List[Dict]) -> None:
+        """Replace the pitch catalog with records shaped like the Pitches sheet"""
+        rows = [
+            (
+                str(record.get('Location', '')),
+                str(record.get('Pitch Name', '')),
+                str(record.get('Time Slots', '')),
+                str(record.get('Owner Phone', ''))
+            )
+            for record in records
+        ]
+        with self._lock, self.connection:
+            current = self.connection.execute(
+                'SELECT location, pitch_name, time_slots, owner_phone FROM pitches ORDER BY rowid'
+            ).fetchall()
+            if [tuple(row) for row in current] == rows:
+                return
+            self.connection.execute('DELETE FROM pitches')
+            self.connection.executemany(
+                'INSERT INTO pitches (location, pitch_name, time_slots, owner_phone) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            self._catalog_version += 1
+
+    def has_bookings(self) -> bool:
+        """Check whether any booking has been stored"""
+        with self._lock:
+            return self.connection.execute('SELECT 1 FROM bookings LIMIT 1').fetchone() is not None
+
+    def is_seeded(self) -> bool:
+        """Check whether the bookings already in Google Sheets have been imported"""
+        with self._lock:
+            return self.connection.execute("SELECT 1 FROM meta WHERE key = 'seeded'").fetchone() is not None
+
+    def import_bookings(self, records: List[Dict]) -> None:
+        """Import bookings shaped like the Bookings sheet, marked as already synced, and record the seed
+
+        Rows matching a booking already stored, e.g. one made locally and
+        mirrored before the seed succeeded, are skipped.
+        """
+        with self._lock, self.connection:
+            existing = set()
+            existing_ids = set()
+            for row in self.connection.execute('SELECT user_id, pitch_name, time_slot, status, booking_id FROM bookings'):
+                existing.add(tuple(row)[:4])
+                if row['booking_id']:
+                    existing_ids.add(row['booking_id'])
+            rows = []
+            for record in records:
+                row = (
+                    str(record.get('User ID', '')),
+                    str(record.get('User Name', '')),
+                    str(record.get('Phone Number', '')),
+                    str(record.get('Pitch Name', '')),
+                    str(record.get('Date/Time', '')),
+                    str(record.get('Status', '')),
+                    str(record.get('Booking ID', '')) or None
+                )
+                if row[6] in existing_ids or (row[0], row[3], row[4], row[5]) in existing:
+                    continue
+                rows.append(row)
+            self.connection.executemany(
+                'INSERT INTO bookings (user_id, user_name, phone_number, pitch_name, time_slot, status, booking_id, '
+                'synced) VALUES (?, ?, ?, ?, ?, ?, ?, 1)',
+                rows
+            )
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seeded', '1')")
+        self._load_calendar()
+        # Bumped only once the import is committed and loaded, so no keyboard is cached for a half-done import
+        self._booking_generation += 1
+
+    def get_unsynced_bookings(self, limit: int = 500) -> List[Dict]:
+        """Get bookings that have not been mirrored to Google Sheets yet"""
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT * FROM bookings WHERE synced = 0 ORDER BY id LIMIT ?', (limit,)
+            ).fetchall()
+        return [
+            {
+                'id': row['id'],
+                'User ID': row['user_id'],
+                'User Name': row['user_name'],
+                'Phone Number': row['phone_number'],
+                'Pitch Name': row['pitch_name'],
+                'Date/Time': row['time_slot'],
+                'Status': row['status'],
+                'Booking ID': row['booking_id'] or ''
+            }
+            for row in rows
+        ]
+
+    def mark_synced(self, booking_ids: List[int]) -> None:
+        """Mark bookings as mirrored to Google Sheets"""
+        with self._lock, self.connection:
+            self.connection.executemany('UPDATE bookings SET synced = 1 WHERE id = ?', [(i,) for i in booking_ids])
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self.reservations.stop()
+        with self._lock:
+            self.connection.close()
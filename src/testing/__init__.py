@@ -0,0 +1,10 @@
+# Testing Utilities
+# This package contains local stand-ins for external services used by the E7gz Bot
+
+from .fake_sheets import FakeSheetsClient, FakeSpreadsheet, FakeWorksheet
+
+__all__ = [
+    'FakeSheetsClient',
+    'FakeSpreadsheet',
+    'FakeWorksheet'
+]
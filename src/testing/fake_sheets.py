@@ -0,0 +1,181 @@
+# Testing Utilities - Fake Google Sheets service
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import gspread
+from gspread.utils import a1_range_to_grid_range, numericise_all
+
+class FakeResponse:
+    """Minimal HTTP response accepted by gspread.exceptions.APIError"""
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.text = message
+        self._error = {'code': status_code, 'message': message, 'status': 'RESOURCE_EXHAUSTED'}
+
+    def json(self) -> Dict:
+        return {'error': self._error}
+
+class FakeSheetsClient:
+    """In-memory stand-in for the gspread client with injectable latency and quota errors
+
+    Every worksheet call sleeps for latency +/- jitter seconds and fails with a
+    429 APIError with probability error_rate, or for the next n calls after fail_next(n).
+    """
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.call_counts: Counter = Counter()
+        self.spreadsheets: Dict[str, 'FakeSpreadsheet'] = {}
+        self._random = random.Random(seed)
+        self._forced_errors = 0
+        self._lock = threading.Lock()
+
+    def fail_next(self, count: int = 1) -> None:
+        """Make the next count calls fail with a 429 response"""
+        with self._lock:
+            self._forced_errors += count
+
+    def _call(self, name: str) -> None:
+        """Record a call, apply latency and inject quota errors"""
+        with self._lock:
+            self.call_counts[name] += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._forced_errors > 0 or (self.error_rate and self._random.random() < self.error_rate)
+            if self._forced_errors > 0:
+                self._forced_errors -= 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise gspread.exceptions.APIError(FakeResponse(429, 'Quota exceeded for quota metric (fake)'))
+
+    def create(self, title: str, key: Optional[str] = None) -> 'FakeSpreadsheet':
+        """Create an empty spreadsheet"""
+        spreadsheet = FakeSpreadsheet(self, title, key or f'fake-{len(self.spreadsheets) + 1}')
+        self.spreadsheets[spreadsheet.id] = spreadsheet
+        return spreadsheet
+
+    def open_by_key(self, key: str) -> 'FakeSpreadsheet':
+        self._call('open_by_key')
+        if key not in self.spreadsheets:
+            raise gspread.exceptions.SpreadsheetNotFound(key)
+        return self.spreadsheets[key]
+
+    def open(self, title: str) -> 'FakeSpreadsheet':
+        self._call('open')
+        for spreadsheet in self.spreadsheets.values():
+            if spreadsheet.title == title:
+                return spreadsheet
+        raise gspread.exceptions.SpreadsheetNotFound(title)
+
+class FakeSpreadsheet:
+    """In-memory spreadsheet holding named worksheets"""
+    def __init__(self, client: FakeSheetsClient, title: str, key: str):
+        self.client = client
+        self.title = title
+        self.id = key
+        self._worksheets: Dict[str, 'FakeWorksheet'] = {}
+
+    def add_table(self, title: str, rows: List[List]) -> 'FakeWorksheet':
+        """Create a worksheet pre-filled with rows, without counting a call"""
+        worksheet = FakeWorksheet(self.client, title, [list(row) for row in rows])
+        self._worksheets[title] = worksheet
+        return worksheet
+
+    def worksheet(self, title: str) -> 'FakeWorksheet':
+        self.client._call('worksheet')
+        if title not in self._worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def worksheets(self) -> List['FakeWorksheet']:
+        self.client._call('worksheets')
+        return list(self._worksheets.values())
+
+    def add_worksheet(self, title: str, rows: int = 100, cols: int = 20, index=None) -> 'FakeWorksheet':
+        self.client._call('add_worksheet')
+        return self.add_table(title, [])
+
+class FakeWorksheet:
+    """In-memory worksheet backed by a list of rows"""
+    def __init__(self, client: FakeSheetsClient, title: str, rows: List[List]):
+        self.client = client
+        self.title = title
+        self.rows = rows
+        self._lock = threading.Lock()
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    def get_all_records(self, **kwargs) -> List[Dict]:
+        self.client._call('get_all_records')
+        with self._lock:
+            if not self.rows:
+                return []
+            headers = self.rows[0]
+            return [
+                dict(zip(headers, numericise_all(row + [''] * (len(headers) - len(row)))))
+                for row in self.rows[1:]
+            ]
+
+    def get_all_values(self, **kwargs) -> List[List]:
+        self.client._call('get_all_values')
+        with self._lock:
+            return [[str(value) for value in row] for row in self.rows]
+
+    def get_values(self, range_name: Optional[str] = None, **kwargs) -> List[List]:
+        self.client._call('get_values')
+        with self._lock:
+            if not range_name:
+                return [[str(value) for value in row] for row in self.rows]
+            grid = a1_range_to_grid_range(range_name)
+            rows = self.rows[grid.get('startRowIndex', 0):grid.get('endRowIndex')]
+            start_col = grid.get('startColumnIndex', 0)
+            end_col = grid.get('endColumnIndex')
+            return [[str(value) for value in row[start_col:end_col]] for row in rows]
+
+    def row_values(self, row: int, **kwargs) -> List:
+        self.client._call('row_values')
+        with self._lock:
+            if row > len(self.rows):
+                return []
+            return [str(value) for value in self.rows[row - 1]]
+
+    def col_values(self, col: int, **kwargs) -> List:
+        self.client._call('col_values')
+        with self._lock:
+            values = [str(row[col - 1]) if col <= len(row) else '' for row in self.rows]
+            while values and values[-1] == '':
+                values.pop()
+            return values
+
+    def insert_cols(self, values: List[List], col: int = 1, **kwargs) -> None:
+        self.client._call('insert_cols')
+        with self._lock:
+            for offset, column in enumerate(values):
+                for index, value in enumerate(column):
+                    while index >= len(self.rows):
+                        self.rows.append([])
+                    row = self.rows[index]
+                    while len(row) < col - 1 + offset:
+                        row.append('')
+                    row.insert(col - 1 + offset, value)
+
+    def append_row(self, values: List, **kwargs) -> None:
+        self.client._call('append_row')
+        with self._lock:
+            self.rows.append(list(values))
+
+    def append_rows(self, values: List[List], **kwargs) -> None:
+        self.client._call('append_rows')
+        with self._lock:
+            self.rows.extend(list(row) for row in values)
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None) -> None:
+        self.client._call('delete_rows')
+        with self._lock:
+            del self.rows[start_index - 1:(end_index or start_index)]